@@ -4,10 +4,10 @@ Auth Service - Authentication and Authorization microservice
 
 import os
 import sys
-import sqlite3
+import math
 import structlog
 from datetime import datetime, timedelta
-from fastapi import FastAPI, HTTPException, Depends, status, Form
+from fastapi import FastAPI, HTTPException, Depends, Request, status, Form
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional
@@ -16,6 +16,18 @@ from typing import Optional
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+from shared.database import fetch_one, fetch_value, get_pool_stats, create_tables, close_database
+from shared.hashing import (
+    HashingOverloaded, verify_password_async, schedule_rehash,
+    get_hashing_stats, start_hashing_pool, close_hashing_pool
+)
+from shared.security import ACCESS_TOKEN_EXPIRE_HOURS, get_token_cache_stats
+from shared.revocation import (
+    revoke_token, revoke_user_tokens, get_revocation_stats,
+    start_revocation_refresher, stop_revocation_refresher
+)
+from shared.rate_limit import LoginRateLimited, check_login_rate, get_login_rate_stats
+
 try:
     from shared.security import create_access_token, verify_token, verify_password, get_password_hash
 except ImportError:
@@ -76,11 +88,6 @@ structlog.configure(
 
 logger = structlog.get_logger()
 
-# Database helper
-def get_db_connection():
-    """Get database connection."""
-    return sqlite3.connect("recruitment_system.db")
-
 # Pydantic models
 class LoginRequest(BaseModel):
     username: str
@@ -102,28 +109,26 @@ class UserInfo(BaseModel):
     role_id: int
 
 @app.post("/login", response_model=TokenResponse)
-async def login(username: str = Form(...), password: str = Form(...)):
+async def login(request: Request, username: str = Form(...), password: str = Form(...)):
     """Authenticate user and return token."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        check_login_rate(username, request.client.host if request.client else None)
 
-        cursor.execute("""
+        user = await fetch_one("""
             SELECT c.id, c.person_id, c.username, c.password, p.firstname, p.lastname, p.email, p.role_id
             FROM credential c
             JOIN person p ON c.person_id = p.id
             WHERE c.username = ?
         """, (username,))
 
-        user = cursor.fetchone()
-        conn.close()
-
-        if not user or not verify_password(password, user[3]):
+        if not user or not await verify_password_async(password, user[3]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
             )
 
+        schedule_rehash(user[0], password, user[3])
+
         # Create access token
         token_data = {
             "user_id": user[0],
@@ -140,6 +145,20 @@ async def login(username: str = Form(...), password: str = Form(...)):
 
     except HTTPException:
         raise
+    except LoginRateLimited as e:
+        logger.warning("Login rate limited", username=username, scope=e.scope)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please retry later",
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    except HashingOverloaded:
+        logger.warning("Login rejected, password hashing overloaded", username=username)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error("Login error", error=str(e))
         raise HTTPException(
@@ -161,6 +180,74 @@ async def verify_auth_token(credentials: HTTPAuthorizationCredentials = Depends(
 
     return {"valid": True, "payload": payload}
 
+@app.post("/revoke")
+async def revoke_auth_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoke the presented token (logout)."""
+    payload = verify_token(credentials.credentials)
+
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+    try:
+        if not await revoke_token(payload):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Token has no jti; revoke all tokens for the user instead"
+            )
+
+        logger.info("Token revoked", user_id=payload.get("user_id"))
+        return {"revoked": True}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Token revocation error", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to revoke token"
+        )
+
+@app.post("/user/{user_id}/revoke")
+async def revoke_all_user_tokens(user_id: int, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoke every token issued to a user so far; allowed for the user and admins."""
+    payload = verify_token(credentials.credentials)
+
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+    try:
+        if payload.get("user_id") != user_id:
+            role_id = await fetch_value("""
+                SELECT p.role_id
+                FROM credential c
+                JOIN person p ON c.person_id = p.id
+                WHERE c.id = ?
+            """, (payload.get("user_id"),))
+            if role_id != 1:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Not allowed to revoke tokens for this user"
+                )
+
+        await revoke_user_tokens(user_id, ACCESS_TOKEN_EXPIRE_HOURS * 3600)
+        logger.info("All tokens revoked", user_id=user_id, by_user_id=payload.get("user_id"))
+        return {"revoked": True, "user_id": user_id}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Token revocation error", user_id=user_id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to revoke tokens"
+        )
+
 @app.get("/user/{user_id}", response_model=UserInfo)
 async def get_user_info(user_id: int, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get user information."""
@@ -174,19 +261,13 @@ async def get_user_info(user_id: int, credentials: HTTPAuthorizationCredentials
         )
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        user = await fetch_one("""
             SELECT c.id, c.person_id, c.username, p.firstname, p.lastname, p.email, p.role_id
             FROM credential c
             JOIN person p ON c.person_id = p.id
             WHERE c.id = ?
         """, (user_id,))
 
-        user = cursor.fetchone()
-        conn.close()
-
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -212,18 +293,41 @@ async def get_user_info(user_id: int, credentials: HTTPAuthorizationCredentials
             detail="Failed to get user information"
         )
 
+@app.on_event("startup")
+async def startup_event():
+    """Start hashing workers, apply pending schema migrations and start the revocation refresher."""
+    await start_hashing_pool()
+    try:
+        create_tables()
+        logger.info("Database tables created/verified")
+    except Exception as e:
+        logger.error("Failed to initialize database", error=str(e))
+    await start_revocation_refresher()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the revocation refresher, release database connections and stop hashing workers."""
+    await stop_revocation_refresher()
+    close_database()
+    close_hashing_pool()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        result = cursor.fetchone()
-        conn.close()
-
-        if result and result[0] == 1:
-            return {"status": "healthy", "service": "auth", "timestamp": datetime.now().isoformat()}
+        result = await fetch_value("SELECT 1")
+
+        if result == 1:
+            return {
+                "status": "healthy",
+                "service": "auth",
+                "timestamp": datetime.now().isoformat(),
+                "database_pool": get_pool_stats(),
+                "password_hashing": get_hashing_stats(),
+                "token_cache": get_token_cache_stats(),
+                "token_revocation": get_revocation_stats(),
+                "login_rate_limit": get_login_rate_stats()
+            }
         else:
             return {"status": "unhealthy", "error": "Database check failed"}
 
@@ -22,6 +22,7 @@ REQUIRED_PACKAGES = [
     'sqlalchemy',
     'PyJWT',
     'httpx',
+    'numpy',
     'requests',
     'pytest',
     'python_dotenv',
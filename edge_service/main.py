@@ -4,21 +4,47 @@ Handles routing, authentication, and serves the web interface
 """
 
 import os
+import re
+import math
+import asyncio
 import sys
-import sqlite3
+import html
 import structlog
 from datetime import datetime
 from fastapi import FastAPI, Request, Depends, HTTPException, Form, File, UploadFile
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.requests import ClientDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
 
 # Add project root to path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+# Handlers read through fetch_* (read-only pool) and write through
+# execute/run_transaction (single writer connection).
+from shared.database import (
+    fetch_all, fetch_one, fetch_value, execute, run_transaction, get_pool_stats,
+    get_write_queue_stats, create_tables, close_database
+)
+from shared.matching import get_job_requirements, rank_candidates, get_competence_matrix
+from shared.availability import MATCH_MODES, find_available_people, get_availability_index
+from shared.schemas import ApplicationParamForm
+from shared.hashing import (
+    HashingOverloaded, get_password_hash_async, verify_password_async, schedule_rehash,
+    get_credential_cost_report, get_hashing_stats, start_hashing_pool, close_hashing_pool
+)
+from shared.user_cache import get_user_cache, invalidate_person, get_user_cache_stats
+from shared.sessions import ServerSessionMiddleware, invalidate_user_sessions, get_session_stats
+from shared.rate_limit import LoginRateLimited, check_login_rate, get_login_rate_stats
+from shared.upstream import (
+    start_upstream_clients, get_upstream_client, close_upstream_clients, get_upstream_stats
+)
+from shared.resilience import CircuitOpenError, get_retry_budget
+from shared.job_listing import get_job_listing, etag_matches, get_job_listing_stats
+
 try:
     from shared.security import verify_password, create_access_token, verify_token, get_password_hash
     print("✓ Successfully imported security module")
@@ -82,8 +108,8 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Add session middleware first
-app.add_middleware(SessionMiddleware, secret_key="your-secret-key-here-change-in-production")
+# Add session middleware first; the cookie only carries an opaque session id
+app.add_middleware(ServerSessionMiddleware)
 
 # CORS configuration
 app.add_middleware(
@@ -98,18 +124,13 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="edge_service/static"), name="static")
 templates = Jinja2Templates(directory="edge_service/templates")
 
-# Database helper functions
-def get_db_connection():
-    """Get database connection."""
-    return sqlite3.connect("recruitment_system.db")
+async def authenticate_user(username: str, password: str):
+    """Authenticate user credentials.
 
-def authenticate_user(username: str, password: str):
-    """Authenticate user credentials."""
+    Raises HashingOverloaded when too many password checks are queued.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        user = await fetch_one("""
             SELECT c.id, c.person_id, c.username, c.password, 
                    p.firstname, p.lastname, p.email, p.role_id
             FROM credential c
@@ -117,10 +138,8 @@ def authenticate_user(username: str, password: str):
             WHERE c.username = ?
         """, (username,))
 
-        user = cursor.fetchone()
-        conn.close()
-
-        if user and verify_password(password, user[3]):
+        if user and await verify_password_async(password, user[3]):
+            schedule_rehash(user[0], password, user[3])
             return {
                 "id": user[0],
                 "person_id": user[1],
@@ -132,31 +151,33 @@ def authenticate_user(username: str, password: str):
             }
         return None
 
+    except HashingOverloaded:
+        raise
     except Exception as e:
         logger.error("Authentication failed", error=str(e))
         return None
 
-def get_current_user(request: Request):
+async def get_current_user(request: Request):
     """Get current user from session or token."""
     # Check session first
     user_id = request.session.get("user_id")
     if user_id:
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
+        cache = get_user_cache()
+        cached = cache.get(user_id)
+        if cached is not None:
+            return cached
 
-            cursor.execute("""
+        generation = cache.generation
+        try:
+            user = await fetch_one("""
                 SELECT c.id, c.person_id, c.username, p.firstname, p.lastname, p.email, p.role_id
                 FROM credential c
                 JOIN person p ON c.person_id = p.id
                 WHERE c.id = ?
             """, (user_id,))
 
-            user = cursor.fetchone()
-            conn.close()
-
             if user:
-                return {
+                current_user = {
                     "id": user[0],
                     "person_id": user[1],
                     "username": user[2],
@@ -165,16 +186,85 @@ def get_current_user(request: Request):
                     "email": user[5],
                     "role_id": user[6]
                 }
+                cache.put(user_id, current_user, generation)
+                return current_user
         except Exception as e:
             logger.error("User lookup failed", error=str(e))
 
     return None
 
+async def get_system_counts():
+    """Read the trigger-maintained global and per-role counters."""
+    row = await fetch_one("""
+        SELECT
+            COALESCE((SELECT value FROM stat_counter WHERE name = 'active_jobs'), 0),
+            COALESCE((SELECT value FROM stat_counter WHERE name = 'total_applications'), 0),
+            COALESCE((SELECT persons FROM role_counter WHERE role_id = 2), 0),
+            COALESCE((SELECT persons FROM role_counter WHERE role_id = 3), 0)
+    """)
+    return {
+        "active_jobs": row[0],
+        "total_applications": row[1],
+        "total_candidates": row[2],
+        "total_recruiters": row[3]
+    }
+
+def _create_applicant(conn, username: str, email: str, firstname: str,
+                      lastname: str, hashed_password: str):
+    """Insert an applicant's person and credential rows in one transaction.
+
+    Returns an error message if the username or email is taken, else None.
+    """
+    cursor = conn.cursor()
+
+    # Check if username or email already exists
+    cursor.execute("SELECT id FROM credential WHERE username = ?", (username,))
+    if cursor.fetchone():
+        return "Username already exists"
+
+    cursor.execute("SELECT id FROM person WHERE email = ?", (email,))
+    if cursor.fetchone():
+        return "Email already exists"
+
+    # Create person
+    cursor.execute("""
+        INSERT INTO person (firstname, lastname, email, role_id)
+        VALUES (?, ?, ?, ?)
+    """, (firstname, lastname, email, 2))  # Default to Applicant role
+
+    person_id = cursor.lastrowid
+
+    # Create credential
+    cursor.execute("""
+        INSERT INTO credential (person_id, username, password)
+        VALUES (?, ?, ?)
+    """, (person_id, username, hashed_password))
+
+    return None
+
+@app.on_event("startup")
+async def startup_event():
+    """Start hashing workers and upstream clients, create tables and apply pending schema migrations."""
+    await start_hashing_pool()
+    await start_upstream_clients(SERVICE_URLS)
+    try:
+        create_tables()
+        logger.info("Database tables created/verified")
+    except Exception as e:
+        logger.error("Failed to initialize database", error=str(e))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued database writes, release connections and stop hashing workers."""
+    await close_upstream_clients()
+    close_database()
+    close_hashing_pool()
+
 # Routes
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     """Home page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     return templates.TemplateResponse("index.html", {"request": request, "user": user})
 
 @app.get("/login", response_class=HTMLResponse)
@@ -185,7 +275,21 @@ async def login_page(request: Request):
 @app.post("/login")
 async def login(request: Request, username: str = Form(...), password: str = Form(...)):
     """Handle login."""
-    user = authenticate_user(username, password)
+    try:
+        check_login_rate(username, request.client.host if request.client else None)
+        user = await authenticate_user(username, password)
+    except LoginRateLimited as e:
+        logger.warning("Login rate limited", username=username, scope=e.scope)
+        return templates.TemplateResponse("login.html", {
+            "request": request,
+            "error": "Too many login attempts, please wait and try again"
+        }, status_code=429, headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except HashingOverloaded:
+        logger.warning("Login rejected, password hashing overloaded", username=username)
+        return templates.TemplateResponse("login.html", {
+            "request": request,
+            "error": "The server is busy, please try again in a moment"
+        }, status_code=503, headers={"Retry-After": "1"})
 
     if not user:
         return templates.TemplateResponse("login.html", {
@@ -216,46 +320,30 @@ async def register(
 ):
     """Handle registration."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Check if username or email already exists
-        cursor.execute("SELECT id FROM credential WHERE username = ?", (username,))
-        if cursor.fetchone():
-            conn.close()
-            return templates.TemplateResponse("register.html", {
-                "request": request,
-                "error": "Username already exists"
-            })
-
-        cursor.execute("SELECT id FROM person WHERE email = ?", (email,))
-        if cursor.fetchone():
-            conn.close()
+        # Reject taken usernames and emails before paying for bcrypt; the
+        # checks in _create_applicant still guard against concurrent signups
+        if await fetch_value("SELECT id FROM credential WHERE username = ?", (username,)):
+            error = "Username already exists"
+        elif await fetch_value("SELECT id FROM person WHERE email = ?", (email,)):
+            error = "Email already exists"
+        else:
+            hashed_password = await get_password_hash_async(password)
+            error = await run_transaction(
+                _create_applicant, username, email, firstname, lastname, hashed_password
+            )
+        if error:
             return templates.TemplateResponse("register.html", {
                 "request": request,
-                "error": "Email already exists"
+                "error": error
             })
 
-        # Create person
-        cursor.execute("""
-            INSERT INTO person (firstname, lastname, email, role_id)
-            VALUES (?, ?, ?, ?)
-        """, (firstname, lastname, email, 2))  # Default to Applicant role
-
-        person_id = cursor.lastrowid
-
-        # Create credential
-        hashed_password = get_password_hash(password)
-        cursor.execute("""
-            INSERT INTO credential (person_id, username, password)
-            VALUES (?, ?, ?)
-        """, (person_id, username, hashed_password))
-
-        conn.commit()
-        conn.close()
-
         return RedirectResponse(url="/login?message=Registration successful", status_code=302)
 
+    except HashingOverloaded:
+        return templates.TemplateResponse("register.html", {
+            "request": request,
+            "error": "The server is busy, please try again in a moment"
+        }, status_code=503, headers={"Retry-After": "1"})
     except Exception as e:
         logger.error("Registration failed", error=str(e))
         return templates.TemplateResponse("register.html", {
@@ -266,32 +354,19 @@ async def register(
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """Dashboard page with role-based content."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
         # Get role-specific dashboard data
         dashboard_data = {}
 
         if user["role_id"] == 1:  # Admin
-            cursor.execute("SELECT COUNT(*) FROM job_posting WHERE status = 'active'")
-            dashboard_data["active_jobs"] = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM application")
-            dashboard_data["total_applications"] = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM person WHERE role_id = 2")
-            dashboard_data["total_candidates"] = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM person WHERE role_id = 3")
-            dashboard_data["total_recruiters"] = cursor.fetchone()[0]
+            dashboard_data.update(await get_system_counts())
 
             # Recent system activity
-            cursor.execute("""
+            dashboard_data["recent_activity"] = await fetch_all("""
                 SELECT p.firstname, p.lastname, jp.title, a.applied_date
                 FROM application a
                 JOIN person p ON a.person_id = p.id
@@ -299,17 +374,17 @@ async def dashboard(request: Request):
                 ORDER BY a.applied_date DESC
                 LIMIT 10
             """)
-            dashboard_data["recent_activity"] = cursor.fetchall()
 
         elif user["role_id"] == 2:  # Applicant
-            cursor.execute("SELECT COUNT(*) FROM job_posting WHERE status = 'active'")
-            dashboard_data["active_jobs"] = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM application WHERE person_id = ?", (user["person_id"],))
-            dashboard_data["my_applications"] = cursor.fetchone()[0]
+            dashboard_data["active_jobs"] = await fetch_value(
+                "SELECT COALESCE(MAX(value), 0) FROM stat_counter WHERE name = 'active_jobs'"
+            )
+            dashboard_data["my_applications"] = await fetch_value(
+                "SELECT COUNT(*) FROM application WHERE person_id = ?", (user["person_id"],)
+            )
 
             # My recent applications
-            cursor.execute("""
+            dashboard_data["recent_applications"] = await fetch_all("""
                 SELECT jp.title, a.applied_date, ast.name as status
                 FROM application a
                 JOIN job_posting jp ON a.job_posting_id = jp.id
@@ -318,10 +393,9 @@ async def dashboard(request: Request):
                 ORDER BY a.applied_date DESC
                 LIMIT 5
             """, (user["person_id"],))
-            dashboard_data["recent_applications"] = cursor.fetchall()
 
             # Recommended jobs (job matches) - exclude jobs already applied to
-            cursor.execute("""
+            dashboard_data["recommended_jobs"] = await fetch_all("""
                 SELECT jp.id, jp.title, jp.description, jp.location, jp.employment_type, jp.salary_min, jp.salary_max
                 FROM job_posting jp
                 WHERE jp.status = 'active' 
@@ -331,22 +405,18 @@ async def dashboard(request: Request):
                 ORDER BY jp.created_at DESC
                 LIMIT 5
             """, (user["person_id"],))
-            dashboard_data["recommended_jobs"] = cursor.fetchall()
             dashboard_data["job_matches"] = len(dashboard_data["recommended_jobs"])
 
         elif user["role_id"] == 3:  # Recruiter
-            cursor.execute("SELECT COUNT(*) FROM job_posting WHERE posted_by = ?", (user["person_id"],))
-            dashboard_data["my_job_postings"] = cursor.fetchone()[0]
-
-            cursor.execute("""
-                SELECT COUNT(*) FROM application a
-                JOIN job_posting jp ON a.job_posting_id = jp.id
-                WHERE jp.posted_by = ?
-            """, (user["person_id"],))
-            dashboard_data["applications_received"] = cursor.fetchone()[0]
+            counts = await fetch_one(
+                "SELECT job_postings, applications_received FROM recruiter_counter WHERE person_id = ?",
+                (user["person_id"],)
+            )
+            dashboard_data["my_job_postings"] = counts[0] if counts else 0
+            dashboard_data["applications_received"] = counts[1] if counts else 0
 
             # Recent applications to my jobs
-            cursor.execute("""
+            dashboard_data["recent_applications"] = await fetch_all("""
                 SELECT p.firstname, p.lastname, jp.title, a.applied_date, ast.name as status
                 FROM application a
                 JOIN person p ON a.person_id = p.id
@@ -356,9 +426,6 @@ async def dashboard(request: Request):
                 ORDER BY a.applied_date DESC
                 LIMIT 10
             """, (user["person_id"],))
-            dashboard_data["recent_applications"] = cursor.fetchall()
-
-        conn.close()
 
         # Choose template based on role
         if user["role_id"] == 1:  # Admin
@@ -387,23 +454,10 @@ async def dashboard(request: Request):
 @app.get("/jobs", response_class=HTMLResponse)
 async def jobs_page(request: Request):
     """Jobs listing page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT j.id, j.title, j.description, j.location, j.salary_min, j.salary_max,
-                   j.employment_type, j.experience_level, c.name as category
-            FROM job_posting j
-            LEFT JOIN job_category c ON j.category_id = c.id
-            WHERE j.status = 'active'
-            ORDER BY j.created_at DESC
-        """)
-
-        jobs = cursor.fetchall()
-        conn.close()
+        jobs = (await get_job_listing()).rows
 
         return templates.TemplateResponse("jobs.html", {
             "request": request,
@@ -421,51 +475,170 @@ async def jobs_page(request: Request):
 
 # API Routes for frontend JavaScript calls
 @app.get("/api/jobs")
-async def api_get_jobs():
-    """API endpoint to get all active jobs."""
+async def api_get_jobs(request: Request):
+    """API endpoint to get all active jobs.
+
+    Served from the versioned listing cache with a strong ETag; a matching
+    If-None-Match gets 304 Not Modified without a body.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        listing = await get_job_listing()
+        headers = {"ETag": listing.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), listing.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=listing.body, media_type="application/json", headers=headers)
 
-        cursor.execute("""
-            SELECT j.id, j.title, j.description, j.location, j.salary_min, j.salary_max,
-                   j.employment_type, j.experience_level, c.name as category
-            FROM job_posting j
-            LEFT JOIN job_category c ON j.category_id = c.id
-            WHERE j.status = 'active'
-            ORDER BY j.created_at DESC
-        """)
+    except Exception as e:
+        logger.error("API Jobs error", error=str(e))
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Unable to load jobs"}
+        )
 
-        jobs = cursor.fetchall()
-        conn.close()
+# Full-text job search
+SEARCH_MAX_PAGE_SIZE = 50
+_HIGHLIGHT_OPEN, _HIGHLIGHT_CLOSE = "\x02", "\x03"
+
+def build_fts_query(q: str, prefix: bool = True) -> str:
+    """Turn free text into a safe FTS5 query of quoted terms.
+
+    A trailing ``*`` on a term makes it a prefix query; with ``prefix`` the
+    last term is always matched as a prefix for search-as-you-type.
+    """
+    terms = re.findall(r"\w+\*?", q)
+    parts = []
+    for i, term in enumerate(terms):
+        word = term.rstrip("*")
+        is_prefix = term.endswith("*") or (prefix and i == len(terms) - 1)
+        parts.append(f'"{word}"*' if is_prefix else f'"{word}"')
+    return " ".join(parts)
+
+def _render_highlight(text):
+    """HTML-escape FTS output, then turn the highlight markers into <mark>."""
+    if text is None:
+        return None
+    return (html.escape(text)
+            .replace(_HIGHLIGHT_OPEN, "<mark>")
+            .replace(_HIGHLIGHT_CLOSE, "</mark>"))
+
+@app.get("/api/jobs/search")
+async def api_search_jobs(
+    q: str = "",
+    location: str = "",
+    employment_type: str = "",
+    page: int = 1,
+    page_size: int = 20,
+    prefix: bool = True
+):
+    """Search active jobs with BM25 ranking, snippets and pagination."""
+    page = max(page, 1)
+    page_size = min(max(page_size, 1), SEARCH_MAX_PAGE_SIZE)
+    offset = (page - 1) * page_size
+
+    filters = ["j.status = 'active'"]
+    params = []
+    if location:
+        filters.append("j.location LIKE '%' || ? || '%'")
+        params.append(location)
+    if employment_type:
+        filters.append("j.employment_type = ?")
+        params.append(employment_type)
+
+    match = build_fts_query(q, prefix)
+
+    try:
+        if match:
+            where = " AND ".join(["job_posting_fts MATCH ?"] + filters)
+            params = [match] + params
+            total = await fetch_value(f"""
+                SELECT COUNT(*)
+                FROM job_posting_fts
+                JOIN job_posting j ON j.id = job_posting_fts.rowid
+                WHERE {where}
+            """, params)
+            # Column weights: title, description, requirements, location
+            rows = await fetch_all(f"""
+                SELECT j.id, j.title, j.location, j.salary_min, j.salary_max,
+                       j.employment_type, j.experience_level, c.name as category,
+                       j.created_at,
+                       highlight(job_posting_fts, 0, ?, ?) as title_highlight,
+                       snippet(job_posting_fts, 1, ?, ?, '…', 24) as snippet,
+                       bm25(job_posting_fts, 10.0, 1.0, 2.0, 4.0) as rank
+                FROM job_posting_fts
+                JOIN job_posting j ON j.id = job_posting_fts.rowid
+                LEFT JOIN job_category c ON j.category_id = c.id
+                WHERE {where}
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            """, [_HIGHLIGHT_OPEN, _HIGHLIGHT_CLOSE, _HIGHLIGHT_OPEN, _HIGHLIGHT_CLOSE]
+                + params + [page_size, offset])
+        else:
+            where = " AND ".join(filters)
+            total = await fetch_value(f"SELECT COUNT(*) FROM job_posting j WHERE {where}", params)
+            rows = await fetch_all(f"""
+                SELECT j.id, j.title, j.location, j.salary_min, j.salary_max,
+                       j.employment_type, j.experience_level, c.name as category,
+                       j.created_at, NULL, substr(j.description, 1, 200), NULL
+                FROM job_posting j
+                LEFT JOIN job_category c ON j.category_id = c.id
+                WHERE {where}
+                ORDER BY j.created_at DESC
+                LIMIT ? OFFSET ?
+            """, params + [page_size, offset])
 
         jobs_list = []
-        for job in jobs:
+        for job in rows:
             jobs_list.append({
                 "id": job[0],
                 "title": job[1],
-                "description": job[2],
-                "location": job[3],
-                "salary_min": job[4],
-                "salary_max": job[5],
-                "employment_type": job[6],
-                "experience_level": job[7],
-                "category": job[8]
+                "location": job[2],
+                "salary_min": job[3],
+                "salary_max": job[4],
+                "employment_type": job[5],
+                "experience_level": job[6],
+                "category": job[7],
+                "created_at": job[8],
+                "title_highlight": _render_highlight(job[9]) or html.escape(job[1]),
+                "snippet": _render_highlight(job[10]),
+                "rank": job[11]
             })
 
-        return {"jobs": jobs_list}
+        return {
+            "jobs": jobs_list,
+            "query": q,
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "has_more": offset + len(jobs_list) < total
+        }
 
     except Exception as e:
-        logger.error("API Jobs error", error=str(e))
+        logger.error("API job search error", error=str(e), query=q)
         return JSONResponse(
             status_code=500,
-            content={"error": "Unable to load jobs"}
+            content={"error": "Unable to search jobs"}
         )
 
 @app.post("/api/auth/login")
 async def api_login(request: Request, username: str = Form(...), password: str = Form(...)):
     """API endpoint for login."""
-    user = authenticate_user(username, password)
+    try:
+        check_login_rate(username, request.client.host if request.client else None)
+        user = await authenticate_user(username, password)
+    except LoginRateLimited as e:
+        logger.warning("Login rate limited", username=username, scope=e.scope)
+        return JSONResponse(
+            status_code=429,
+            content={"error": "Too many login attempts, please retry later"},
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    except HashingOverloaded:
+        logger.warning("Login rejected, password hashing overloaded", username=username)
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Server busy, please retry"},
+            headers={"Retry-After": "1"}
+        )
 
     if not user:
         return JSONResponse(
@@ -513,44 +686,16 @@ async def api_register(request: Request):
                 content={"error": "All fields are required"}
             )
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Check if username or email already exists
-        cursor.execute("SELECT id FROM credential WHERE username = ?", (username,))
-        if cursor.fetchone():
-            conn.close()
-            return JSONResponse(
-                status_code=409,
-                content={"error": "Username already exists"}
-            )
-
-        cursor.execute("SELECT id FROM person WHERE email = ?", (email,))
-        if cursor.fetchone():
-            conn.close()
+        hashed_password = await get_password_hash_async(password)
+        error = await run_transaction(
+            _create_applicant, username, email, firstname, lastname, hashed_password
+        )
+        if error:
             return JSONResponse(
                 status_code=409,
-                content={"error": "Email already exists"}
+                content={"error": error}
             )
 
-        # Create person
-        cursor.execute("""
-            INSERT INTO person (firstname, lastname, email, role_id)
-            VALUES (?, ?, ?, ?)
-        """, (firstname, lastname, email, 2))  # Default to Applicant role
-
-        person_id = cursor.lastrowid
-
-        # Create credential
-        hashed_password = get_password_hash(password)
-        cursor.execute("""
-            INSERT INTO credential (person_id, username, password)
-            VALUES (?, ?, ?)
-        """, (person_id, username, hashed_password))
-
-        conn.commit()
-        conn.close()
-
         logger.info("User registered successfully", username=username)
 
         return JSONResponse(
@@ -558,6 +703,12 @@ async def api_register(request: Request):
             content={"message": "Registration successful"}
         )
 
+    except HashingOverloaded:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Server busy, please retry"},
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error("API Registration failed", error=str(e))
         return JSONResponse(
@@ -568,7 +719,7 @@ async def api_register(request: Request):
 @app.get("/api/user/profile")
 async def api_get_user_profile(request: Request):
     """API endpoint to get user profile."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return JSONResponse(
             status_code=401,
@@ -588,22 +739,18 @@ async def apply_to_job(
     resume: UploadFile = File(None)
 ):
     """Apply to a job."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
         # Check if already applied
-        cursor.execute(
+        existing = await fetch_one(
             "SELECT id FROM application WHERE person_id = ? AND job_posting_id = ?",
             (user["person_id"], job_id)
         )
 
-        if cursor.fetchone():
-            conn.close()
+        if existing:
             return JSONResponse(
                 status_code=409,
                 content={"detail": "You have already applied to this job"}
@@ -620,14 +767,11 @@ async def apply_to_job(
                 buffer.write(content)
 
         # Create application
-        cursor.execute("""
+        await execute("""
             INSERT INTO application (person_id, job_posting_id, cover_letter, resume_path, status_id)
             VALUES (?, ?, ?, ?, ?)
         """, (user["person_id"], job_id, cover_letter, resume_path, 1))  # 1 = submitted status
 
-        conn.commit()
-        conn.close()
-
         return JSONResponse(
             status_code=200,
             content={"message": "Application submitted successfully", "applied": True}
@@ -644,7 +788,7 @@ async def apply_to_job(
 @app.get("/recruiter/post-job", response_class=HTMLResponse)
 async def post_job_page(request: Request):
     """Post new job page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 3:
         return RedirectResponse(url="/login", status_code=302)
 
@@ -662,23 +806,17 @@ async def create_job_posting(
     experience_level: str = Form(...)
 ):
     """Create a new job posting."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 3:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        await execute("""
             INSERT INTO job_posting (title, description, location, salary_min, salary_max, 
                                    employment_type, experience_level, posted_by, status)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'active')
         """, (title, description, location, salary_min, salary_max, employment_type, experience_level, user["person_id"]))
 
-        conn.commit()
-        conn.close()
-
         return RedirectResponse(url="/recruiter/my-jobs?success=Job posted successfully", status_code=302)
 
     except Exception as e:
@@ -692,15 +830,12 @@ async def create_job_posting(
 @app.get("/recruiter/my-jobs", response_class=HTMLResponse)
 async def my_jobs_page(request: Request):
     """My job postings page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 3:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        jobs = await fetch_all("""
             SELECT id, title, description, location, salary_min, salary_max, 
                    employment_type, experience_level, status, created_at
             FROM job_posting 
@@ -708,9 +843,6 @@ async def my_jobs_page(request: Request):
             ORDER BY created_at DESC
         """, (user["person_id"],))
 
-        jobs = cursor.fetchall()
-        conn.close()
-
         return templates.TemplateResponse("my_jobs.html", {
             "request": request,
             "user": user,
@@ -728,15 +860,12 @@ async def my_jobs_page(request: Request):
 @app.get("/recruiter/applications", response_class=HTMLResponse)
 async def recruiter_applications(request: Request):
     """View applications for recruiter's jobs."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 3:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        applications = await fetch_all("""
             SELECT a.id, p.firstname, p.lastname, jp.title, a.applied_date, 
                    ast.name as status, a.cover_letter
             FROM application a
@@ -747,9 +876,6 @@ async def recruiter_applications(request: Request):
             ORDER BY a.applied_date DESC
         """, (user["person_id"],))
 
-        applications = cursor.fetchall()
-        conn.close()
-
         return templates.TemplateResponse("recruiter_applications.html", {
             "request": request,
             "user": user,
@@ -767,27 +893,20 @@ async def recruiter_applications(request: Request):
 @app.get("/recruiter/candidates", response_class=HTMLResponse)
 async def browse_candidates(request: Request):
     """Browse candidates page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 3:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT p.id, p.firstname, p.lastname, p.email, 
-                   COUNT(a.id) as application_count
+        candidates = await fetch_all("""
+            SELECT p.id, p.firstname, p.lastname, p.email,
+                   (SELECT COUNT(*) FROM application a
+                    WHERE a.person_id = p.id) as application_count
             FROM person p
-            LEFT JOIN application a ON p.id = a.person_id
             WHERE p.role_id = 2
-            GROUP BY p.id, p.firstname, p.lastname, p.email
             ORDER BY p.firstname, p.lastname
         """)
 
-        candidates = cursor.fetchall()
-        conn.close()
-
         return templates.TemplateResponse("browse_candidates.html", {
             "request": request,
             "user": user,
@@ -802,18 +921,150 @@ async def browse_candidates(request: Request):
             "error": "Failed to load candidates"
         })
 
+MATCH_MAX_K = 100
+
+@app.get("/api/recruiter/jobs/{job_id}/matches")
+async def api_job_matches(request: Request, job_id: int, k: int = 20):
+    """Rank applicants against a job's required competences."""
+    user = await get_current_user(request)
+    if not user or user["role_id"] != 3:
+        return JSONResponse(
+            status_code=403,
+            content={"error": "Recruiter access required"}
+        )
+
+    try:
+        posted_by = await fetch_value(
+            "SELECT posted_by FROM job_posting WHERE id = ?", (job_id,)
+        )
+        if posted_by is None:
+            return JSONResponse(status_code=404, content={"error": "Job not found"})
+        if posted_by != user["person_id"]:
+            return JSONResponse(status_code=403, content={"error": "Not your job posting"})
+
+        requirements = await get_job_requirements(job_id)
+        matches = await rank_candidates(requirements, max(1, min(k, MATCH_MAX_K)))
+
+        people = {}
+        if matches:
+            placeholders = ",".join("?" * len(matches))
+            rows = await fetch_all(
+                f"SELECT id, firstname, lastname, email FROM person WHERE id IN ({placeholders})",
+                [person_id for person_id, _ in matches]
+            )
+            people = {row[0]: row for row in rows}
+
+        return JSONResponse(
+            status_code=200,
+            content={
+                "job_id": job_id,
+                "requirements": [
+                    {"competence_id": cid, "min_years": years}
+                    for cid, years in requirements
+                ],
+                "matches": [
+                    {
+                        "person_id": person_id,
+                        "firstname": people[person_id][1],
+                        "lastname": people[person_id][2],
+                        "email": people[person_id][3],
+                        "score": round(score, 4)
+                    }
+                    for person_id, score in matches
+                    if person_id in people
+                ],
+                "matrix": get_competence_matrix().stats()
+            }
+        )
+
+    except Exception as e:
+        logger.error("Candidate matching failed", job_id=job_id, error=str(e))
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Failed to match candidates"}
+        )
+
+AVAILABLE_MAX_LIMIT = 500
+
+@app.get("/api/recruiter/candidates/available")
+async def api_available_candidates(
+    request: Request,
+    params: ApplicationParamForm = Depends(),
+    mode: str = "contains",
+    competence_id: int = None,
+    min_years: float = 0,
+    limit: int = 100
+):
+    """Find applicants available across a date window."""
+    user = await get_current_user(request)
+    if not user or user["role_id"] != 3:
+        return JSONResponse(
+            status_code=403,
+            content={"error": "Recruiter access required"}
+        )
+
+    if not params.from_date or not params.to_date or params.from_date > params.to_date:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "from_date and to_date are required and from_date must not be after to_date"}
+        )
+    if mode not in MATCH_MODES:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"mode must be one of: {', '.join(MATCH_MODES)}"}
+        )
+
+    try:
+        people = await find_available_people(
+            params.from_date, params.to_date, mode,
+            status_id=params.status_id,
+            competence_id=competence_id,
+            min_years=min_years
+        )
+        if params.person_id is not None:
+            people = people[people == params.person_id]
+
+        selected = [int(person_id) for person_id in people[:max(1, min(limit, AVAILABLE_MAX_LIMIT))]]
+        candidates = []
+        if selected:
+            placeholders = ",".join("?" * len(selected))
+            candidates = await fetch_all(f"""
+                SELECT id, firstname, lastname, email FROM person
+                WHERE id IN ({placeholders}) AND role_id = 2
+                ORDER BY id
+            """, selected)
+
+        return JSONResponse(
+            status_code=200,
+            content={
+                "from_date": params.from_date.isoformat(),
+                "to_date": params.to_date.isoformat(),
+                "mode": mode,
+                "total": len(people),
+                "candidates": [
+                    {"person_id": row[0], "firstname": row[1], "lastname": row[2], "email": row[3]}
+                    for row in candidates
+                ],
+                "index": get_availability_index().stats()
+            }
+        )
+
+    except Exception as e:
+        logger.error("Availability search failed", error=str(e))
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Failed to search availability"}
+        )
+
 @app.get("/applicant/my-applications", response_class=HTMLResponse)
 async def my_applications(request: Request):
     """My applications page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 2:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        applications = await fetch_all("""
             SELECT a.id, jp.title, jp.location, jp.employment_type, 
                    a.applied_date, ast.name as status
             FROM application a
@@ -823,9 +1074,6 @@ async def my_applications(request: Request):
             ORDER BY a.applied_date DESC
         """, (user["person_id"],))
 
-        applications = cursor.fetchall()
-        conn.close()
-
         return templates.TemplateResponse("my_applications.html", {
             "request": request,
             "user": user,
@@ -843,36 +1091,28 @@ async def my_applications(request: Request):
 @app.delete("/applicant/applications/{application_id}")
 async def delete_application(request: Request, application_id: int):
     """Delete an application."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 2:
         return JSONResponse(status_code=401, content={"error": "Unauthorized"})
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
         # Verify the application belongs to the user
-        cursor.execute(
+        existing = await fetch_one(
             "SELECT id FROM application WHERE id = ? AND person_id = ?",
             (application_id, user["person_id"])
         )
 
-        if not cursor.fetchone():
-            conn.close()
+        if not existing:
             return JSONResponse(
                 status_code=404,
                 content={"error": "Application not found"}
             )
 
         # Delete the application
-        cursor.execute("DELETE FROM application WHERE id = ? AND person_id = ?", 
-                      (application_id, user["person_id"]))
-
-        rows_affected = cursor.rowcount
-        conn.commit()
-        conn.close()
+        result = await execute("DELETE FROM application WHERE id = ? AND person_id = ?", 
+                               (application_id, user["person_id"]))
 
-        if rows_affected > 0:
+        if result.rowcount > 0:
             return JSONResponse(
                 status_code=200,
                 content={"message": "Application deleted successfully"}
@@ -893,22 +1133,16 @@ async def delete_application(request: Request, application_id: int):
 @app.get("/applicant/profile", response_class=HTMLResponse)
 async def profile_page(request: Request):
     """Profile page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        profile = await fetch_one("""
             SELECT firstname, lastname, email, date_of_birth, phone, address
             FROM person WHERE id = ?
         """, (user["person_id"],))
 
-        profile = cursor.fetchone()
-        conn.close()
-
         return templates.TemplateResponse("profile.html", {
             "request": request,
             "user": user,
@@ -934,22 +1168,17 @@ async def update_profile(
     address: str = Form(None)
 ):
     """Update user profile."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        await execute("""
             UPDATE person 
-            SET firstname = ?, lastname = ?, email = ?, date_ofbirth = ?, phone = ?, address = ?
+            SET firstname = ?, lastname = ?, email = ?, date_of_birth = ?, phone = ?, address = ?
             WHERE id = ?
         """, (firstname, lastname, email, date_of_birth, phone, address, user["person_id"]))
-
-        conn.commit()
-        conn.close()
+        invalidate_person(user["person_id"])
 
         return RedirectResponse(url="/applicant/profile?success=Profile updated successfully", status_code=302)
 
@@ -964,15 +1193,12 @@ async def update_profile(
 @app.get("/applicant/job-matches", response_class=HTMLResponse)
 async def job_matches(request: Request):
     """Job matches page for applicants."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 2:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        jobs = await fetch_all("""
             SELECT id, title, description, location, employment_type, 
                    salary_min, salary_max, experience_level, created_at
             FROM job_posting 
@@ -981,9 +1207,6 @@ async def job_matches(request: Request):
             LIMIT 20
         """)
 
-        jobs = cursor.fetchall()
-        conn.close()
-
         return templates.TemplateResponse("jobs.html", {
             "request": request,
             "user": user,
@@ -1002,13 +1225,10 @@ async def job_matches(request: Request):
 @app.get("/job/{job_id}", response_class=HTMLResponse)
 async def job_details(request: Request, job_id: int):
     """Job details page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        job = await fetch_one("""
             SELECT j.id, j.title, j.description, j.location, j.salary_min, j.salary_max,
                    j.employment_type, j.experience_level, j.requirements, j.created_at,
                    p.firstname, p.lastname
@@ -1017,18 +1237,13 @@ async def job_details(request: Request, job_id: int):
             WHERE j.id = ? AND j.status = 'active'
         """, (job_id,))
 
-        job = cursor.fetchone()
-
         # Check if user already applied
         applied = False
         if user:
-            cursor.execute(
+            applied = await fetch_one(
                 "SELECT id FROM application WHERE person_id = ? AND job_posting_id = ?",
                 (user["person_id"], job_id)
-            )
-            applied = cursor.fetchone() is not None
-
-        conn.close()
+            ) is not None
 
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
@@ -1052,15 +1267,12 @@ async def job_details(request: Request, job_id: int):
 @app.get("/admin/users", response_class=HTMLResponse)
 async def manage_users(request: Request):
     """Manage users page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        users = await fetch_all("""
             SELECT p.id, p.firstname, p.lastname, p.email, r.name as role,
                    c.username, p.created_at
             FROM person p
@@ -1069,9 +1281,6 @@ async def manage_users(request: Request):
             ORDER BY p.created_at DESC
         """)
 
-        users = cursor.fetchall()
-        conn.close()
-
         return templates.TemplateResponse("manage_users.html", {
             "request": request,
             "user": user,
@@ -1089,24 +1298,18 @@ async def manage_users(request: Request):
 @app.get("/admin/users/{user_id}")
 async def get_user_details(request: Request, user_id: int):
     """Get user details for editing."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return JSONResponse(status_code=401, content={"error": "Unauthorized"})
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        user_data = await fetch_one("""
             SELECT p.id, p.firstname, p.lastname, p.email, p.role_id, r.name as role_name
             FROM person p
             JOIN role r ON p.role_id = r.id
             WHERE p.id = ?
         """, (user_id,))
 
-        user_data = cursor.fetchone()
-        conn.close()
-
         if not user_data:
             return JSONResponse(status_code=404, content={"error": "User not found"})
 
@@ -1128,7 +1331,7 @@ async def get_user_details(request: Request, user_id: int):
 @app.post("/admin/users/{user_id}/edit")
 async def edit_user(request: Request, user_id: int):
     """Edit user details."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return JSONResponse(status_code=401, content={"error": "Unauthorized"})
 
@@ -1142,17 +1345,12 @@ async def edit_user(request: Request, user_id: int):
         if not all([firstname, lastname, email, role_id]):
             return JSONResponse(status_code=400, content={"error": "All fields are required"})
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        await execute("""
             UPDATE person 
             SET firstname = ?, lastname = ?, email = ?, role_id = ?
             WHERE id = ?
         """, (firstname, lastname, email, role_id, user_id))
-
-        conn.commit()
-        conn.close()
+        invalidate_person(user_id)
 
         return JSONResponse(
             status_code=200,
@@ -1166,28 +1364,38 @@ async def edit_user(request: Request, user_id: int):
             content={"error": "Failed to update user"}
         )
 
+def _delete_person(conn, person_id: int):
+    """Delete a person together with their applications and credentials.
+
+    Returns the deleted credential ids.
+    """
+    cursor = conn.cursor()
+    credential_ids = [row[0] for row in cursor.execute(
+        "SELECT id FROM credential WHERE person_id = ?", (person_id,)
+    )]
+
+    # Delete user's applications first
+    cursor.execute("DELETE FROM application WHERE person_id = ?", (person_id,))
+
+    # Delete user's credentials
+    cursor.execute("DELETE FROM credential WHERE person_id = ?", (person_id,))
+
+    # Delete the user
+    cursor.execute("DELETE FROM person WHERE id = ?", (person_id,))
+    return credential_ids
+
 @app.delete("/admin/users/{user_id}")
 async def delete_user(request: Request, user_id: int):
     """Delete user."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Delete user's applications first
-        cursor.execute("DELETE FROM application WHERE person_id = ?", (user_id,))
-
-        # Delete user's credentials
-        cursor.execute("DELETE FROM credential WHERE person_id = ?", (user_id,))
-
-        # Delete the user
-        cursor.execute("DELETE FROM person WHERE id = ?", (user_id,))
-
-        conn.commit()
-        conn.close()
+        credential_ids = await run_transaction(_delete_person, user_id)
+        invalidate_person(user_id)
+        for credential_id in credential_ids:
+            await invalidate_user_sessions(credential_id)
 
         return JSONResponse(
             status_code=200,
@@ -1204,29 +1412,21 @@ async def delete_user(request: Request, user_id: int):
 @app.get("/admin/jobs", response_class=HTMLResponse)
 async def manage_jobs(request: Request):
     """Manage jobs page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        jobs = await fetch_all("""
             SELECT j.id, j.title, j.location, j.employment_type, j.status,
                    p.firstname, p.lastname, j.created_at,
-                   COUNT(a.id) as application_count
+                   COALESCE(jc.applications, 0) as application_count
             FROM job_posting j
             JOIN person p ON j.posted_by = p.id
-            LEFT JOIN application a ON j.id = a.job_posting_id
-            GROUP BY j.id, j.title, j.location, j.employment_type, j.status,
-                     p.firstname, p.lastname, j.created_at
+            LEFT JOIN job_counter jc ON jc.job_posting_id = j.id
             ORDER BY j.created_at DESC
         """)
 
-        jobs = cursor.fetchall()
-        conn.close()
-
         return templates.TemplateResponse("manage_jobs.html", {
             "request": request,
             "user": user,
@@ -1244,24 +1444,18 @@ async def manage_jobs(request: Request):
 @app.get("/admin/jobs/{job_id}/view")
 async def view_job_admin(request: Request, job_id: int):
     """View job details for admin."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        job = await fetch_one("""
             SELECT j.*, p.firstname, p.lastname
             FROM job_posting j
             JOIN person p ON j.posted_by = p.id
             WHERE j.id = ?
         """, (job_id,))
 
-        job = cursor.fetchone()
-        conn.close()
-
         if not job:
             return JSONResponse(
                 status_code=404,
@@ -1283,7 +1477,7 @@ async def view_job_admin(request: Request, job_id: int):
 @app.post("/admin/jobs/{job_id}/edit")
 async def edit_job_admin(request: Request, job_id: int):
     """Edit job for admin."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
@@ -1292,20 +1486,15 @@ async def edit_job_admin(request: Request, job_id: int):
         title = form_data.get("title")
         description = form_data.get("description")
         location = form_data.get("location")
-        status = form_data.get("status")
-
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        # A missing status keeps the current one rather than storing NULL
+        status = form_data.get("status") or None
 
-        cursor.execute("""
+        await execute("""
             UPDATE job_posting 
-            SET title = ?, description = ?, location = ?, status = ?
+            SET title = ?, description = ?, location = ?, status = COALESCE(?, status)
             WHERE id = ?
         """, (title, description, location, status, job_id))
 
-        conn.commit()
-        conn.close()
-
         return JSONResponse(
             status_code=200,
             content={"message": "Job updated successfully"}
@@ -1321,23 +1510,17 @@ async def edit_job_admin(request: Request, job_id: int):
 @app.post("/admin/jobs/{job_id}/deactivate")
 async def deactivate_job(request: Request, job_id: int):
     """Deactivate job."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        await execute("""
             UPDATE job_posting 
             SET status = 'inactive'
             WHERE id = ?
         """, (job_id,))
 
-        conn.commit()
-        conn.close()
-
         return JSONResponse(
             status_code=200,
             content={"message": "Job deactivated successfully"}
@@ -1353,15 +1536,12 @@ async def deactivate_job(request: Request, job_id: int):
 @app.get("/admin/applications", response_class=HTMLResponse)
 async def admin_applications(request: Request):
     """View all applications."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        applications = await fetch_all("""
             SELECT a.id, p.firstname, p.lastname, jp.title, 
                    rec.firstname as rec_firstname, rec.lastname as rec_lastname,
                    a.applied_date, ast.name as status
@@ -1373,9 +1553,6 @@ async def admin_applications(request: Request):
             ORDER BY a.applied_date DESC
         """)
 
-        applications = cursor.fetchall()
-        conn.close()
-
         return templates.TemplateResponse("admin_applications.html", {
             "request": request,
             "user": user,
@@ -1393,40 +1570,24 @@ async def admin_applications(request: Request):
 @app.get("/admin/reports", response_class=HTMLResponse)
 async def generate_reports(request: Request):
     """Generate reports page."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
         # Get statistics for reports
         stats = {}
 
-        cursor.execute("SELECT COUNT(*) FROM person WHERE role_id = 2")
-        stats["total_candidates"] = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM person WHERE role_id = 3")
-        stats["total_recruiters"] = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM job_posting WHERE status = 'active'")
-        stats["active_jobs"] = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM application")
-        stats["total_applications"] = cursor.fetchone()[0]
+        stats.update(await get_system_counts())
 
         # Monthly application stats
-        cursor.execute("""
+        stats["monthly_applications"] = await fetch_all("""
             SELECT strftime('%Y-%m', applied_date) as month, COUNT(*) as count
             FROM application
             GROUP BY strftime('%Y-%m', applied_date)
             ORDER BY month DESC
             LIMIT 12
         """)
-        stats["monthly_applications"] = cursor.fetchall()
-
-        conn.close()
 
         return templates.TemplateResponse("reports.html", {
             "request": request,
@@ -1445,24 +1606,18 @@ async def generate_reports(request: Request):
 @app.get("/admin/export/users")
 async def export_users_report(request: Request):
     """Export users report."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        users = await fetch_all("""
             SELECT p.firstname, p.lastname, p.email, r.name as role, p.created_at
             FROM person p
             JOIN role r ON p.role_id = r.id
             ORDER BY p.created_at DESC
         """)
 
-        users = cursor.fetchall()
-        conn.close()
-
         # Generate CSV content
         import csv
         import io
@@ -1491,28 +1646,21 @@ async def export_users_report(request: Request):
 @app.get("/admin/export/jobs")
 async def export_jobs_report(request: Request):
     """Export jobs report."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        jobs = await fetch_all("""
             SELECT j.title, j.location, j.employment_type, j.status, 
                    p.firstname, p.lastname, j.created_at,
-                   COUNT(a.id) as application_count
+                   COALESCE(jc.applications, 0) as application_count
             FROM job_posting j
             JOIN person p ON j.posted_by = p.id
-            LEFT JOIN application a ON j.id = a.job_posting_id
-            GROUP BY j.id
+            LEFT JOIN job_counter jc ON jc.job_posting_id = j.id
             ORDER BY j.created_at DESC
         """)
 
-        jobs = cursor.fetchall()
-        conn.close()
-
         # Generate CSV content
         import csv
         import io
@@ -1541,15 +1689,12 @@ async def export_jobs_report(request: Request):
 @app.get("/admin/export/applications")
 async def export_applications_report(request: Request):
     """Export applications report."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        applications = await fetch_all("""
             SELECT p.firstname, p.lastname, jp.title, a.applied_date, ast.name as status
             FROM application a
             JOIN person p ON a.person_id = p.id
@@ -1558,9 +1703,6 @@ async def export_applications_report(request: Request):
             ORDER BY a.applied_date DESC
         """)
 
-        applications = cursor.fetchall()
-        conn.close()
-
         # Generate CSV content
         import csv
         import io
@@ -1589,47 +1731,39 @@ async def export_applications_report(request: Request):
 @app.get("/admin/analytics")
 async def system_analytics(request: Request):
     """Get system analytics."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user or user["role_id"] != 1:
         return RedirectResponse(url="/login", status_code=302)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
         analytics = {}
 
         # User growth
-        cursor.execute("""
+        analytics["user_growth"] = await fetch_all("""
             SELECT DATE(created_at) as date, COUNT(*) as count
             FROM person
             WHERE created_at >= date('now', '-30 days')
             GROUP BY DATE(created_at)
             ORDER BY date
         """)
-        analytics["user_growth"] = cursor.fetchall()
 
         # Application trends
-        cursor.execute("""
+        analytics["application_trends"] = await fetch_all("""
             SELECT DATE(applied_date) as date, COUNT(*) as count
             FROM application
             WHERE applied_date >= date('now', '-30 days')
             GROUP BY DATE(applied_date)
             ORDER BY date
         """)
-        analytics["application_trends"] = cursor.fetchall()
 
         # Job posting trends
-        cursor.execute("""
+        analytics["job_trends"] = await fetch_all("""
             SELECT DATE(created_at) as date, COUNT(*) as count
             FROM job_posting
             WHERE created_at >= date('now', '-30 days')
             GROUP BY DATE(created_at)
             ORDER BY date
         """)
-        analytics["job_trends"] = cursor.fetchall()
-
-        conn.close()
 
         return JSONResponse(
             status_code=200,
@@ -1643,9 +1777,29 @@ async def system_analytics(request: Request):
             content={"error": "Failed to load analytics"}
         )
 
+@app.get("/admin/password-costs")
+async def password_cost_report(request: Request):
+    """Count stored credentials per bcrypt work factor."""
+    user = await get_current_user(request)
+    if not user or user["role_id"] != 1:
+        return RedirectResponse(url="/login", status_code=302)
+
+    try:
+        return JSONResponse(status_code=200, content=await get_credential_cost_report())
+
+    except Exception as e:
+        logger.error("Password cost report failed", error=str(e))
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Failed to load password cost report"}
+        )
+
 @app.get("/logout")
-async def logout(request: Request):
-    """Logout user."""
+async def logout(request: Request, everywhere: bool = False):
+    """Logout user; ``?everywhere=true`` ends all of the user's sessions."""
+    user_id = request.session.get("user_id")
+    if everywhere and user_id:
+        await invalidate_user_sessions(user_id)
     request.session.clear()
     return RedirectResponse(url="/", status_code=302)
 
@@ -1654,14 +1808,22 @@ async def health_check():
     """Health check endpoint."""
     try:
         # Test database connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        result = cursor.fetchone()
-        conn.close()
-
-        if result and result[0] == 1:
-            return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+        result = await fetch_value("SELECT 1")
+
+        if result == 1:
+            return {
+                "status": "healthy",
+                "timestamp": datetime.now().isoformat(),
+                "database_pool": get_pool_stats(),
+                "database_writer": get_write_queue_stats(),
+                "password_hashing": get_hashing_stats(),
+                "user_cache": get_user_cache_stats(),
+                "sessions": get_session_stats(),
+                "login_rate_limit": get_login_rate_stats(),
+                "upstreams": get_upstream_stats(),
+                "retry_budget": get_retry_budget().stats(),
+                "job_listing": get_job_listing_stats()
+            }
         else:
             return {"status": "unhealthy", "error": "Database check failed"}
 
@@ -1671,7 +1833,8 @@ async def health_check():
 # Microservice routing
 import httpx
 
-# Service URLs - these would normally come from service discovery
+# Fallback service URLs; instances are resolved from the discovery service
+# when it is reachable (see shared.balancing)
 SERVICE_URLS = {
     "auth": "http://localhost:8081",
     "registration": "http://localhost:8888", 
@@ -1680,36 +1843,99 @@ SERVICE_URLS = {
     "config": "http://localhost:9999"
 }
 
-async def route_to_service(service_name: str, path: str, method: str = "GET", **kwargs):
-    """Route requests to microservices."""
+# Connection-level headers that must not be forwarded (RFC 9110 7.6.1),
+# plus the ones the proxy sets itself
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade"
+}
+# The edge session cookie stays at the edge
+REQUEST_SKIP_HEADERS = HOP_BY_HOP_HEADERS | {"host", "cookie"}
+RESPONSE_SKIP_HEADERS = HOP_BY_HOP_HEADERS
+
+def _forward_headers(request: Request) -> list:
+    """Headers to send upstream, with X-Forwarded-* added."""
+    headers = [
+        (k, v) for k, v in request.headers.items()
+        if k.lower() not in REQUEST_SKIP_HEADERS and not k.lower().startswith("x-forwarded-")
+    ]
+    client_host = request.client.host if request.client else ""
+    forwarded_for = request.headers.get("x-forwarded-for")
+    headers.append(("x-forwarded-for", f"{forwarded_for}, {client_host}" if forwarded_for else client_host))
+    headers.append(("x-forwarded-proto", request.url.scheme))
+    headers.append(("x-forwarded-host", request.headers.get("host", "")))
+    return headers
+
+async def _wait_for_disconnect(request: Request, body_sent: asyncio.Event):
+    """Return when the client disconnects.
+
+    Only listens once the request body has been forwarded, so it never
+    steals body chunks from the upstream request.
+    """
+    await body_sent.wait()
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+async def route_to_service(service_name: str, path: str, request: Request):
+    """Proxy ``request`` to a microservice, streaming both bodies.
+
+    Query string and end-to-end headers are forwarded; the response status,
+    headers and body are passed back unchanged, chunk by chunk. If the
+    client disconnects while the upstream call is in flight, the call is
+    cancelled.
+    """
     if service_name not in SERVICE_URLS:
         return JSONResponse(
             status_code=404,
             content={"error": f"Service {service_name} not found"}
         )
 
-    url = f"{SERVICE_URLS[service_name]}{path}"
+    if request.method not in ("GET", "POST", "PUT", "DELETE"):
+        return JSONResponse(
+            status_code=405,
+            content={"error": "Method not allowed"}
+        )
 
+    body_sent = asyncio.Event()
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+
+    async def request_body():
+        async for chunk in request.stream():
+            if chunk:
+                yield chunk
+        body_sent.set()
+
+    if not has_body:
+        body_sent.set()
+
+    client = get_upstream_client(service_name)
+    send = asyncio.ensure_future(client.send(
+        request.method, path,
+        params=request.query_params.multi_items(),
+        headers=_forward_headers(request),
+        content=request_body() if has_body else None
+    ))
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(request, body_sent))
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            if method == "GET":
-                response = await client.get(url, **kwargs)
-            elif method == "POST":
-                response = await client.post(url, **kwargs)
-            elif method == "PUT":
-                response = await client.put(url, **kwargs)
-            elif method == "DELETE":
-                response = await client.delete(url, **kwargs)
-            else:
-                return JSONResponse(
-                    status_code=405,
-                    content={"error": "Method not allowed"}
-                )
-
-            return JSONResponse(
-                status_code=response.status_code,
-                content=response.json() if response.headers.get("content-type", "").startswith("application/json") else {"message": response.text}
-            )
+        await asyncio.wait({send, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        if not send.done():
+            send.cancel()
+            logger.info("Client disconnected, upstream call cancelled", service=service_name, path=path)
+            # Nobody is listening for this response any more
+            return Response(status_code=499)
+        response = send.result()
+    except CircuitOpenError as e:
+        logger.warning("Circuit open, failing fast", service=service_name, path=path)
+        return JSONResponse(
+            status_code=503,
+            content={"error": f"Service {service_name} unavailable"},
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+    except ClientDisconnect:
+        logger.info("Client disconnected while sending the request body", service=service_name, path=path)
+        return Response(status_code=499)
     except httpx.TimeoutException:
         logger.error("Service timeout", service=service_name, path=path)
         return JSONResponse(
@@ -1718,7 +1944,6 @@ async def route_to_service(service_name: str, path: str, method: str = "GET", **
         )
     except httpx.ConnectError:
         logger.warning("Service unavailable", service=service_name, path=path)
-        # For now, handle locally if service is unavailable
         return JSONResponse(
             status_code=503,
             content={"error": f"Service {service_name} unavailable"}
@@ -1729,17 +1954,25 @@ async def route_to_service(service_name: str, path: str, method: str = "GET", **
             status_code=500,
             content={"error": "Internal routing error"}
         )
+    finally:
+        disconnect.cancel()
+
+    headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in RESPONSE_SKIP_HEADERS]
+    proxied = StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        background=BackgroundTask(response.aclose)
+    )
+    # Keep repeated headers such as Set-Cookie; raw bytes keep Content-Encoding valid
+    proxied.raw_headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+    return proxied
 
 # Route to auth service
 @app.api_route("/api/auth/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def route_auth(path: str, request: Request):
     """Route authentication requests to auth service."""
-    # For now, handle locally since auth service integration is complex
-    # This would route to auth service when it's properly set up
-    return JSONResponse(
-        status_code=501,
-        content={"error": "Auth service routing not implemented yet"}
-    )
+    # /api/auth/login and /api/auth/register are handled by the edge itself
+    return await route_to_service("auth", f"/{path}", request)
 
 # Route to registration service  
 @app.api_route("/api/registration/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -1749,7 +1982,7 @@ async def route_registration(path: str, request: Request):
         # For now, handle registration locally until service is stable
         if path == "register" and request.method == "POST":
             return await api_register(request)
-        return await route_to_service("registration", f"/{path}", request.method)
+        return await route_to_service("registration", f"/{path}", request)
     except Exception as e:
         logger.error("Registration routing failed", error=str(e))
         # Fallback to local handling
@@ -1762,7 +1995,7 @@ async def route_registration(path: str, request: Request):
 async def route_job_applications(path: str, request: Request):
     """Route job application requests to job application service."""
     try:
-        return await route_to_service("job_application", f"/{path}", request.method)
+        return await route_to_service("job_application", f"/{path}", request)
     except Exception as e:
         logger.error("Application service routing failed", error=str(e))
         # Local fallback for critical functions
@@ -17,8 +17,9 @@ from typing import List, Optional
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-from shared.database import get_db_connection, create_tables
-from shared.security import verify_token
+from shared.database import fetch_all, run_transaction, create_tables, close_database
+from shared.security import verify_token, get_token_cache_stats
+from shared.revocation import get_revocation_stats, start_revocation_refresher, stop_revocation_refresher
 
 # Configure logging
 structlog.configure(
@@ -78,6 +79,34 @@ class ApplicationResponse(BaseModel):
     status_id: int
     applied_date: datetime
 
+def _insert_application(conn, person_id: int, job_posting_id: int, cover_letter: str):
+    """Insert an application and return the stored row, or None if it exists."""
+    cursor = conn.cursor()
+
+    # Check if already applied
+    cursor.execute(
+        "SELECT id FROM application WHERE person_id = ? AND job_posting_id = ?",
+        (person_id, job_posting_id)
+    )
+    if cursor.fetchone():
+        return None
+
+    # Create application
+    cursor.execute("""
+        INSERT INTO application (person_id, job_posting_id, cover_letter, status_id)
+        VALUES (?, ?, ?, ?)
+    """, (person_id, job_posting_id, cover_letter, 1))
+
+    application_id = cursor.lastrowid
+
+    # Get the created application
+    cursor.execute("""
+        SELECT id, person_id, job_posting_id, status_id, applied_date
+        FROM application WHERE id = ?
+    """, (application_id,))
+
+    return cursor.fetchone()
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the job application service."""
@@ -87,11 +116,23 @@ async def startup_event():
         logger.info("Database tables created/verified")
     except Exception as e:
         logger.error("Failed to initialize database", error=str(e))
+    await start_revocation_refresher()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the revocation refresher, flush queued database writes and release connections."""
+    await stop_revocation_refresher()
+    close_database()
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "job-application-service"}
+    return {
+        "status": "healthy",
+        "service": "job-application-service",
+        "token_cache": get_token_cache_stats(),
+        "token_revocation": get_revocation_stats()
+    }
 
 @app.post("/applications", response_model=ApplicationResponse)
 async def create_application(
@@ -116,40 +157,16 @@ async def create_application(
                 detail="Invalid user data"
             )
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Check if already applied
-        cursor.execute(
-            "SELECT id FROM application WHERE person_id = ? AND job_posting_id = ?",
-            (person_id, job_posting_id)
+        app_data = await run_transaction(
+            _insert_application, person_id, job_posting_id, cover_letter
         )
 
-        if cursor.fetchone():
-            conn.close()
+        if app_data is None:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Already applied to this job"
             )
 
-        # Create application
-        cursor.execute("""
-            INSERT INTO application (person_id, job_posting_id, cover_letter, status_id)
-            VALUES (?, ?, ?, ?)
-        """, (person_id, job_posting_id, cover_letter, 1))
-
-        application_id = cursor.lastrowid
-        conn.commit()
-
-        # Get the created application
-        cursor.execute("""
-            SELECT id, person_id, job_posting_id, status_id, applied_date
-            FROM application WHERE id = ?
-        """, (application_id,))
-
-        app_data = cursor.fetchone()
-        conn.close()
-
         return ApplicationResponse(
             id=app_data[0],
             person_id=app_data[1],
@@ -182,10 +199,7 @@ async def get_user_applications(
                 detail="Invalid token"
             )
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        applications = await fetch_all("""
             SELECT a.id, a.job_posting_id, jp.title, a.status_id, ast.name, a.applied_date
             FROM application a
             JOIN job_posting jp ON a.job_posting_id = jp.id
@@ -194,9 +208,6 @@ async def get_user_applications(
             ORDER BY a.applied_date DESC
         """, (user_id,))
 
-        applications = cursor.fetchall()
-        conn.close()
-
         return {"applications": [
             {
                 "id": app[0],
@@ -222,12 +233,7 @@ async def get_user_applications(
 async def get_competences():
     """Get all available competences."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT id, name, description FROM competence")
-        competences = cursor.fetchall()
-        conn.close()
+        competences = await fetch_all("SELECT id, name, description FROM competence")
 
         return {"competences": [
             {"id": comp[0], "name": comp[1], "description": comp[2]}
@@ -17,8 +17,9 @@ from typing import Optional
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-from shared.database import get_db_connection, create_tables
-from shared.security import get_password_hash, validate_password_strength
+from shared.database import fetch_one, run_transaction, create_tables, close_database
+from shared.security import validate_password_strength
+from shared.hashing import HashingOverloaded, get_password_hash_async, start_hashing_pool, close_hashing_pool
 
 # Configure logging
 structlog.configure(
@@ -67,16 +68,54 @@ class RegistrationResponse(BaseModel):
     status: str
     message: str
 
+def _insert_user(conn, username: str, email: str, firstname: str, lastname: str,
+                 role_id: int, hashed_password: str):
+    """Insert person and credential rows; return an error message on conflict."""
+    cursor = conn.cursor()
+
+    # Check if username already exists
+    cursor.execute("SELECT id FROM credential WHERE username = ?", (username,))
+    if cursor.fetchone():
+        return None, "Username already exists"
+
+    # Check if email already exists
+    cursor.execute("SELECT id FROM person WHERE email = ?", (email,))
+    if cursor.fetchone():
+        return None, "Email already registered"
+
+    # Create person record
+    cursor.execute("""
+        INSERT INTO person (firstname, lastname, email, role_id)
+        VALUES (?, ?, ?, ?)
+    """, (firstname, lastname, email, role_id))
+
+    person_id = cursor.lastrowid
+
+    # Create credentials
+    cursor.execute("""
+        INSERT INTO credential (person_id, username, password)
+        VALUES (?, ?, ?)
+    """, (person_id, username, hashed_password))
+
+    return person_id, None
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the registration service."""
     logger.info("Registration service starting up")
+    await start_hashing_pool()
     try:
         create_tables()
         logger.info("Database tables created/verified")
     except Exception as e:
         logger.error("Failed to initialize database", error=str(e))
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued database writes, release connections and stop hashing workers."""
+    close_database()
+    close_hashing_pool()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -103,44 +142,28 @@ async def register_user(
                 detail=message
             )
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Check if username already exists
-        cursor.execute("SELECT id FROM credential WHERE username = ?", (username,))
-        if cursor.fetchone():
-            conn.close()
+        # Reject taken usernames and emails before paying for bcrypt; the
+        # checks in _insert_user still guard against concurrent signups
+        if await fetch_one("SELECT id FROM credential WHERE username = ?", (username,)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already exists"
             )
-
-        # Check if email already exists
-        cursor.execute("SELECT id FROM person WHERE email = ?", (email,))
-        if cursor.fetchone():
-            conn.close()
+        if await fetch_one("SELECT id FROM person WHERE email = ?", (email,)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
 
-        # Create person record
-        cursor.execute("""
-            INSERT INTO person (firstname, lastname, email, role_id)
-            VALUES (?, ?, ?, ?)
-        """, (firstname, lastname, email, role_id))
-
-        person_id = cursor.lastrowid
-
-        # Create credentials
-        hashed_password = get_password_hash(password)
-        cursor.execute("""
-            INSERT INTO credential (person_id, username, password)
-            VALUES (?, ?, ?)
-        """, (person_id, username, hashed_password))
-
-        conn.commit()
-        conn.close()
+        hashed_password = await get_password_hash_async(password)
+        person_id, error = await run_transaction(
+            _insert_user, username, email, firstname, lastname, role_id, hashed_password
+        )
+        if error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=error
+            )
 
         logger.info("User registered successfully", 
                    person_id=person_id, username=username)
@@ -152,6 +175,12 @@ async def register_user(
 
     except HTTPException:
         raise
+    except HashingOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error("Registration failed", error=str(e))
         raise HTTPException(
@@ -163,12 +192,7 @@ async def register_user(
 async def check_username(username: str):
     """Check if username is available."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id FROM credential WHERE username = ?", (username,))
-        existing = cursor.fetchone()
-        conn.close()
+        existing = await fetch_one("SELECT id FROM credential WHERE username = ?", (username,))
 
         return {
             "username": username,
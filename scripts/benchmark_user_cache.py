@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Measure how many database queries the edge user cache saves per page view.
+
+Logs one account per role into the edge app in-process, walks that role's
+pages with the user cache disabled and then enabled, and counts the SQL
+statements each page view runs on the read pool. Accounts come from a
+database filled by scripts/generate_dataset.py:
+
+    python scripts/benchmark_user_cache.py --database perf.db --rounds 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+PAGES = {
+    "admin": ["/dashboard", "/admin/reports", "/admin/analytics"],
+    "applicant": ["/dashboard", "/jobs", "/applicant/my-applications", "/applicant/profile"],
+    "recruiter": ["/dashboard", "/recruiter/my-jobs", "/recruiter/applications"],
+}
+
+ROLE_IDS = {"admin": 1, "applicant": 2, "recruiter": 3}
+
+# The statement get_current_user runs on a cache miss
+USER_LOOKUP_MARKER = "WHERE c.id ="
+
+class QueryCounter:
+    """Counts statements run on read pool connections."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.user_lookups = 0
+
+    def trace(self, statement: str):
+        if statement.strip() == "SELECT 1":  # pool health checks
+            return
+        with self._lock:
+            self.total += 1
+            if USER_LOOKUP_MARKER in statement:
+                self.user_lookups += 1
+
+    def snapshot(self):
+        with self._lock:
+            return self.total, self.user_lookups
+
+def install_counter(counter: QueryCounter):
+    """Attach the counter to every connection the read pool opens."""
+    from shared.database import ConnectionPool
+
+    connect = ConnectionPool._connect
+
+    def _connect(self):
+        conn = connect(self)
+        conn.set_trace_callback(counter.trace)
+        return conn
+
+    ConnectionPool._connect = _connect
+
+def pick_accounts(database: str) -> dict:
+    """Pick one generated account per role."""
+    from shared.database import open_connection
+
+    conn = open_connection(database, read_only=True)
+    try:
+        accounts = {}
+        for role, role_id in ROLE_IDS.items():
+            row = conn.execute("""
+                SELECT c.username FROM credential c
+                JOIN person p ON p.id = c.person_id
+                WHERE p.role_id = ? AND c.username LIKE 'perf%'
+                ORDER BY c.id LIMIT 1
+            """, (role_id,)).fetchone()
+            if row:
+                accounts[role] = row[0]
+        return accounts
+    finally:
+        conn.close()
+
+def walk(client, counter: QueryCounter, pages: list, rounds: int) -> dict:
+    """Visit ``pages`` ``rounds`` times and return per-view averages."""
+    queries_before, lookups_before = counter.snapshot()
+    timings = []
+    for _ in range(rounds):
+        for page in pages:
+            started = time.perf_counter()
+            response = client.get(page)
+            timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"{page} returned {response.status_code}")
+    queries, lookups = counter.snapshot()
+    views = rounds * len(pages)
+    return {
+        "views": views,
+        "queries_per_view": (queries - queries_before) / views,
+        "user_lookups_per_view": (lookups - lookups_before) / views,
+        "mean_ms": statistics.fmean(timings) * 1000,
+    }
+
+def run(args) -> dict:
+    os.environ["DATABASE_PATH"] = args.database
+    from fastapi.testclient import TestClient
+    from shared.user_cache import get_user_cache
+    from edge_service.main import app
+
+    counter = QueryCounter()
+    install_counter(counter)
+    accounts = pick_accounts(args.database)
+    if not accounts:
+        raise SystemExit(f"No generated accounts in {args.database}; run scripts/generate_dataset.py first")
+
+    cache = get_user_cache()
+    enabled_size = cache.max_size or 10000
+    results = {}
+    with TestClient(app) as client:
+        for role, username in accounts.items():
+            response = client.post("/login", data={"username": username, "password": args.password},
+                                   follow_redirects=False)
+            if response.status_code != 302:
+                raise SystemExit(f"Login failed for {username}")
+
+            results[role] = {}
+            for mode, size in (("uncached", 0), ("cached", enabled_size)):
+                cache.max_size = size
+                cache.clear()
+                walk(client, counter, PAGES[role], 1)  # warm up
+                before = cache.stats()
+                results[role][mode] = walk(client, counter, PAGES[role], args.rounds)
+                after = cache.stats()
+                hits = after["hits"] - before["hits"]
+                lookups = hits + after["misses"] - before["misses"]
+                results[role][mode]["cache_hit_rate"] = hits / lookups if lookups else 0.0
+            client.get("/logout", follow_redirects=False)
+
+    return {"rounds": args.rounds, "roles": results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the edge user cache")
+    parser.add_argument("--database", required=True, help="database filled by generate_dataset.py")
+    parser.add_argument("--password", default="Password123", help="password of the generated accounts")
+    parser.add_argument("--rounds", type=int, default=20, help="times each role walks its pages")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    print(f"📊 Queries per page view ({args.rounds} rounds)")
+    print(f"{'role':10} {'uncached':>9} {'cached':>9} {'saved':>7} {'hit rate':>9} {'ms before':>10} {'ms after':>9}")
+    for role, modes in result["roles"].items():
+        before, after = modes["uncached"], modes["cached"]
+        print(f"{role:10} {before['queries_per_view']:9.2f} {after['queries_per_view']:9.2f} "
+              f"{before['queries_per_view'] - after['queries_per_view']:7.2f} "
+              f"{after['cache_hit_rate']:9.1%} {before['mean_ms']:10.2f} {after['mean_ms']:9.2f}")
+    saved = [modes["uncached"]["user_lookups_per_view"] - modes["cached"]["user_lookups_per_view"]
+             for modes in result["roles"].values()]
+    print(f"✅ User lookups removed per page view: {statistics.fmean(saved):.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Pick a bcrypt work factor for this host.
+
+Benchmarks bcrypt at increasing costs and reports the highest one whose
+median hash time stays under --max-ms. Services read the cost from the
+BCRYPT_ROUNDS environment variable; --env-file writes it to a KEY=VALUE
+file for the deployment to load. Existing hashes below the new cost are
+upgraded when their owners next log in.
+
+    python scripts/calibrate_bcrypt.py --max-ms 250 --env-file deploy.env
+    python scripts/calibrate_bcrypt.py --report --database recruitment_system.db
+"""
+
+import argparse
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from shared.database import DATABASE_PATH, open_connection
+from shared.security import BCRYPT_ROUNDS, calibrate_bcrypt_cost
+
+def write_env_file(path: str, rounds: int):
+    """Set BCRYPT_ROUNDS in a KEY=VALUE file, keeping its other lines."""
+    lines = []
+    if os.path.exists(path):
+        with open(path) as f:
+            lines = [line for line in f.read().splitlines() if not line.startswith("BCRYPT_ROUNDS=")]
+    lines.append(f"BCRYPT_ROUNDS={rounds}")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+def print_cost_report(database: str, target: int):
+    """Print how many stored credentials use each work factor."""
+    conn = open_connection(database, read_only=True)
+    try:
+        rows = conn.execute("""
+            SELECT CAST(substr(password, 5, 2) AS INTEGER) AS cost, COUNT(*)
+            FROM credential
+            WHERE password LIKE '$2_$__$%'
+            GROUP BY cost
+            ORDER BY cost
+        """).fetchall()
+    finally:
+        conn.close()
+
+    print(f"📊 Credentials per bcrypt cost (target {target}):")
+    for cost, count in rows:
+        marker = "  ⬆️  rehashed on next login" if cost < target else ""
+        print(f"   cost {cost:2d}: {count:,}{marker}")
+    if not rows:
+        print("   no bcrypt credentials found")
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the bcrypt work factor")
+    parser.add_argument("--max-ms", type=float, default=250.0,
+                        help="per-hash latency budget in milliseconds (default: %(default)s)")
+    parser.add_argument("--samples", type=int, default=3, help="hashes timed per cost (default: %(default)s)")
+    parser.add_argument("--env-file", help="write BCRYPT_ROUNDS to this KEY=VALUE file")
+    parser.add_argument("--report", action="store_true", help="only report stored credential costs")
+    parser.add_argument("--database", default=DATABASE_PATH, help="database for --report (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.report:
+        print_cost_report(args.database, BCRYPT_ROUNDS)
+        return
+
+    print(f"🔄 Benchmarking bcrypt against a {args.max_ms:g} ms budget...")
+    rounds, timings = calibrate_bcrypt_cost(args.max_ms, args.samples)
+    for cost, ms in timings.items():
+        print(f"   cost {cost:2d}: {ms:8.1f} ms{'  ✅' if cost == rounds else ''}")
+    if timings[rounds] > args.max_ms:
+        print(f"⚠️  Even the minimum cost {rounds} exceeds the budget on this host")
+
+    print(f"✅ Recommended cost: BCRYPT_ROUNDS={rounds} (current: {BCRYPT_ROUNDS})")
+    if args.env_file:
+        write_env_file(args.env_file, rounds)
+        print(f"📄 Wrote BCRYPT_ROUNDS={rounds} to {args.env_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the SQL used by the services.
+
+Every SQL string literal in the service modules is extracted from the
+source, run through EXPLAIN QUERY PLAN against generated datasets and timed
+at each requested scale factor. The check fails when a query fully scans a
+non-reference table (directly, or through a non-partial index while
+filtering with WHERE), sorts, groups or de-duplicates through a temp
+B-tree, or needs an automatic index, unless the query is listed in ALLOWED
+with a reason.
+
+    python scripts/check_query_plans.py --scales 0.1,1,10 --output plans.json
+
+f-string queries cannot be explained as written; their interpolated parts
+are filled in from DYNAMIC_VARIANTS, and an f-string query without an entry
+there fails the check so new dynamic SQL does not go unchecked. Datasets are
+built with scripts/generate_dataset.py and reused from --data-dir.
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import re
+import statistics
+import string
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from shared.database import create_tables, open_connection
+from scripts.generate_dataset import generate
+
+SOURCES = ("*_service/main.py", "shared/*.py")
+# Schema DDL and post-load rebuilds, not request-path queries
+EXCLUDED_SOURCES = ("shared/migrations.py",)
+
+# Lookup tables with a handful of rows; scanning them is fine
+REFERENCE_TABLES = {"role", "application_status", "job_category", "competence", "stat_counter"}
+
+# Queries that may scan or sort, keyed by query id
+ALLOWED = {
+    "edge_service/main.py:api_search_jobs#2": "bm25 relevance order is computed per match",
+    "edge_service/main.py:dashboard#7": "sorts one recruiter's applications across their jobs",
+    "edge_service/main.py:generate_reports": "admin report counting all applications by month",
+    "edge_service/main.py:recruiter_applications": "sorts one recruiter's applications across their jobs",
+    "edge_service/main.py:system_analytics": "groups the last 30 days of sign-ups by day",
+    "edge_service/main.py:system_analytics#2": "groups the last 30 days of applications by day",
+    "edge_service/main.py:system_analytics#3": "groups the last 30 days of job postings by day",
+    "shared/availability.py:_AVAILABILITY_QUERY": "full availability index rebuild",
+    "shared/hashing.py:get_credential_cost_report": "admin report over all credentials",
+    "shared/matching.py:_PROFILE_QUERY": "full matrix load; incremental refreshes group only the changed people",
+}
+
+# Substitutions for the interpolated parts of f-string queries, keyed by
+# query id; each dict maps the interpolated expression to its SQL text.
+DYNAMIC_VARIANTS = {
+    "edge_service/main.py:api_search_jobs": [
+        {"where": "job_posting_fts MATCH ? AND j.status = 'active'"},
+        {"where": "job_posting_fts MATCH ? AND j.status = 'active' AND j.employment_type = ?"},
+    ],
+    "edge_service/main.py:api_search_jobs#2": [
+        {"where": "job_posting_fts MATCH ? AND j.status = 'active'"},
+        {"where": "job_posting_fts MATCH ? AND j.status = 'active' AND j.location LIKE '%' || ? || '%'"},
+    ],
+    "edge_service/main.py:api_search_jobs#3": [
+        {"where": "j.status = 'active'"},
+        {"where": "j.status = 'active' AND j.employment_type = ?"},
+    ],
+    "edge_service/main.py:api_search_jobs#4": [
+        {"where": "j.status = 'active'"},
+        {"where": "j.status = 'active' AND j.employment_type = ?"},
+    ],
+    "edge_service/main.py:api_job_matches#2": [{"placeholders": ",".join("?" * 20)}],
+    "edge_service/main.py:api_available_candidates": [{"placeholders": ",".join("?" * 100)}],
+    "shared/availability.py:_keep_applicants": [{"placeholders": ",".join("?" * 100)}],
+    "shared/availability.py:_keep_applicants#2": [{"placeholders": ",".join("?" * 100)}],
+}
+
+_SQL = re.compile(
+    r"^\s*(SELECT\b|WITH\b|INSERT\s+(OR\s+\w+\s+)?INTO\b|REPLACE\s+INTO\b|UPDATE\s+\w+\s+SET\b|DELETE\s+FROM\b)",
+    re.IGNORECASE
+)
+_TABLE_REF = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)"
+    r"(?:\s+(?:AS\s+)?(?!(?:ON|WHERE|JOIN|LEFT|INNER|CROSS|SET|ORDER|GROUP|LIMIT|USING|VALUES)\b)(\w+))?",
+    re.IGNORECASE
+)
+_PARAM_CONTEXT = re.compile(
+    r"(?:([\w.]+)\s*(?:=|==|!=|<>|>=|<=|>|<|\bLIKE\b|\bMATCH\b|\bIN\s*\()[\s?,]*|\b(LIMIT|OFFSET)\s*)$",
+    re.IGNORECASE
+)
+_INSERT_COLUMNS = re.compile(r"INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES", re.IGNORECASE)
+
+class Query:
+    """One SQL statement found in the source."""
+
+    def __init__(self, query_id: str, sql: str, dynamic: bool = False):
+        self.id = query_id
+        self.sql = sql
+        self.dynamic = dynamic
+
+    @property
+    def is_read(self) -> bool:
+        return self.sql.lstrip().upper().startswith(("SELECT", "WITH"))
+
+def _format_fields(sql: str) -> List[str]:
+    try:
+        return [field for _, field, _, _ in string.Formatter().parse(sql) if field]
+    except ValueError:
+        return []
+
+def extract_queries(path: str) -> List[Query]:
+    """Return the SQL string literals in ``path`` with ids of the form
+    ``path:scope[#n]``, where scope is the enclosing function or the
+    module-level constant name."""
+    relative = os.path.relpath(path, project_root)
+    with open(path) as f:
+        tree = ast.parse(f.read())
+
+    queries: List[Query] = []
+    counts: Dict[str, int] = {}
+
+    def add(scope: str, sql: str, dynamic: bool):
+        counts[scope] = counts.get(scope, 0) + 1
+        suffix = f"#{counts[scope]}" if counts[scope] > 1 else ""
+        queries.append(Query(f"{relative}:{scope}{suffix}", sql, dynamic))
+
+    def visit(node, scope: str):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            scope = node.name
+        elif isinstance(node, ast.Assign) and scope == "<module>" and isinstance(node.targets[0], ast.Name):
+            scope = node.targets[0].id
+
+        if isinstance(node, ast.JoinedStr):
+            text = "".join(
+                value.value if isinstance(value, ast.Constant) else "{" + ast.unparse(value.value) + "}"
+                for value in node.values
+            )
+            if _SQL.match(text):
+                add(scope, text, True)
+            return
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and _SQL.match(node.value):
+            fields = _format_fields(node.value)
+            sql = node.value.format(**{field: "" for field in fields}) if fields else node.value
+            # Skip multi-statement scripts; EXPLAIN only sees the first statement
+            if ";" not in sql.strip().rstrip(";"):
+                add(scope, sql, False)
+            return
+
+        for child in ast.iter_child_nodes(node):
+            visit(child, scope)
+
+    visit(tree, "<module>")
+    return queries
+
+def collect_queries() -> Tuple[List[Query], List[str]]:
+    """Return all checkable queries and the ids of unregistered dynamic ones."""
+    paths = sorted({
+        path for pattern in SOURCES for path in glob.glob(os.path.join(project_root, pattern))
+        if os.path.relpath(path, project_root) not in EXCLUDED_SOURCES
+    })
+    queries, unregistered = [], []
+    for path in paths:
+        for query in extract_queries(path):
+            if not query.dynamic:
+                queries.append(query)
+            elif query.id not in DYNAMIC_VARIANTS:
+                unregistered.append(query.id)
+            else:
+                for n, variant in enumerate(DYNAMIC_VARIANTS[query.id], 1):
+                    queries.append(Query(f"{query.id}[{n}]", query.sql.format(**variant), True))
+    return queries, unregistered
+
+class SampleParams:
+    """Picks realistic bind values for a query's ``?`` placeholders.
+
+    Each placeholder is matched to the column it is compared with (or
+    inserted into) and bound to the median existing value of that column,
+    so timed queries hit real rows instead of returning nothing.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._columns: Dict[str, List[str]] = {}
+        self._values: Dict[Tuple[str, str], object] = {}
+
+    def columns(self, table: str) -> List[str]:
+        if table not in self._columns:
+            self._columns[table] = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+        return self._columns[table]
+
+    def value(self, table: str, column: str):
+        key = (table, column)
+        if key not in self._values:
+            count = self.conn.execute(f"SELECT COUNT({column}) FROM {table}").fetchone()[0]
+            row = self.conn.execute(
+                f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL LIMIT 1 OFFSET ?",
+                (count // 2,)
+            ).fetchone()
+            self._values[key] = row[0] if row else 1
+        return self._values[key]
+
+    def resolve(self, sql: str, reference: str):
+        """Return a sample value for ``alias.column`` or a bare column."""
+        aliases, tables = {}, []
+        for table, alias in _TABLE_REF.findall(sql):
+            if self.columns(table):
+                tables.append(table)
+                aliases[alias or table] = table
+                aliases[table] = table
+
+        alias, _, column = reference.rpartition(".")
+        candidates = [aliases[alias]] if alias in aliases else tables
+        for table in candidates:
+            if column in self.columns(table):
+                return self.value(table, column)
+        return 1
+
+    def bind(self, sql: str) -> List[object]:
+        params = []
+        insert = _INSERT_COLUMNS.search(sql)
+        insert_columns = [c.strip() for c in insert.group(2).split(",")] if insert else []
+
+        for match in re.finditer(r"\?", sql):
+            before = sql[:match.start()]
+            context = _PARAM_CONTEXT.search(before)
+            if insert and match.start() > insert.end():
+                position = sql[insert.end():match.start()].count("?")
+                column = insert_columns[position] if position < len(insert_columns) else None
+                value = self.value(insert.group(1), column) if column else 1
+                # Fresh text keeps writes clear of UNIQUE constraints on usernames and emails
+                params.append(f"plan-check-{value}" if isinstance(value, str) else value)
+            elif context and context.group(2):
+                params.append(20 if context.group(2).upper() == "LIMIT" else 0)
+            elif context and re.search(r"\bMATCH\s*$", before, re.IGNORECASE):
+                params.append("engineer*")
+            elif context and re.search(r"\bLIKE\b[\s|'%]*$", before, re.IGNORECASE):
+                params.append("a")
+            elif context and re.search(r"\bSET\b(?!.*\bWHERE\b)", before, re.IGNORECASE | re.DOTALL):
+                value = self.resolve(sql, context.group(1))
+                params.append(f"plan-check-{value}" if isinstance(value, str) else value)
+            elif context:
+                params.append(self.resolve(sql, context.group(1)))
+            else:
+                params.append("x")
+        return params
+
+def explain(conn, sql: str, params: List[object]) -> List[str]:
+    """Return EXPLAIN QUERY PLAN rows as indented lines."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+_SCAN_STEP = re.compile(r"SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?$")
+_WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+def plan_problems(plan: List[str], tables: set, filtered: bool = False,
+                  partial_indexes: frozenset = frozenset()) -> List[str]:
+    """Return the plan steps that make a query scale with table size.
+
+    A bare SCAN reads the whole table. A SCAN ... USING INDEX reads the
+    whole index, which is only fine when nothing is filtered (e.g. ORDER BY
+    ... LIMIT over an index) or the index is partial, so that its own WHERE
+    is the filter. ``filtered`` says whether the query has a WHERE clause.
+    Temp B-trees (sorting, grouping, DISTINCT) and automatic indexes are
+    built from every row the query reads.
+    """
+    problems = []
+    for line in plan:
+        step = line.strip()
+        scan = _SCAN_STEP.match(step)
+        if scan and scan.group(1) in tables and scan.group(1) not in REFERENCE_TABLES:
+            table, index = scan.groups()
+            if index is None:
+                problems.append(f"full scan of {table}")
+            elif filtered and index not in partial_indexes:
+                problems.append(f"full scan of {table} via index {index}")
+        elif step.startswith("USE TEMP B-TREE FOR "):
+            problems.append(f"temp B-tree for {step[len('USE TEMP B-TREE FOR '):]}")
+        elif " AUTOMATIC " in f" {step} ":
+            problems.append(f"automatic index: {step}")
+    return problems
+
+def time_query(conn, query: Query, params: List[object], repeat: int) -> Optional[float]:
+    """Return the median run time in milliseconds; writes are rolled back."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        if query.is_read:
+            conn.execute(query.sql, params).fetchall()
+        else:
+            conn.execute("BEGIN")
+            try:
+                conn.execute(query.sql, params)
+            finally:
+                conn.execute("ROLLBACK")
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def dataset_path(data_dir: str, scale: float, regenerate: bool) -> str:
+    path = os.path.join(data_dir, f"plans_scale_{scale:g}.db")
+    if regenerate or not os.path.exists(path):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        generate(path, scale, seed=42, workers=os.cpu_count() or 1, password="Password123")
+    else:
+        # Cached datasets may predate newer migrations
+        create_tables(path)
+    return path
+
+def check(queries: List[Query], databases: Dict[float, str], repeat: int) -> List[dict]:
+    """Explain every query at the largest scale and time it at every scale."""
+    results = {query.id: {"id": query.id, "sql": " ".join(query.sql.split()), "timings_ms": {}}
+               for query in queries}
+
+    largest = max(databases)
+    for scale in sorted(databases):
+        conn = open_connection(databases[scale])
+        conn.isolation_level = None  # writes are wrapped in BEGIN/ROLLBACK by hand
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            partial_indexes = frozenset(row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '%WHERE%'"
+            ))
+            sampler = SampleParams(conn)
+            for query in queries:
+                result = results[query.id]
+                try:
+                    params = sampler.bind(query.sql)
+                    if scale == largest:
+                        result["plan"] = explain(conn, query.sql, params)
+                        result["problems"] = plan_problems(
+                            result["plan"], tables, bool(_WHERE.search(query.sql)), partial_indexes
+                        )
+                    result["timings_ms"][f"{scale:g}"] = round(time_query(conn, query, params, repeat), 3)
+                except Exception as e:
+                    result.setdefault("errors", {})[f"{scale:g}"] = str(e)
+        finally:
+            conn.close()
+
+    for result in results.values():
+        base_id = result["id"].split("[")[0]
+        allowed = ALLOWED.get(base_id)
+        if "plan" not in result:
+            result["status"] = "error"
+        elif result["problems"] and allowed:
+            result["status"] = "allowed"
+            result["reason"] = allowed
+        else:
+            result["status"] = "fail" if result["problems"] else "ok"
+    return list(results.values())
+
+def format_report(results: List[dict], unregistered: List[str], scales: List[float]) -> str:
+    lines = []
+    header = " ".join(f"{f'{s:g}x ms':>10}" for s in scales)
+    lines.append(f"{'status':8} {'query':58} {header}")
+    for result in sorted(results, key=lambda r: (r["status"] == "ok", r["id"])):
+        timings = " ".join(
+            f"{result['timings_ms'].get(f'{s:g}', float('nan')):10.3f}" for s in scales
+        )
+        lines.append(f"{result['status']:8} {result['id'][:58]:58} {timings}")
+        if result["status"] in ("fail", "allowed"):
+            lines.append(f"{'':9}{'; '.join(result['problems'])}"
+                         + (f" (allowed: {result['reason']})" if result["status"] == "allowed" else ""))
+        if result["status"] == "fail":
+            lines.extend(f"{'':11}{line}" for line in result["plan"])
+        for scale, error in result.get("errors", {}).items():
+            lines.append(f"{'':9}error at {scale}x: {error}")
+    for query_id in unregistered:
+        lines.append(f"{'fail':8} {query_id[:58]:58} dynamic SQL missing from DYNAMIC_VARIANTS")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check service SQL query plans against generated data")
+    parser.add_argument("--scales", default="0.1,1",
+                        help="comma-separated dataset scale factors (default: %(default)s)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "query_plans"),
+                        help="where generated datasets are kept (default: %(default)s)")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild cached datasets")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per query (default: %(default)s)")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    scales = sorted(float(scale) for scale in args.scales.split(","))
+    os.makedirs(args.data_dir, exist_ok=True)
+    databases = {scale: dataset_path(args.data_dir, scale, args.regenerate) for scale in scales}
+
+    queries, unregistered = collect_queries()
+    print(f"🔄 Checking {len(queries)} queries at scale factors {', '.join(f'{s:g}' for s in scales)}...")
+    results = check(queries, databases, args.repeat)
+    print(format_report(results, unregistered, scales))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"scales": scales, "queries": results, "unregistered_dynamic": unregistered}, f, indent=2)
+        print(f"📄 JSON report written to {args.output}")
+
+    known = {r["id"].split("[")[0] for r in results}
+    for query_id in sorted(set(ALLOWED) - known):
+        print(f"⚠️  ALLOWED entry {query_id} matches no query")
+
+    failed = [r for r in results if r["status"] in ("fail", "error")] + unregistered
+    if failed:
+        print(f"❌ {len(failed)} queries failed the plan check")
+        sys.exit(1)
+    print("✅ All query plans use indexes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic recruitment dataset for performance testing.
+
+Fills the schema from shared.database.create_tables at a configurable scale
+factor. Scale factor 1 is 10k applicants, 100 recruiters, 1k job postings and
+100k applications; scale factor 100 gives 10M applications.
+
+    python scripts/generate_dataset.py --database perf.db --scale 10 --seed 42
+
+Rows are generated in per-applicant chunks on a process pool and
+bulk-inserted by the main process, with triggers and secondary indexes
+dropped during the load and rebuilt afterwards. Every chunk has its own
+seed derived from --seed, so the same seed and scale produce the same data
+regardless of the number of workers.
+
+All generated users share one password (--password), hashed once up front.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from shared.database import create_tables, open_connection
+from shared.migrations import rebuild_derived_tables
+from shared.security import get_password_hash
+
+# Per scale factor unit
+APPLICANTS_PER_SCALE = 10_000
+RECRUITERS_PER_SCALE = 100
+JOBS_PER_SCALE = 1_000
+APPLICATIONS_PER_SCALE = 100_000
+
+CHUNK_APPLICANTS = 20_000
+DEFAULT_PASSWORD = "Password123"
+
+# Tables whose triggers and indexes are dropped while loading
+LOADED_TABLES = ("person", "credential", "job_posting", "job_competence",
+                 "application", "competence_profile", "availability")
+
+FIRST_NAMES = np.array([
+    "Emma", "Liam", "Olivia", "Noah", "Ava", "Elias", "Maja", "Hugo", "Alice",
+    "William", "Ella", "Lucas", "Wilma", "Oscar", "Alma", "Leo", "Saga", "Adam",
+    "Ebba", "Nils", "Astrid", "Omar", "Fatima", "Chen", "Priya", "Mateo", "Sofia",
+])
+LAST_NAMES = np.array([
+    "Johansson", "Andersson", "Karlsson", "Nilsson", "Eriksson", "Larsson",
+    "Olsson", "Persson", "Svensson", "Gustafsson", "Smith", "Garcia", "Kim",
+    "Nguyen", "Patel", "Müller", "Rossi", "Novak", "Haddad", "Okafor",
+])
+JOB_TITLES = np.array([
+    "Software Engineer", "Backend Developer", "Frontend Developer",
+    "Data Analyst", "Project Manager", "Marketing Specialist",
+    "Operations Coordinator", "DevOps Engineer", "QA Engineer",
+    "Customer Support Agent", "Sales Representative", "Product Owner",
+])
+SENIORITY = np.array(["Junior", "", "Senior", "Lead"])
+LOCATIONS = np.array([
+    "Stockholm", "Gothenburg", "Malmö", "Uppsala", "Remote", "Copenhagen",
+    "Oslo", "Helsinki", "Berlin", "London",
+])
+EMPLOYMENT_TYPES = np.array(["full-time", "part-time", "contract", "internship"])
+EMPLOYMENT_WEIGHTS = np.array([0.7, 0.12, 0.13, 0.05])
+EXPERIENCE_LEVELS = np.array(["entry", "mid", "senior"])
+
+# Application status ids from the seeded application_status table:
+# Submitted, Under Review, Accepted, Rejected
+STATUS_IDS = np.array([1, 2, 3, 4])
+STATUS_WEIGHTS = np.array([0.45, 0.3, 0.05, 0.2])
+
+EPOCH = np.datetime64("2023-01-01T00:00:00")
+HISTORY_SECONDS = 3 * 365 * 86400
+AVAILABILITY_START = np.datetime64("2026-01-01")
+
+def _timestamps(seconds: np.ndarray) -> List[str]:
+    """Format offsets from EPOCH like SQLite's CURRENT_TIMESTAMP."""
+    stamps = np.datetime_as_string(EPOCH + seconds.astype("timedelta64[s]"), unit="s")
+    return [stamp.replace("T", " ") for stamp in stamps.tolist()]
+
+def _rng(seed: int, *stream: int) -> np.random.Generator:
+    return np.random.default_rng([seed, *stream])
+
+def plan(scale: float) -> Dict[str, int]:
+    """Return row targets for a scale factor."""
+    return {
+        "applicants": max(1, int(APPLICANTS_PER_SCALE * scale)),
+        "recruiters": max(1, int(RECRUITERS_PER_SCALE * scale)),
+        "jobs": max(1, int(JOBS_PER_SCALE * scale)),
+        "applications": int(APPLICATIONS_PER_SCALE * scale),
+    }
+
+def generate_staff(seed: int, first_id: int, recruiters: int) -> List[tuple]:
+    """Person rows for the admin and recruiters."""
+    rng = _rng(seed, 0)
+    rows = [(first_id, "Perf", "Admin", None, f"perf.admin.{first_id}@example.com", 1,
+             _timestamps(np.zeros(1, dtype=np.int64))[0])]
+    first = rng.choice(FIRST_NAMES, recruiters)
+    last = rng.choice(LAST_NAMES, recruiters)
+    created = _timestamps(rng.integers(0, HISTORY_SECONDS // 2, recruiters))
+    for i in range(recruiters):
+        person_id = first_id + 1 + i
+        rows.append((person_id, first[i], last[i], None,
+                     f"{first[i].lower()}.{last[i].lower()}.{person_id}@example.com", 3,
+                     created[i]))
+    return rows
+
+def generate_jobs(seed: int, first_id: int, count: int, recruiter_ids: np.ndarray,
+                  category_ids: np.ndarray, competences: List[Tuple[int, str]]):
+    """Job posting and job_competence rows plus per-job arrays used by workers."""
+    rng = _rng(seed, 1)
+    ids = np.arange(first_id, first_id + count)
+    titles = rng.choice(JOB_TITLES, count)
+    seniority = rng.integers(0, len(SENIORITY), count)
+    locations = rng.choice(LOCATIONS, count)
+    types = rng.choice(EMPLOYMENT_TYPES, count, p=EMPLOYMENT_WEIGHTS)
+    posted_by = rng.choice(recruiter_ids, count)
+    categories = rng.choice(category_ids, count)
+    salary_min = (rng.integers(25, 70, count) * 1000).astype(float)
+    salary_max = salary_min + rng.integers(5, 40, count) * 1000
+    # Most postings stay open; older ones are more likely to be closed
+    created = np.sort(rng.integers(0, HISTORY_SECONDS, count))
+    active = rng.random(count) < 0.5 + 0.45 * created / HISTORY_SECONDS
+    created_at = _timestamps(created)
+
+    competence_ids = np.array([cid for cid, _ in competences])
+    competence_names = [name for _, name in competences]
+
+    jobs, requirements = [], []
+    for i in range(count):
+        title = f"{SENIORITY[seniority[i]]} {titles[i]}".strip()
+        needed = rng.choice(len(competence_ids), min(len(competence_ids), rng.integers(1, 4)), replace=False)
+        names = ", ".join(competence_names[j] for j in needed)
+        jobs.append((
+            int(ids[i]), title,
+            f"We are hiring a {title.lower()} in {locations[i]} to join a growing team.",
+            f"Experience with {names}.",
+            int(posted_by[i]), int(categories[i]), float(salary_min[i]), float(salary_max[i]),
+            str(locations[i]), str(types[i]), str(EXPERIENCE_LEVELS[min(seniority[i], 2)]),
+            "active" if active[i] else "closed", created_at[i],
+        ))
+        for j in needed:
+            requirements.append((int(ids[i]), int(competence_ids[j]), float(rng.integers(0, 6))))
+
+    # Popularity follows a power law: a few postings draw most applications
+    popularity = rng.pareto(1.2, count) + 1
+    popularity[~active] *= 0.3
+    return jobs, requirements, ids, created, popularity / popularity.sum()
+
+def generate_chunk(args) -> Dict[str, List[tuple]]:
+    """Generate one chunk of applicants with their credentials, profiles,
+    availability and applications."""
+    (seed, chunk, first_id, count, applications, password_hash,
+     job_ids, job_created, job_weights, competence_ids) = args
+    rng = _rng(seed, 2, chunk)
+    person_ids = np.arange(first_id, first_id + count)
+
+    first = rng.choice(FIRST_NAMES, count)
+    last = rng.choice(LAST_NAMES, count)
+    birth_days = rng.integers(0, 45 * 365, count)
+    births = np.datetime_as_string(np.datetime64("1960-01-01") + birth_days.astype("timedelta64[D]"))
+    created = rng.integers(0, HISTORY_SECONDS, count)
+    created_at = _timestamps(created)
+    emails = [f"{f.lower()}.{l.lower()}.{pid}@example.com"
+              for f, l, pid in zip(first.tolist(), last.tolist(), person_ids.tolist())]
+
+    persons = list(zip(person_ids.tolist(), first.tolist(), last.tolist(), births.tolist(),
+                       emails, [2] * count, created_at))
+    credentials = [(pid, f"perf{pid}", password_hash, ts)
+                   for pid, ts in zip(person_ids.tolist(), created_at)]
+
+    # 1-4 competences each, experience skewed towards a few years
+    per_person = rng.integers(1, min(4, len(competence_ids)) + 1, count)
+    owners = np.repeat(person_ids, per_person)
+    shuffled = np.argsort(rng.random((count, len(competence_ids))), axis=1)
+    picks = shuffled[np.arange(len(competence_ids)) < per_person[:, None]]
+    years = np.round(np.minimum(rng.gamma(2.0, 2.0, len(owners)), 30), 1)
+    levels = np.where(years < 2, "beginner", np.where(years < 6, "intermediate", "expert"))
+    profiles = list(zip(owners.tolist(), competence_ids[picks].tolist(), years.tolist(), levels.tolist()))
+
+    # 0-2 availability windows within the coming year
+    windows = rng.choice(3, count, p=[0.2, 0.6, 0.2])
+    owners = np.repeat(person_ids, windows)
+    starts = AVAILABILITY_START + rng.integers(0, 365, len(owners)).astype("timedelta64[D]")
+    ends = starts + rng.integers(14, 180, len(owners)).astype("timedelta64[D]")
+    availability = list(zip(owners.tolist(), np.datetime_as_string(starts).tolist(),
+                            np.datetime_as_string(ends).tolist()))
+
+    # Applications: a few applicants apply widely; no duplicate (person, job)
+    activity = rng.pareto(1.5, count) + 1
+    drawn = int(applications * 1.3) + 16  # headroom for dropped duplicates
+    applicants = rng.choice(person_ids, drawn, p=activity / activity.sum())
+    jobs = rng.choice(len(job_ids), drawn, p=job_weights)
+    pairs = np.unique(np.stack([applicants, jobs], axis=1), axis=0)
+    rng.shuffle(pairs)
+    applicants, jobs = pairs[:applications, 0], pairs[:applications, 1]
+    applied = job_created[jobs] + rng.exponential(14 * 86400, len(jobs)).astype(np.int64)
+    applied = np.minimum(applied, HISTORY_SECONDS)
+    statuses = rng.choice(STATUS_IDS, len(jobs), p=STATUS_WEIGHTS)
+    applications = list(zip(applicants.tolist(), job_ids[jobs].tolist(), statuses.tolist(),
+                            _timestamps(applied)))
+
+    return {
+        "person": persons,
+        "credential": credentials,
+        "competence_profile": profiles,
+        "availability": availability,
+        "application": applications,
+    }
+
+INSERTS = {
+    "person": "INSERT INTO person (id, firstname, lastname, date_of_birth, email, role_id, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+    "credential": "INSERT INTO credential (person_id, username, password, created_at) VALUES (?, ?, ?, ?)",
+    "job_posting": """INSERT INTO job_posting (id, title, description, requirements, posted_by, category_id,
+                      salary_min, salary_max, location, employment_type, experience_level, status, created_at)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    "job_competence": "INSERT OR IGNORE INTO job_competence (job_posting_id, competence_id, min_years) VALUES (?, ?, ?)",
+    "competence_profile": "INSERT INTO competence_profile (person_id, competence_id, years_of_experience, proficiency_level) VALUES (?, ?, ?, ?)",
+    "availability": "INSERT INTO availability (person_id, from_date, to_date) VALUES (?, ?, ?)",
+    "application": "INSERT INTO application (person_id, job_posting_id, status_id, applied_date) VALUES (?, ?, ?, ?)",
+}
+
+def _ordered_results(pool, func, tasks: List[tuple], window: int) -> Iterator:
+    """Like pool.map, but with at most ``window`` chunks in flight so
+    generated rows never pile up faster than they are inserted."""
+    pending = []
+    for task in tasks:
+        pending.append(pool.submit(func, task))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+class BulkLoader:
+    """Inserts rows with triggers and secondary indexes dropped, restoring
+    them and recomputing trigger-maintained tables at the end."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.counts: Dict[str, int] = {}
+        placeholders = ",".join("?" * len(LOADED_TABLES))
+        self._saved = conn.execute(f"""
+            SELECT type, name, sql FROM sqlite_master
+            WHERE type IN ('trigger', 'index') AND sql IS NOT NULL
+              AND tbl_name IN ({placeholders})
+        """, LOADED_TABLES).fetchall()
+
+    def __enter__(self):
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("BEGIN")
+        for kind, name, _ in self._saved:
+            self.conn.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+        return self
+
+    def insert(self, table: str, rows: List[tuple]) -> None:
+        self.conn.executemany(INSERTS[table], rows)
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+
+    def checkpoint(self) -> None:
+        self.conn.execute("COMMIT")
+        self.conn.execute("BEGIN")
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            # Earlier checkpoints are committed, so restore the schema anyway
+            self.conn.execute("ROLLBACK")
+            self.conn.execute("BEGIN")
+        print("🗂️  Rebuilding indexes, triggers and counters...")
+        # Indexes first so the rebuild queries can use them
+        for kind, _, sql in sorted(self._saved, key=lambda item: item[0] != "index"):
+            self.conn.execute(sql)
+        rebuild_derived_tables(self.conn)
+        self.conn.execute("COMMIT")
+        self.conn.execute("ANALYZE")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        return False
+
+def split_chunks(applicants: int, applications: int, size: int = None) -> List[Tuple[int, int, int]]:
+    """Split applicants into chunks of ``size`` as (offset, count, applications).
+
+    Applications are shared in proportion to the chunk sizes by rounding the
+    running total, so the chunks always add up to ``applications`` exactly.
+    """
+    size = size or CHUNK_APPLICANTS
+
+    def share(end: int) -> int:
+        return (2 * applications * end + applicants) // (2 * applicants)
+
+    return [(offset, min(size, applicants - offset), share(min(offset + size, applicants)) - share(offset))
+            for offset in range(0, applicants, size)]
+
+def generate(database: str, scale: float, seed: int, workers: int, password: str) -> Dict[str, int]:
+    """Generate a dataset into ``database`` and return per-table row counts."""
+    started = time.perf_counter()
+    create_tables(database)
+    targets = plan(scale)
+    print(f"🔄 Generating scale factor {scale}: " + ", ".join(f"{k}={v:,}" for k, v in targets.items()))
+
+    password_hash = get_password_hash(password)
+
+    conn = open_connection(database)
+    conn.isolation_level = None  # transactions are managed explicitly
+    try:
+        next_person = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM person").fetchone()[0]
+        next_job = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM job_posting").fetchone()[0]
+        category_ids = np.array([r[0] for r in conn.execute("SELECT id FROM job_category")])
+        competences = conn.execute("SELECT id, name FROM competence ORDER BY id").fetchall()
+        competence_ids = np.array([cid for cid, _ in competences])
+
+        with BulkLoader(conn) as loader:
+            staff = generate_staff(seed, next_person, targets["recruiters"])
+            loader.insert("person", staff)
+            loader.insert("credential", [(row[0], f"perf{row[0]}", password_hash, row[6]) for row in staff])
+            recruiter_ids = np.array([row[0] for row in staff[1:]])
+
+            jobs, requirements, job_ids, job_created, job_weights = generate_jobs(
+                seed, next_job, targets["jobs"], recruiter_ids, category_ids, competences
+            )
+            loader.insert("job_posting", jobs)
+            loader.insert("job_competence", requirements)
+
+            first_applicant = next_person + len(staff)
+            chunks = []
+            for chunk, (offset, count, applications) in enumerate(
+                split_chunks(targets["applicants"], targets["applications"])
+            ):
+                chunks.append((seed, chunk, first_applicant + offset, count, applications,
+                               password_hash, job_ids, job_created, job_weights, competence_ids))
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for done, tables in enumerate(_ordered_results(pool, generate_chunk, chunks, workers * 2), 1):
+                    for table, rows in tables.items():
+                        loader.insert(table, rows)
+                    loader.checkpoint()
+                    elapsed = time.perf_counter() - started
+                    print(f"   chunk {done}/{len(chunks)}  "
+                          f"{loader.counts.get('application', 0):,} applications  "
+                          f"{sum(loader.counts.values()) / elapsed:,.0f} rows/s")
+
+        elapsed = time.perf_counter() - started
+        for table, count in loader.counts.items():
+            print(f"   {table}: {count:,} rows")
+        print(f"✅ Generated {sum(loader.counts.values()):,} rows in {elapsed:.1f}s")
+        return loader.counts
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic recruitment dataset")
+    parser.add_argument("--database", required=True,
+                        help="target SQLite database, e.g. perf.db; not the service database")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="scale factor; 1 = 100k applications (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="generator processes (default: %(default)s)")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD,
+                        help="password for every generated user (default: %(default)s)")
+    args = parser.parse_args()
+
+    generate(args.database, args.scale, args.seed, args.workers, args.password)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Import the legacy MySQL dumps in database/ into SQLite.
+
+Dumps are streamed line by line and split into statements without loading
+the file into memory. CREATE/DROP TABLE statements are translated to SQLite,
+INSERT statements are bulk-loaded inside large transactions, and
+secondary indexes are created only after a dump's data is in.
+
+    python scripts/import_mysql_dump.py database/recruitmentsystem.sql \\
+        --database legacy_import.db
+
+Importing into the live service database would replace its tables, so that
+requires --table-prefix (e.g. ``legacy_``) to keep the imported tables apart.
+
+Dumps usually start each table with DROP TABLE, so a later dump that
+covers a table an earlier dump of the same run already loaded would wipe
+it. Unless --replace is given, each dump is scanned for DROP TABLE lines
+before it is loaded, and a conflicting dump stops the import before any of
+it is written; the database keeps the dumps imported before it. A DROP
+TABLE sharing a line with other statements is only seen when the import
+reaches it, by which time earlier batches of that dump may be committed,
+and the error says so. Import the dumps into separate databases or with
+different table prefixes to avoid conflicts.
+"""
+
+import argparse
+import gzip
+import itertools
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from shared.database import open_connection
+
+DEFAULT_DATABASE = "legacy_import.db"
+DEFAULT_BATCH_ROWS = 100_000
+PROGRESS_INTERVAL = 2.0  # seconds
+
+# Lexical units of a MySQL dump. Strings, quoted identifiers and comments
+# are matched whole so a ';' inside them never ends a statement.
+_TOKEN = re.compile(r"""
+    '[^'\\]*(?:\\.[^'\\]*)*'
+  | "[^"\\]*(?:\\.[^"\\]*)*"
+  | `[^`]*`
+  | /\*.*?\*/
+  | --(?=\s)[^\n]*
+  | \#[^\n]*
+  | ;
+  | [^'"`;/\#-]+
+  | .
+""", re.X | re.S)
+
+# Values inside INSERT ... VALUES (...),(...)
+_VALUE = re.compile(r"""
+    '([^'\\]*(?:(?:\\.|'')[^'\\]*)*)'
+  | (NULL)\b
+  | 0x([0-9A-Fa-f]*)
+  | ([-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?)
+  | (\()
+  | (\))
+  | (;)
+""", re.X | re.I)
+
+_ESCAPES = {
+    "0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a",
+}
+_ESCAPE = re.compile(r"\\(.)|''", re.S)
+# Literals that need rewriting before SQLite can parse MySQL VALUES text
+_MYSQL_LITERAL = re.compile(r"'([^'\\]*(?:\\.[^'\\]*)*)'|\b0x([0-9A-Fa-f]*)\b")
+
+_INSERT_HEAD = re.compile(
+    r"(INSERT|REPLACE)\s+(?:LOW_PRIORITY\s+|DELAYED\s+|HIGH_PRIORITY\s+)?(IGNORE\s+)?"
+    r"INTO\s+(`[^`]+`|\w+)\s*(\([^)]*\))?\s*VALUES\s*",
+    re.I
+)
+_CREATE_HEAD = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(`[^`]+`|\w+)\s*\(", re.I)
+_DROP_TABLE = re.compile(r"DROP\s+TABLE\s+(IF\s+EXISTS\s+)?(`[^`]+`|\w+)\s*$", re.I)
+# mysqldump writes each DROP TABLE at the start of its own line
+_DROP_TABLE_LINE = re.compile(r"\s*DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(`[^`]+`|\w+)\s*;", re.I)
+_SKIPPED = re.compile(r"(LOCK\s+TABLES|UNLOCK\s+TABLES|SET\s|USE\s|ALTER\s+TABLE\s+\S+\s+(DISABLE|ENABLE)\s+KEYS)", re.I)
+
+_TYPE_MAP = {
+    "tinyint": "INTEGER", "smallint": "INTEGER", "mediumint": "INTEGER",
+    "int": "INTEGER", "integer": "INTEGER", "bigint": "INTEGER", "bit": "INTEGER",
+    "bool": "INTEGER", "boolean": "INTEGER", "year": "INTEGER",
+    "decimal": "DECIMAL", "numeric": "DECIMAL",
+    "float": "REAL", "double": "REAL", "real": "REAL",
+    "char": "VARCHAR", "varchar": "VARCHAR",
+    "tinytext": "TEXT", "text": "TEXT", "mediumtext": "TEXT", "longtext": "TEXT",
+    "enum": "TEXT", "set": "TEXT", "json": "TEXT",
+    "date": "DATE", "datetime": "DATETIME", "timestamp": "TIMESTAMP", "time": "TIME",
+    "binary": "BLOB", "varbinary": "BLOB", "tinyblob": "BLOB", "blob": "BLOB",
+    "mediumblob": "BLOB", "longblob": "BLOB",
+}
+# Types whose (length) / (precision, scale) is kept in the SQLite declaration
+_SIZED_TYPES = {"DECIMAL", "VARCHAR"}
+
+_COLUMN_NOISE = re.compile(
+    r"\b(UNSIGNED|SIGNED|ZEROFILL|AUTO_INCREMENT)\b"
+    r"|\bCHARACTER\s+SET\s+\w+|\bCHARSET\s+\w+|\bCOLLATE\s+\w+"
+    r"|\bON\s+UPDATE\s+CURRENT_TIMESTAMP(\(\d*\))?"
+    r"|\bCOMMENT\s+'[^'\\]*(?:\\.[^'\\]*)*'",
+    re.I
+)
+
+class DumpSyntaxError(Exception):
+    """Raised when a dump statement cannot be parsed."""
+
+class DumpConflictError(Exception):
+    """Raised when a dump would drop a table loaded by an earlier dump."""
+
+def open_dump(path: str, encoding: str):
+    """Open a dump for streaming, transparently handling .gz files."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding=encoding, errors="replace")
+    return open(path, "r", encoding=encoding, errors="replace")
+
+def scan_dropped_tables(path: str, encoding: str = "utf-8") -> List[str]:
+    """Return the tables a dump drops on lines of their own, in order.
+
+    A quick line scan that does not parse the dump; statements sharing a
+    line with others are not seen.
+    """
+    tables: List[str] = []
+    with open_dump(path, encoding) as stream:
+        for line in stream:
+            match = _DROP_TABLE_LINE.match(line)
+            if match:
+                table = _unquote(match.group(1))
+                if table not in tables:
+                    tables.append(table)
+    return tables
+
+def iter_statements(lines: Iterable[str]) -> Iterator[str]:
+    """Yield SQL statements from a stream of lines, dropping comments.
+
+    Only the current statement is buffered; a statement ends at a ';' that
+    is outside strings, quoted identifiers and comments.
+    """
+    chunks: List[str] = []
+    parts: List[str] = []
+
+    # The trailing ";" flushes a final statement that lacks its terminator
+    for line in itertools.chain(lines, ["\n;"]):
+        chunks.append(line)
+        if ";" not in line:
+            continue  # no statement can end on this line
+
+        pending = "".join(chunks)
+        pos = 0
+        for match in _TOKEN.finditer(pending):
+            token = match.group()
+            if len(token) == 1 and (token in "'\"`" or (token == "/" and pending.startswith("*", match.end()))):
+                break  # unterminated string or comment: needs more lines
+            pos = match.end()
+            if token == ";":
+                statement = "".join(parts).strip()
+                parts = []
+                if statement:
+                    yield statement
+            elif token.startswith(("/*", "--", "#")):
+                parts.append(" ")
+            else:
+                parts.append(token)
+        chunks = [pending[pos:]]
+
+    statement = ("".join(parts) + "".join(chunks)).strip()
+    if statement:
+        yield statement
+
+def quote_identifier(name: str, prefix: str = "") -> str:
+    """Turn a MySQL identifier (optionally backquoted) into a quoted SQLite one."""
+    if name.startswith("`") and name.endswith("`"):
+        name = name[1:-1].replace("``", "`")
+    return '"' + (prefix + name).replace('"', '""') + '"'
+
+def _unquote(name: str) -> str:
+    return name.strip().strip("`")
+
+def _quote_identifiers(text: str, prefix_refs: str = "") -> str:
+    """Convert backquoted identifiers in a definition to SQLite quoting."""
+    text = re.sub(
+        r"REFERENCES\s+(`[^`]+`|\w+)",
+        lambda m: "REFERENCES " + quote_identifier(m.group(1), prefix_refs),
+        text, flags=re.I
+    )
+    return re.sub(r"`([^`]*)`", lambda m: quote_identifier(m.group()), text)
+
+def _split_definitions(body: str) -> List[str]:
+    """Split a CREATE TABLE body on top-level commas."""
+    definitions, depth, start = [], 0, 0
+    for match in _TOKEN.finditer(body):
+        token = match.group()
+        if token[0] in "'\"`" or token.startswith(("/*", "--", "#")):
+            continue  # parentheses and commas in here don't count
+        for offset, char in enumerate(token):
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char == "," and depth == 0:
+                comma = match.start() + offset
+                definitions.append(body[start:comma].strip())
+                start = comma + 1
+    definitions.append(body[start:].strip())
+    return [d for d in definitions if d]
+
+def _key_columns(columns: str) -> str:
+    # Drop MySQL prefix lengths: `name`(10) -> "name"
+    names = [re.sub(r"\(\d+\)", "", c).strip() for c in columns.split(",")]
+    return ", ".join(quote_identifier(n) for n in names)
+
+def translate_create_table(statement: str, prefix: str = "") -> Tuple[str, str, List[str]]:
+    """Translate a MySQL CREATE TABLE into SQLite.
+
+    Returns the table name, the CREATE TABLE statement and the deferred
+    CREATE INDEX statements for its secondary keys.
+    """
+    head = _CREATE_HEAD.match(statement)
+    if not head:
+        raise DumpSyntaxError(f"Unsupported CREATE statement: {statement[:80]}")
+    table = _unquote(head.group(1))
+    body = statement[head.end():statement.rindex(")")]
+
+    columns, indexes = [], []
+    for definition in _split_definitions(body):
+        upper = definition.upper()
+        key = re.match(r"(UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?(KEY|INDEX)\s+(`[^`]+`|\w+)?\s*\((.*)\)", definition, re.I | re.S)
+
+        if upper.startswith("PRIMARY KEY"):
+            cols = re.search(r"\((.*)\)", definition, re.S).group(1)
+            columns.append(f"PRIMARY KEY ({_key_columns(cols)})")
+        elif key:
+            kind = (key.group(1) or "").strip().upper()
+            if kind in ("FULLTEXT", "SPATIAL"):
+                continue  # no SQLite equivalent
+            name = _unquote(key.group(3) or "idx")
+            unique = "UNIQUE " if kind == "UNIQUE" else ""
+            indexes.append(
+                f"CREATE {unique}INDEX IF NOT EXISTS {quote_identifier(f'{table}_{name}', prefix)} "
+                f"ON {quote_identifier(table, prefix)} ({_key_columns(key.group(4))})"
+            )
+        elif upper.startswith(("CONSTRAINT", "FOREIGN KEY")):
+            columns.append(_quote_identifiers(definition, prefix))
+        elif upper.startswith("CHECK"):
+            columns.append(_quote_identifiers(definition))
+        else:
+            columns.append(_translate_column(definition, prefix))
+
+    create = (
+        f"CREATE TABLE {quote_identifier(table, prefix)} (\n    "
+        + ",\n    ".join(columns)
+        + "\n)"
+    )
+    return table, create, indexes
+
+def _translate_column(definition: str, prefix: str = "") -> str:
+    match = re.match(r"(`[^`]+`|\w+)\s+(\w+)\s*(\([^)]*\))?\s*(.*)", definition, re.S)
+    if not match:
+        raise DumpSyntaxError(f"Unsupported column definition: {definition[:80]}")
+    name, mysql_type, size, rest = match.groups()
+
+    sqlite_type = _TYPE_MAP.get(mysql_type.lower(), "TEXT")
+    if sqlite_type in _SIZED_TYPES and size:
+        sqlite_type += size.replace(" ", "")
+
+    rest = _COLUMN_NOISE.sub("", rest)
+    rest = re.sub(r"\s+", " ", rest).strip()
+    return f"{quote_identifier(name)} {sqlite_type}" + (f" {_quote_identifiers(rest, prefix)}" if rest else "")
+
+def _unescape(text: str) -> str:
+    if "\\" not in text and "''" not in text:
+        return text
+    return _ESCAPE.sub(
+        lambda m: "'" if m.group() == "''" else _ESCAPES.get(m.group(1), m.group(1)),
+        text
+    )
+
+def _insert_target(head, prefix: str) -> Tuple[str, str]:
+    """Return the table name and the SQLite ``INSERT ... INTO table (cols)`` prefix."""
+    verb, ignore, table, column_list = head.groups()
+    table = _unquote(table)
+    if verb.upper() == "REPLACE":
+        action = "INSERT OR REPLACE"
+    elif ignore:
+        action = "INSERT OR IGNORE"
+    else:
+        action = "INSERT"
+    columns = f" ({_key_columns(column_list[1:-1])})" if column_list else ""
+    return table, f"{action} INTO {quote_identifier(table, prefix)}{columns}"
+
+def _sqlite_literal(match) -> str:
+    string, hexadecimal = match.groups()
+    if string is None:
+        return f"X'{hexadecimal}'"
+    if "\\" not in string:
+        return match.group()
+    return "'" + _unescape(string).replace("'", "''") + "'"
+
+def translate_insert(statement: str, prefix: str = "") -> Tuple[str, str]:
+    """Rewrite a multi-row MySQL INSERT as SQLite SQL: ``(table, sql)``.
+
+    Letting SQLite parse the VALUES list is several times faster than
+    parsing rows in Python; only backslash escapes and hex literals need
+    rewriting, and most dump statements have neither.
+    """
+    head = _INSERT_HEAD.match(statement)
+    if not head:
+        raise DumpSyntaxError(f"Unsupported INSERT statement: {statement[:80]}")
+    table, target = _insert_target(head, prefix)
+
+    values = statement[head.end():]
+    if "\\" in values or "0x" in values:
+        values = _MYSQL_LITERAL.sub(_sqlite_literal, values)
+    return table, f"{target} VALUES {values}"
+
+def parse_insert(statement: str, prefix: str = "") -> Tuple[str, str, List[tuple]]:
+    """Parse a MySQL INSERT into ``(table, sqlite_insert_sql, rows)``."""
+    head = _INSERT_HEAD.match(statement)
+    if not head:
+        raise DumpSyntaxError(f"Unsupported INSERT statement: {statement[:80]}")
+    table, target = _insert_target(head, prefix)
+
+    rows: List[tuple] = []
+    row: Optional[list] = None
+    for match in _VALUE.finditer(statement, head.end()):
+        string, null, hexadecimal, number, open_paren, close_paren, end = match.groups()
+        if open_paren:
+            row = []
+        elif close_paren:
+            rows.append(tuple(row))
+            row = None
+        elif end:
+            break
+        elif row is None:
+            raise DumpSyntaxError(f"Value outside a row in INSERT into {table}")
+        elif string is not None:
+            row.append(_unescape(string))
+        elif null:
+            row.append(None)
+        elif number is not None:
+            row.append(int(number) if number.lstrip("+-").isdigit() else float(number))
+        else:
+            row.append(bytes.fromhex(hexadecimal))
+
+    if not rows:
+        raise DumpSyntaxError(f"No rows in INSERT into {table}")
+
+    placeholders = ",".join("?" * len(rows[0]))
+    return table, f"{target} VALUES ({placeholders})", rows
+
+class DumpImporter:
+    """Loads translated dump statements into a SQLite connection."""
+
+    def __init__(self, conn, prefix: str = "", batch_rows: int = DEFAULT_BATCH_ROWS,
+                 progress: bool = True, replace: bool = False):
+        self.conn = conn
+        self.prefix = prefix
+        self.replace = replace
+        self.batch_rows = batch_rows
+        self.progress = progress
+        self.rows = 0
+        self.tables: Dict[str, int] = {}
+        self.skipped = 0
+        self._uncommitted = 0
+        self._committed = 0  # rows of the current dump already committed
+        self._pending_indexes: Dict[str, List[str]] = {}
+        self._loaded_from: Dict[str, str] = {}  # table -> dump that created it
+        self._path: Optional[str] = None
+        self._started = time.perf_counter()
+        self._last_report = self._started
+
+    def import_file(self, path: str, encoding: str = "utf-8") -> None:
+        """Stream one dump file into the database."""
+        print(f"📥 Importing {path}")
+        self._path = path
+        self._committed = 0
+        if not self.replace:
+            # Refuse a conflicting dump before any of it is written
+            for table in scan_dropped_tables(path, encoding):
+                self._check_replace(table)
+        with open_dump(path, encoding) as stream:
+            self.conn.execute("BEGIN")
+            try:
+                for statement in iter_statements(stream):
+                    self._apply(statement)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        self._create_indexes()
+
+    def _apply(self, statement: str) -> None:
+        keyword = statement[:16].upper()
+
+        if keyword.startswith(("INSERT", "REPLACE")):
+            table, sql = translate_insert(statement, self.prefix)
+            try:
+                if "\0" in sql:
+                    raise ValueError("NUL bytes cannot appear in SQL text")
+                inserted = self.conn.execute(sql).rowcount
+            except (sqlite3.OperationalError, ValueError):
+                # Syntax SQLite can't take directly (e.g. NUL bytes, bit
+                # literals): parse the rows in Python and bind them instead.
+                # A failed statement leaves the transaction intact.
+                table, sql, rows = parse_insert(statement, self.prefix)
+                inserted = len(rows)
+                self.conn.executemany(sql, rows)
+            self.rows += inserted
+            self.tables[table] = self.tables.get(table, 0) + inserted
+            self._uncommitted += inserted
+            if self._uncommitted >= self.batch_rows:
+                self.conn.execute("COMMIT")
+                self.conn.execute("BEGIN")
+                self._committed += self._uncommitted
+                self._uncommitted = 0
+            self._report()
+
+        elif keyword.startswith("CREATE TABLE"):
+            table, create, indexes = translate_create_table(statement, self.prefix)
+            self.conn.execute(create)
+            self._pending_indexes[table] = indexes
+            self.tables.setdefault(table, 0)
+            self._loaded_from[table] = self._path
+
+        elif keyword.startswith("DROP TABLE"):
+            match = _DROP_TABLE.match(statement)
+            if not match:
+                raise DumpSyntaxError(f"Unsupported DROP statement: {statement[:80]}")
+            table = _unquote(match.group(2))
+            self._check_replace(table)
+            self.conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(table, self.prefix)}")
+            self._pending_indexes.pop(table, None)
+            self.tables.pop(table, None)
+
+        elif _SKIPPED.match(statement):
+            pass
+
+        else:
+            self.skipped += 1
+
+    def _check_replace(self, table: str) -> None:
+        loaded_from = self._loaded_from.get(table)
+        if loaded_from is None or loaded_from == self._path:
+            return
+        rows = self.tables.get(table, 0)
+        if not self.replace:
+            message = (
+                f"{self._path} drops table {self.prefix}{table}, already loaded from "
+                f"{loaded_from} ({rows:,} rows); pass --replace to let it replace the table, "
+                f"or import the dumps separately"
+            )
+            if self._committed:
+                message += (
+                    f". The import stopped partway: the database keeps the {self._committed:,} "
+                    f"rows of {self._path} committed so far"
+                )
+            raise DumpConflictError(message)
+        print(f"⚠️  Replacing {self.prefix}{table} ({rows:,} rows from {loaded_from})")
+        del self._loaded_from[table]
+
+    def _create_indexes(self) -> None:
+        started = time.perf_counter()
+        count = 0
+        self.conn.execute("BEGIN")
+        for statements in self._pending_indexes.values():
+            for statement in statements:
+                self.conn.execute(statement)
+                count += 1
+        self.conn.execute("COMMIT")
+        self._pending_indexes = {}
+        if count:
+            print(f"🗂️  Created {count} indexes in {time.perf_counter() - started:.2f}s")
+
+    def _report(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not self.progress or (not force and now - self._last_report < PROGRESS_INTERVAL):
+            return
+        self._last_report = now
+        elapsed = max(now - self._started, 1e-9)
+        print(f"   {self.rows:,} rows  {self.rows / elapsed:,.0f} rows/s")
+
+    def summary(self) -> None:
+        """Print per-table row counts and overall throughput."""
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        for table, count in sorted(self.tables.items()):
+            print(f"   {self.prefix}{table}: {count:,} rows")
+        if self.skipped:
+            print(f"⚠️  Skipped {self.skipped} unsupported statements")
+        print(f"✅ Imported {self.rows:,} rows in {elapsed:.2f}s ({self.rows / elapsed:,.0f} rows/s)")
+
+def import_dumps(paths: List[str], database: str = DEFAULT_DATABASE, prefix: str = "",
+                 batch_rows: int = DEFAULT_BATCH_ROWS, encoding: str = "utf-8",
+                 progress: bool = True, replace: bool = False) -> DumpImporter:
+    """Import MySQL dump files into a SQLite database.
+
+    Raises DumpConflictError if a dump drops a table an earlier dump in
+    ``paths`` loaded, unless ``replace`` is set. The dumps before it stay
+    imported; see the module docstring for what is kept of the dump itself.
+    """
+    conn = open_connection(database)
+    conn.isolation_level = None  # transactions are managed explicitly
+    try:
+        if not prefix and conn.execute("PRAGMA user_version").fetchone()[0] > 0:
+            raise SystemExit(
+                f"{database} holds the service schema; pass --table-prefix to import alongside it"
+            )
+
+        # The import can simply be re-run, so trade durability for speed
+        conn.execute("PRAGMA synchronous = OFF")
+
+        importer = DumpImporter(conn, prefix, batch_rows, progress, replace)
+        for path in paths:
+            importer.import_file(path, encoding)
+        conn.execute("ANALYZE")
+        importer.summary()
+        return importer
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Import MySQL dumps into SQLite")
+    parser.add_argument("dumps", nargs="+", help="MySQL dump files (.sql or .sql.gz)")
+    parser.add_argument("--database", default=DEFAULT_DATABASE,
+                        help=f"target SQLite database (default: {DEFAULT_DATABASE})")
+    parser.add_argument("--table-prefix", default="",
+                        help="prefix for imported table names, e.g. legacy_")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS,
+                        help="rows per transaction (default: %(default)s)")
+    parser.add_argument("--encoding", default="utf-8", help="dump file encoding")
+    parser.add_argument("--replace", action="store_true",
+                        help="let later dumps replace tables loaded by earlier ones")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args()
+
+    try:
+        import_dumps(args.dumps, args.database, args.table_prefix, args.batch_rows,
+                     args.encoding, progress=not args.quiet, replace=args.replace)
+    except DumpConflictError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
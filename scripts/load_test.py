@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Load-test the edge service with weighted user journeys.
+
+Virtual users log in and walk realistic journeys:
+
+    applicant  login -> dashboard -> job search -> job page -> apply -> my applications
+    recruiter  login -> dashboard -> my jobs -> applications
+    admin      login -> reports -> job export -> applications
+
+Load is either closed-loop (--concurrency N users looping back to back) or
+open-loop (--rate R journeys/s with Poisson arrivals, independent of how
+fast the server answers). Both accept a comma-separated list of levels to
+step through; the step where throughput stops keeping up, errors appear or
+p99 latency blows past --slo-p99-ms is reported as the saturation point.
+
+Accounts are sampled from a database filled by scripts/generate_dataset.py
+(all sharing --password):
+
+    python scripts/load_test.py --base-url http://localhost:8080 \\
+        --database perf.db --rate 20,40,80 --duration 30 --output load.json
+
+All virtual users log in from one address and reuse a sampled set of
+accounts, so start the edge service with the login rate limits raised
+(e.g. LOGIN_IP_BURST=1000000 LOGIN_USER_BURST=1000000) unless the
+limiter itself is under test.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from shared.database import DATABASE_PATH, open_connection
+
+DEFAULT_BASE_URL = "http://localhost:8080"
+DEFAULT_PASSWORD = "Password123"
+DEFAULT_MIX = "applicant=70,recruiter=20,admin=10"
+PERCENTILES = (50, 95, 99, 99.9)
+SEARCH_TERMS = ("engineer", "developer", "data", "manager", "python", "remote", "sales", "senior")
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with ~1% relative precision.
+
+    Memory is bounded by the number of distinct buckets rather than the
+    number of samples, so long open-loop runs can record every request.
+    """
+
+    GROWTH = 1.01
+    _LOG_GROWTH = math.log(GROWTH)
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = max(seconds * 1e6, 1.0)
+        bucket = int(math.log(micros) / self._LOG_GROWTH)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """Return the latency in seconds at percentile ``p`` (0-100)."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # Upper edge of the bucket, capped at the observed max
+                return min(self.GROWTH ** (bucket + 1) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        result = {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+        for p in PERCENTILES:
+            result[f"p{p:g}_ms"] = round(self.percentile(p) * 1000, 3)
+        return result
+
+class RouteStats:
+    """Latency and outcome counters for one route."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors: Dict[str, int] = {}
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+class Recorder:
+    """Collects per-route statistics for one load step."""
+
+    def __init__(self):
+        self.routes: Dict[str, RouteStats] = {}
+        self.journeys = 0
+        self.journey_errors = 0
+        self.dropped = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    async def request(self, client: httpx.AsyncClient, method: str, route: str, url: str,
+                      expected: Sequence[int] = (200,), **kwargs) -> Optional[httpx.Response]:
+        """Send a request, recording its latency and outcome under ``route``."""
+        stats = self.routes.setdefault(route, RouteStats())
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            stats.latency.record(time.perf_counter() - started)
+            key = type(e).__name__
+            stats.errors[key] = stats.errors.get(key, 0) + 1
+            return None
+
+        stats.latency.record(time.perf_counter() - started)
+        if response.status_code not in expected:
+            key = str(response.status_code)
+            stats.errors[key] = stats.errors.get(key, 0) + 1
+        return response
+
+    def report(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        overall = LatencyHistogram()
+        routes = {}
+        for route, stats in sorted(self.routes.items()):
+            overall.merge(stats.latency)
+            routes[route] = {
+                "throughput_rps": round(stats.latency.count / elapsed, 2),
+                "error_rate": round(stats.error_count / stats.latency.count, 4) if stats.latency.count else 0.0,
+                "errors": stats.errors,
+                **stats.latency.summary(),
+            }
+        errors = sum(s.error_count for s in self.routes.values())
+        return {
+            "duration_s": round(elapsed, 3),
+            "journeys": self.journeys,
+            "journey_errors": self.journey_errors,
+            "journeys_per_s": round(self.journeys / elapsed, 2),
+            "requests": overall.count,
+            "throughput_rps": round(overall.count / elapsed, 2),
+            "error_rate": round(errors / overall.count, 4) if overall.count else 0.0,
+            "latency": overall.summary(),
+            "routes": routes,
+        }
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """Lets per-user clients (each with its own session cookie) share one
+    connection pool; the pool is closed once by the runner."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+class LoadContext:
+    """Accounts, job ids and settings shared by all virtual users."""
+
+    def __init__(self, base_url: str, accounts: Dict[str, List[str]], password: str,
+                 think_time: float, timeout: float, max_connections: int):
+        self.base_url = base_url
+        self.accounts = accounts
+        self.password = password
+        self.think_time = think_time
+        self.timeout = timeout
+        self.transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections)
+        )
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout,
+                                 transport=_SharedTransport(self.transport))
+
+    async def think(self) -> None:
+        if self.think_time > 0:
+            await asyncio.sleep(random.expovariate(1 / self.think_time))
+
+async def _login(ctx: LoadContext, client: httpx.AsyncClient, recorder: Recorder, role: str) -> bool:
+    username = random.choice(ctx.accounts[role])
+    response = await recorder.request(
+        client, "POST", "POST /login", "/login",
+        expected=(302,), data={"username": username, "password": ctx.password}
+    )
+    return response is not None and response.status_code == 302
+
+async def applicant_journey(ctx: LoadContext, client: httpx.AsyncClient, recorder: Recorder) -> bool:
+    if not await _login(ctx, client, recorder, "applicant"):
+        return False
+    await recorder.request(client, "GET", "GET /dashboard", "/dashboard")
+    await ctx.think()
+
+    response = await recorder.request(
+        client, "GET", "GET /api/jobs/search", "/api/jobs/search",
+        params={"q": random.choice(SEARCH_TERMS)}
+    )
+    jobs = response.json().get("jobs", []) if response is not None and response.status_code == 200 else []
+    if not jobs:
+        return response is not None
+    job_id = random.choice(jobs)["id"]
+    await ctx.think()
+
+    await recorder.request(client, "GET", "GET /job/{id}", f"/job/{job_id}")
+    await ctx.think()
+    # 409 means this applicant already applied in an earlier journey
+    await recorder.request(
+        client, "POST", "POST /jobs/{id}/apply", f"/jobs/{job_id}/apply",
+        expected=(200, 409), data={"cover_letter": "Load test application"}
+    )
+    await recorder.request(client, "GET", "GET /applicant/my-applications", "/applicant/my-applications")
+    return True
+
+async def recruiter_journey(ctx: LoadContext, client: httpx.AsyncClient, recorder: Recorder) -> bool:
+    if not await _login(ctx, client, recorder, "recruiter"):
+        return False
+    await recorder.request(client, "GET", "GET /dashboard", "/dashboard")
+    await ctx.think()
+    await recorder.request(client, "GET", "GET /recruiter/my-jobs", "/recruiter/my-jobs")
+    await ctx.think()
+    await recorder.request(client, "GET", "GET /recruiter/applications", "/recruiter/applications")
+    return True
+
+async def admin_journey(ctx: LoadContext, client: httpx.AsyncClient, recorder: Recorder) -> bool:
+    if not await _login(ctx, client, recorder, "admin"):
+        return False
+    await recorder.request(client, "GET", "GET /admin/reports", "/admin/reports")
+    await ctx.think()
+    await recorder.request(client, "GET", "GET /admin/export/jobs", "/admin/export/jobs")
+    await ctx.think()
+    await recorder.request(client, "GET", "GET /admin/applications", "/admin/applications")
+    return True
+
+JOURNEYS: Dict[str, Callable] = {
+    "applicant": applicant_journey,
+    "recruiter": recruiter_journey,
+    "admin": admin_journey,
+}
+
+def parse_mix(mix: str) -> Tuple[List[str], List[float]]:
+    """Parse ``applicant=70,recruiter=20,admin=10`` into names and weights."""
+    names, weights = [], []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in JOURNEYS:
+            raise SystemExit(f"Unknown journey '{name.strip()}'; choose from {', '.join(JOURNEYS)}")
+        names.append(name.strip())
+        weights.append(float(weight or 1))
+    return names, weights
+
+async def _run_journey(ctx: LoadContext, recorder: Recorder, names: List[str], weights: List[float]) -> None:
+    journey = JOURNEYS[random.choices(names, weights)[0]]
+    client = ctx.client()
+    try:
+        ok = await journey(ctx, client, recorder)
+    except Exception:
+        ok = False
+    finally:
+        await client.aclose()
+    recorder.journeys += 1
+    if not ok:
+        recorder.journey_errors += 1
+
+async def run_closed_loop(ctx: LoadContext, concurrency: int, duration: float,
+                          names: List[str], weights: List[float]) -> Recorder:
+    """``concurrency`` users run journeys back to back for ``duration`` seconds."""
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            await _run_journey(ctx, recorder, names, weights)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    recorder.finished = time.perf_counter()
+    return recorder
+
+async def run_open_loop(ctx: LoadContext, rate: float, duration: float, max_in_flight: int,
+                        names: List[str], weights: List[float]) -> Recorder:
+    """Start journeys as a Poisson process at ``rate`` per second.
+
+    Arrivals do not wait for earlier journeys, so a slow server shows up as
+    growing latency instead of silently lowering the offered load. Arrivals
+    beyond ``max_in_flight`` are counted as dropped.
+    """
+    recorder = Recorder()
+    tasks = set()
+    started = time.perf_counter()
+    next_arrival = started
+
+    while next_arrival < started + duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_in_flight:
+            recorder.dropped += 1
+        else:
+            task = asyncio.create_task(_run_journey(ctx, recorder, names, weights))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_arrival += random.expovariate(rate)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    recorder.finished = time.perf_counter()
+    return recorder
+
+def find_saturation(steps: List[dict], slo_p99_ms: float, max_error_rate: float) -> Optional[dict]:
+    """Return the first step that misses its offered load, the p99 SLO or
+    the error budget, along with the reason."""
+    previous = None
+    for step in steps:
+        reasons = []
+        if step["mode"] == "open" and step["journeys_per_s"] < 0.9 * step["level"]:
+            reasons.append("throughput below 90% of offered rate")
+        if step.get("dropped"):
+            reasons.append("arrivals dropped at max in-flight")
+        if step["mode"] == "closed" and previous and step["throughput_rps"] < 1.1 * previous["throughput_rps"]:
+            reasons.append("throughput stopped scaling with concurrency")
+        if step["latency"]["p99_ms"] > slo_p99_ms:
+            reasons.append(f"p99 above {slo_p99_ms:g} ms")
+        if step["error_rate"] > max_error_rate:
+            reasons.append(f"error rate above {max_error_rate:.1%}")
+        if reasons:
+            return {"level": step["level"], "mode": step["mode"], "reasons": reasons}
+        previous = step
+    return None
+
+def load_accounts(database: str, limit: int) -> Dict[str, List[str]]:
+    """Sample usernames per role from the dataset database."""
+    conn = open_connection(database, read_only=True)
+    try:
+        accounts = {}
+        for role, role_id in (("admin", 1), ("applicant", 2), ("recruiter", 3)):
+            accounts[role] = [row[0] for row in conn.execute("""
+                SELECT c.username FROM credential c
+                JOIN person p ON p.id = c.person_id
+                WHERE p.role_id = ? AND c.username LIKE 'perf%'
+                ORDER BY random() LIMIT ?
+            """, (role_id, limit))]
+        return accounts
+    finally:
+        conn.close()
+
+def format_summary(result: dict) -> str:
+    """Render the JSON result as a text table."""
+    lines = []
+    for step in result["steps"]:
+        level = f"{step['level']:g} journeys/s" if step["mode"] == "open" else f"{step['level']:g} users"
+        lines.append(
+            f"\n== {level}: {step['throughput_rps']:.1f} req/s, {step['journeys_per_s']:.1f} journeys/s, "
+            f"errors {step['error_rate']:.2%}, p99 {step['latency']['p99_ms']:.1f} ms"
+            + (f", dropped {step['dropped']}" if step.get("dropped") else "")
+        )
+        lines.append(f"{'route':36} {'req/s':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'p99.9':>8} {'max':>8}")
+        for route, stats in step["routes"].items():
+            lines.append(
+                f"{route:36} {stats['throughput_rps']:8.1f} {stats['error_rate'] * 100:6.2f} "
+                f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f} "
+                f"{stats['p99.9_ms']:8.1f} {stats['max_ms']:8.1f}"
+            )
+            if stats["errors"]:
+                lines.append(f"{'':36} errors: {stats['errors']}")
+
+    saturation = result["saturation"]
+    if saturation:
+        lines.append(f"\n⚠️  Saturation at {saturation['level']:g}: {'; '.join(saturation['reasons'])}")
+    else:
+        lines.append("\n✅ No saturation detected at the tested levels")
+    return "\n".join(lines)
+
+async def run(args) -> dict:
+    names, weights = parse_mix(args.mix)
+    accounts = load_accounts(args.database, args.accounts)
+    missing = [name for name in names if not accounts.get(name)]
+    if missing:
+        raise SystemExit(f"No generated accounts for: {', '.join(missing)} "
+                         f"(fill {args.database} with scripts/generate_dataset.py)")
+
+    mode = "open" if args.rate else "closed"
+    levels = [float(level) for level in (args.rate or args.concurrency).split(",")]
+    ctx = LoadContext(args.base_url, accounts, args.password, args.think_time,
+                      args.timeout, args.max_connections)
+    random.seed(args.seed)
+
+    steps = []
+    try:
+        for level in levels:
+            print(f"🔄 {mode}-loop step at {level:g} for {args.duration:g}s...")
+            if mode == "open":
+                recorder = await run_open_loop(ctx, level, args.duration, args.max_in_flight, names, weights)
+            else:
+                recorder = await run_closed_loop(ctx, int(level), args.duration, names, weights)
+            step = {"mode": mode, "level": level, **recorder.report()}
+            if mode == "open":
+                step["dropped"] = recorder.dropped
+            steps.append(step)
+    finally:
+        await ctx.transport.aclose()
+
+    return {
+        "base_url": args.base_url,
+        "mix": dict(zip(names, weights)),
+        "duration_per_step_s": args.duration,
+        "steps": steps,
+        "saturation": find_saturation(steps, args.slo_p99_ms, args.max_error_rate),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the edge service")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="edge service URL (default: %(default)s)")
+    parser.add_argument("--database", default=DATABASE_PATH,
+                        help="dataset database to sample accounts from (default: %(default)s)")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="password of the generated accounts")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", default="10",
+                      help="closed loop: comma-separated user counts (default: %(default)s)")
+    load.add_argument("--rate", help="open loop: comma-separated journey arrival rates per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per step (default: %(default)s)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="journey weights (default: %(default)s)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between steps in seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="request timeout in seconds")
+    parser.add_argument("--max-connections", type=int, default=200, help="HTTP connection pool size")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="open loop: max concurrent journeys")
+    parser.add_argument("--accounts", type=int, default=1000, help="accounts sampled per role")
+    parser.add_argument("--slo-p99-ms", type=float, default=500.0, help="p99 latency objective")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="error rate budget")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for journey choices")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(format_summary(result))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"📄 JSON report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+In-memory interval index over applicant availability windows.
+
+Availability rows are held as day-number intervals sorted by start date.
+Both "available for the whole window" and "available at some point in the
+window" reduce to ``start <= a AND end >= b``, answered with a binary search
+plus a segment-tree descent instead of scanning the table. Changes reach
+the index through the trigger-maintained ``availability_change`` log: changed
+people go to a small overlay that is folded into a rebuild once it grows.
+"""
+
+import bisect
+import threading
+import time
+import numpy as np
+import structlog
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from shared.database import run_read
+from shared.matching import APPLICANT_ROLE_ID, get_competence_matrix
+
+logger = structlog.get_logger()
+
+# CAST(julianday('YYYY-MM-DD') AS INTEGER) == date.toordinal() + JULIAN_DAY_OFFSET
+JULIAN_DAY_OFFSET = 1721424
+# Rebuild the sorted index once this many people (or 1/16 of it) are pending
+REBUILD_MIN_PENDING = 1024
+# Keeps "WHERE person_id IN (...)" under SQLite's host parameter limit
+REFRESH_CHUNK_SIZE = 500
+# Blocks this small are filtered with one NumPy mask instead of descending
+LEAF_BLOCK_SIZE = 128
+
+MATCH_MODES = ("contains", "overlaps")
+
+_AVAILABILITY_QUERY = """
+    SELECT person_id,
+           CAST(julianday(from_date) AS INTEGER),
+           CAST(julianday(to_date) AS INTEGER)
+    FROM availability
+    WHERE julianday(from_date) IS NOT NULL
+      AND julianday(to_date) >= julianday(from_date) {person_filter}
+"""
+
+def day_number(value: date) -> int:
+    """Convert a date to the day numbers stored in the index."""
+    return value.toordinal() + JULIAN_DAY_OFFSET
+
+class IntervalIndex:
+    """Immutable index of closed day intervals sorted by start.
+
+    A segment tree keeps the max and min end over blocks of the sorted
+    intervals. A query visits only blocks that can hold a match and takes
+    whole blocks at once when every interval in them matches, so it costs
+    O(log n) per reported block rather than O(n).
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, persons: np.ndarray):
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.persons = persons[order]
+        self._starts_list = self.starts.tolist()
+
+        n = len(self.starts)
+        self._leaves = 1 << max(0, (n - 1).bit_length())
+        self._max = np.full(2 * self._leaves, np.iinfo(np.int64).min, dtype=np.int64)
+        self._min = np.full(2 * self._leaves, np.iinfo(np.int64).max, dtype=np.int64)
+        self._max[self._leaves:self._leaves + n] = self.ends
+        self._min[self._leaves:self._leaves + n] = self.ends
+
+        # Build each level from the one below it
+        level = self._leaves
+        while level > 1:
+            parents = np.arange(level // 2, level)
+            self._max[parents] = np.maximum(self._max[2 * parents], self._max[2 * parents + 1])
+            self._min[parents] = np.minimum(self._min[2 * parents], self._min[2 * parents + 1])
+            level //= 2
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def query(self, max_start: int, min_end: int) -> np.ndarray:
+        """Return person ids of intervals with ``start <= max_start`` and ``end >= min_end``."""
+        prefix = bisect.bisect_right(self._starts_list, max_start)
+        if prefix == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        parts: List[np.ndarray] = []
+        stack = [(1, 0, self._leaves)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= prefix or self._max[node] < min_end:
+                continue
+            if hi <= prefix and self._min[node] >= min_end:
+                parts.append(self.persons[lo:hi])
+                continue
+            if hi - lo <= LEAF_BLOCK_SIZE:
+                hi = min(hi, prefix)
+                parts.append(self.persons[lo:hi][self.ends[lo:hi] >= min_end])
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+def _empty_interval_index() -> IntervalIndex:
+    empty = np.zeros(0, dtype=np.int64)
+    return IntervalIndex(empty, empty, empty)
+
+class AvailabilityIndex:
+    """Interval index over the availability table with incremental refresh."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._static = _empty_interval_index()
+        # People changed since the last rebuild: their intervals live here
+        # and their rows in the static index are ignored.
+        self._pending: Dict[int, List[Tuple[int, int]]] = {}
+        self._pending_ids = np.zeros(0, dtype=np.int64)
+        self._seq = -1
+        self._rebuilds = 0
+        self._incremental_refreshes = 0
+        self._last_refresh_ms = 0.0
+
+    def refresh(self, conn) -> int:
+        """Bring the index up to date; returns the number of people reloaded.
+
+        Database reads and rebuilds happen outside ``_lock``, which is only
+        held to swap in the new index or overlay, so searches on the event
+        loop never wait for a refresh.
+        """
+        with self._refresh_lock:
+            started = time.perf_counter()
+            latest = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM availability_change"
+            ).fetchone()[0]
+
+            if latest <= self._seq:
+                return 0
+
+            if self._seq < 0:
+                reloaded = self._rebuild(conn)
+            else:
+                changed = [row[0] for row in conn.execute(
+                    "SELECT person_id FROM availability_change WHERE seq > ?",
+                    (self._seq,)
+                )]
+                # Only refreshes write _pending, and they are serialized
+                pending = dict(self._pending)
+                pending.update(self._read_people(conn, changed))
+                pending_ids = np.array(sorted(pending), dtype=np.int64)
+                with self._lock:
+                    self._pending, self._pending_ids = pending, pending_ids
+                reloaded = len(changed)
+                self._incremental_refreshes += 1
+                if len(pending) >= max(REBUILD_MIN_PENDING, len(self._static) // 16):
+                    self._rebuild(conn)
+
+            # Changes committed after reading ``latest`` carry a higher seq
+            # and are picked up (again) by the next refresh.
+            self._seq = latest
+            self._last_refresh_ms = (time.perf_counter() - started) * 1000
+            logger.debug("Availability index refreshed", people=reloaded,
+                         duration_ms=round(self._last_refresh_ms, 1))
+            return reloaded
+
+    def _rebuild(self, conn) -> int:
+        rows = conn.execute(_AVAILABILITY_QUERY.format(person_filter="")).fetchall()
+        data = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        static = IntervalIndex(data[:, 1], data[:, 2], data[:, 0])
+        with self._lock:
+            self._static = static
+            self._pending = {}
+            self._pending_ids = np.zeros(0, dtype=np.int64)
+        self._rebuilds += 1
+        return len(np.unique(data[:, 0]))
+
+    def _read_people(self, conn, person_ids: Sequence[int]) -> Dict[int, List[Tuple[int, int]]]:
+        """Return the current intervals of ``person_ids`` (empty if they have none)."""
+        intervals: Dict[int, List[Tuple[int, int]]] = {}
+        for start in range(0, len(person_ids), REFRESH_CHUNK_SIZE):
+            chunk = list(person_ids[start:start + REFRESH_CHUNK_SIZE])
+            for person_id in chunk:
+                intervals[person_id] = []
+
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                _AVAILABILITY_QUERY.format(person_filter=f"AND person_id IN ({placeholders})"),
+                chunk
+            ).fetchall()
+            for person_id, start_day, end_day in rows:
+                intervals[person_id].append((start_day, end_day))
+        return intervals
+
+    def find(self, from_day: int, to_day: int, mode: str = "contains") -> np.ndarray:
+        """Return sorted person ids available for the window.
+
+        ``contains`` requires one availability row covering the whole
+        window; ``overlaps`` accepts any row that intersects it.
+        """
+        if mode == "contains":
+            max_start, min_end = from_day, to_day
+        elif mode == "overlaps":
+            max_start, min_end = to_day, from_day
+        else:
+            raise ValueError(f"mode must be one of {MATCH_MODES}")
+
+        with self._lock:
+            people = self._static.query(max_start, min_end)
+            if len(self._pending_ids):
+                people = people[~np.isin(people, self._pending_ids)]
+                overlay = [
+                    person_id
+                    for person_id, intervals in self._pending.items()
+                    if any(s <= max_start and e >= min_end for s, e in intervals)
+                ]
+                people = np.concatenate([people, np.array(overlay, dtype=np.int64)])
+
+        return np.unique(people)
+
+    def stats(self) -> dict:
+        """Return index size and refresh counters."""
+        with self._lock:
+            return {
+                "intervals": len(self._static),
+                "pending_people": len(self._pending),
+                "seq": self._seq,
+                "rebuilds": self._rebuilds,
+                "incremental_refreshes": self._incremental_refreshes,
+                "last_refresh_ms": round(self._last_refresh_ms, 3)
+            }
+
+_index: Optional[AvailabilityIndex] = None
+
+def get_availability_index() -> AvailabilityIndex:
+    """Return the process-wide availability index."""
+    global _index
+    if _index is None:
+        _index = AvailabilityIndex()
+    return _index
+
+def _keep_applicants(conn, people: np.ndarray, status_id: Optional[int]) -> np.ndarray:
+    """Narrow ``people`` to applicants, with an application in ``status_id`` if given.
+
+    Probes only the given people, so the cost follows the candidate count
+    rather than the size of the person or application tables.
+    """
+    kept: List[int] = []
+    for start in range(0, len(people), REFRESH_CHUNK_SIZE):
+        chunk = [int(person_id) for person_id in people[start:start + REFRESH_CHUNK_SIZE]]
+        placeholders = ",".join("?" * len(chunk))
+        if status_id is None:
+            rows = conn.execute(f"""
+                SELECT id FROM person
+                WHERE role_id = ? AND id IN ({placeholders})
+            """, (APPLICANT_ROLE_ID, *chunk))
+        else:
+            rows = conn.execute(f"""
+                SELECT a.person_id
+                FROM application a
+                JOIN person p ON p.id = a.person_id
+                WHERE a.status_id = ? AND p.role_id = ? AND a.person_id IN ({placeholders})
+            """, (status_id, APPLICANT_ROLE_ID, *chunk))
+        kept.extend(row[0] for row in rows)
+    return np.unique(np.array(kept, dtype=np.int64))
+
+async def find_available_people(from_date: date, to_date: date, mode: str = "contains",
+                                status_id: Optional[int] = None,
+                                competence_id: Optional[int] = None,
+                                min_years: float = 0) -> np.ndarray:
+    """Return sorted ids of applicants available for the window, optionally
+    narrowed to people with an application in ``status_id`` and/or
+    ``competence_id``.
+    """
+    index = get_availability_index()
+    await run_read(index.refresh)
+    people = index.find(day_number(from_date), day_number(to_date), mode)
+
+    if competence_id is not None and len(people):
+        matrix = get_competence_matrix()
+        await run_read(matrix.refresh)
+        people = np.intersect1d(people, matrix.people_with(competence_id, min_years))
+
+    if len(people):
+        people = await run_read(_keep_applicants, people, status_id)
+
+    return people
@@ -0,0 +1,182 @@
+"""
+Client-side load balancing over service instances.
+
+Each upstream keeps an InstancePool: the instance URLs last resolved from
+discovery_service, with an outstanding-request count per instance. Calls go
+to the instance with the fewest outstanding requests, either over all
+instances ("least_outstanding") or over two picked at random
+("p2c", power of two choices, which avoids every edge worker herding onto
+the same instance). Instances that fail EJECT_AFTER_FAILURES calls in a row
+are ejected for a while (passive health checking); if every instance is
+ejected, all of them are used again rather than failing outright.
+
+DiscoveryRefresher keeps the pools up to date from /services/{name} in the
+background. If discovery is down or knows no instances, the last known
+list (initially the static URL) stays in use.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import structlog
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+logger = structlog.get_logger()
+
+DISCOVERY_REFRESH_SECONDS = float(os.getenv("DISCOVERY_REFRESH_SECONDS", "10"))
+DISCOVERY_TIMEOUT = float(os.getenv("DISCOVERY_TIMEOUT", "2"))
+
+LB_POLICIES = ("p2c", "least_outstanding")
+
+class Instance:
+    """One instance of a service and its passive health state."""
+
+    __slots__ = ("url", "outstanding", "requests", "failures", "consecutive_failures",
+                 "ejected_until", "ejections")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+class InstancePool:
+    """Instances of one service with load-aware picking and ejection."""
+
+    def __init__(self, service: str, urls: List[str], policy: str = "p2c",
+                 eject_after: int = 3, eject_seconds: float = 10.0):
+        if policy not in LB_POLICIES:
+            raise ValueError(f"Unknown load-balancing policy {policy!r}; expected one of {LB_POLICIES}")
+        self.service = service
+        self.policy = policy
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+        self._instances: List[Instance] = [Instance(url.rstrip("/")) for url in urls]
+
+    def set_urls(self, urls: List[str]):
+        """Replace the instance list, keeping the state of known instances."""
+        with self._lock:
+            known = {instance.url: instance for instance in self._instances}
+            instances = [known.get(url.rstrip("/")) or Instance(url.rstrip("/")) for url in urls]
+            if [i.url for i in instances] != [i.url for i in self._instances]:
+                logger.info("Service instances changed", service=self.service, instances=[i.url for i in instances])
+            self._instances = instances
+
+    def acquire(self) -> Instance:
+        """Pick an instance for one call and count it as outstanding."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [i for i in self._instances if i.ejected_until <= now] or self._instances
+            if self.policy == "p2c" and len(candidates) > 2:
+                candidates = random.sample(candidates, 2)
+            fewest = min(i.outstanding for i in candidates)
+            instance = random.choice([i for i in candidates if i.outstanding == fewest])
+            instance.outstanding += 1
+            instance.requests += 1
+            return instance
+
+    def release(self, instance: Instance, success: Optional[bool]):
+        """Finish a call; ``success`` None means it was abandoned."""
+        with self._lock:
+            instance.outstanding -= 1
+            if success is None:
+                return
+            if success:
+                instance.consecutive_failures = 0
+                return
+            instance.failures += 1
+            instance.consecutive_failures += 1
+            if instance.consecutive_failures >= self.eject_after:
+                instance.ejections += 1
+                # Back off longer for instances that keep failing
+                duration = self.eject_seconds * min(instance.ejections, 10)
+                instance.ejected_until = time.monotonic() + duration
+                instance.consecutive_failures = 0
+                logger.warning("Instance ejected", service=self.service, url=instance.url, seconds=duration)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "instances": [{
+                    "url": i.url,
+                    "outstanding": i.outstanding,
+                    "requests": i.requests,
+                    "failures": i.failures,
+                    "ejected": i.ejected_until > now,
+                    "ejections": i.ejections,
+                } for i in self._instances],
+            }
+
+def discovery_name(service: str) -> str:
+    """Name a service is registered under in discovery (auth -> auth-service)."""
+    return os.getenv(f"DISCOVERY_NAME_{service.upper()}", f"{service.replace('_', '-')}-service")
+
+class DiscoveryRefresher:
+    """Background task that resolves instance lists from discovery_service."""
+
+    def __init__(self, discovery_url: str, pools: Callable[[], Dict[str, InstancePool]],
+                 interval: float = DISCOVERY_REFRESH_SECONDS):
+        self.discovery_url = discovery_url.rstrip("/")
+        self.interval = interval
+        self._pools = pools
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"refreshes": 0, "errors": 0, "last_refresh": None}
+
+    async def _resolve(self, service: str) -> List[str]:
+        response = await self._client.get(f"{self.discovery_url}/services/{discovery_name(service)}")
+        response.raise_for_status()
+        return [
+            f"http://{instance.get('address') or 'localhost'}:{instance['port']}"
+            for instance in response.json().get("instances", [])
+            if instance.get("port") and instance.get("status", "passing") == "passing"
+        ]
+
+    async def refresh(self):
+        """Resolve every pool once; pools keep their list when nothing is found."""
+        for service, pool in self._pools().items():
+            try:
+                urls = await self._resolve(service)
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.debug("Discovery lookup failed", service=service, error=str(e))
+                continue
+            if urls:
+                pool.set_urls(urls)
+        self._stats["refreshes"] += 1
+        self._stats["last_refresh"] = time.time()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh()
+
+    async def start(self):
+        self._client = httpx.AsyncClient(timeout=DISCOVERY_TIMEOUT)
+        await self.refresh()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return dict(self._stats, discovery_url=self.discovery_url, interval=self.interval)
@@ -1,32 +1,556 @@
-
 """
 Database connection and setup for the recruitment system.
 """
 
+import asyncio
+import queue
 import sqlite3
 import os
-from typing import Generator
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Generator, List, NamedTuple, Optional, Sequence
 from contextlib import contextmanager
 
-DATABASE_PATH = "recruitment_system.db"
+from shared.migrations import apply_migrations
+
+DATABASE_PATH = os.getenv("DATABASE_PATH", "recruitment_system.db")
+
+# Connection pool configuration
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+HEALTH_CHECK_INTERVAL = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Group-commit writer configuration
+WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "256"))
+WRITE_BATCH_WINDOW = float(os.getenv("DB_WRITE_BATCH_WINDOW_MS", "0")) / 1000
+
+# Applied once when a connection is opened, never per request.
+CONNECTION_PRAGMAS = (
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA cache_size = -65536",      # 64 MiB page cache per connection
+    "PRAGMA mmap_size = 268435456",    # 256 MiB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+)
+
+# WAL lets the read-only pool keep reading while the writer commits.
+WRITER_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+)
+
+READER_PRAGMAS = (
+    "PRAGMA query_only = ON",
+)
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time."""
+
+def open_connection(database: str = DATABASE_PATH, read_only: bool = False) -> sqlite3.Connection:
+    """Open a SQLite connection with the standard pragmas applied.
+
+    Read-only connections use a ``mode=ro`` URI plus ``query_only``, so a
+    stray write on a read path fails instead of taking the write lock.
+    """
+    if read_only:
+        target = f"{Path(database).absolute().as_uri()}?mode=ro"
+    else:
+        target = database
+    conn = sqlite3.connect(
+        target,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        uri=read_only,
+    )
+    for pragma in CONNECTION_PRAGMAS + (READER_PRAGMAS if read_only else WRITER_PRAGMAS):
+        conn.execute(pragma)
+    return conn
+
+def _current_owner():
+    """Return the checkout owner: the running asyncio task, else the thread."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task if task is not None else threading.get_ident()
+
+class ConnectionPool:
+    """Bounded pool of pre-configured SQLite connections.
+
+    Connections are created lazily up to ``max_size`` and checked out per
+    thread or asyncio task: nested checkouts by the same owner share one
+    connection. Idle connections are health-checked before reuse.
+    """
+
+    def __init__(self, database: str = DATABASE_PATH, max_size: int = POOL_SIZE,
+                 timeout: float = POOL_TIMEOUT,
+                 health_check_interval: float = HEALTH_CHECK_INTERVAL,
+                 read_only: bool = False):
+        self.database = database
+        self.read_only = read_only
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()          # (connection, last_used)
+        self._owners = {}             # owner -> [connection, depth]
+        self._conn_owner = {}         # id(connection) -> owner
+        self._size = 0
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "discarded": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        return open_connection(self.database, read_only=self.read_only)
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection for the current thread or task."""
+        owner = _current_owner()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+
+            held = self._owners.get(owner)
+            if held is not None:
+                held[1] += 1
+                return held[0]
+
+            start = time.monotonic()
+            deadline = start + self.timeout
+            waited = False
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout}s"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            wait_time = time.monotonic() - start
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_time_total"] += wait_time
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+
+        try:
+            if conn is None:
+                conn = self._connect()
+                with self._cond:
+                    self._stats["created"] += 1
+            elif time.monotonic() - last_used > self.health_check_interval \
+                    and not self._is_healthy(conn):
+                self._discard(conn)
+                conn = self._connect()
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                    self._stats["discarded"] += 1
+                    self._stats["created"] += 1
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._owners[owner] = [conn, 1]
+            self._conn_owner[id(conn)] = owner
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection; it goes back to the pool when its depth hits zero."""
+        with self._cond:
+            owner = self._conn_owner.get(id(conn))
+            if owner is None:
+                return
+            held = self._owners[owner]
+            held[1] -= 1
+            if held[1] > 0:
+                return
+            del self._owners[owner]
+            del self._conn_owner[id(conn)]
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            if healthy and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+                self._size -= 1
+                self._stats["discarded"] += 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict:
+        """Return a snapshot of pool metrics."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "read_only": self.read_only,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": len(self._owners),
+                "idle": len(self._idle),
+            })
+        checkouts = stats["checkouts"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts if checkouts else 0.0
+        return stats
+
+    def close(self):
+        """Close idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+                self._size -= 1
+            self._cond.notify_all()
+
+class PooledConnection:
+    """Connection proxy whose close() hands the connection back to the pool."""
+
+    def __init__(self, pool: ConnectionPool, conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def __del__(self):
+        # Safety net for handlers that bail out before calling close().
+        try:
+            self.close()
+        except Exception:
+            pass
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide read-only connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(read_only=True)
+    return _pool
+
+def get_pool_stats() -> dict:
+    """Return connection pool metrics."""
+    return get_pool().stats()
 
 def get_db_connection():
-    """Get database connection."""
-    return sqlite3.connect(DATABASE_PATH)
+    """Get a pooled read-only connection; close() returns it to the pool."""
+    pool = get_pool()
+    return PooledConnection(pool, pool.acquire())
 
 @contextmanager
 def get_db() -> Generator[sqlite3.Connection, None, None]:
-    """Database context manager."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    try:
+    """Read-only database context manager."""
+    with get_pool().connection() as conn:
+        conn.row_factory = sqlite3.Row
         yield conn
-    finally:
-        conn.close()
 
-def create_tables():
-    """Create all necessary tables."""
-    conn = get_db_connection()
+# Async data access: reads run on a dedicated executor against the read-only
+# pool and writes go to the single writer, so the event loop keeps serving
+# other requests while SQLite works and readers never queue behind writers.
+class WriteResult(NamedTuple):
+    lastrowid: Optional[int]
+    rowcount: int
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the database executor, sized to match the connection pool."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_pool().max_size,
+                    thread_name_prefix="db",
+                )
+    return _executor
+
+def _call_with_connection(func: Callable, args: tuple):
+    with get_pool().connection() as conn:
+        return func(conn, *args)
+
+async def run_read(func: Callable, *args: Any) -> Any:
+    """Run ``func(conn, *args)`` with a read-only connection on the executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), _call_with_connection, func, args)
+
+async def run_transaction(func: Callable, *args: Any) -> Any:
+    """Run ``func(conn, *args)`` on the single writer and wait for its commit.
+
+    ``func`` must not commit or roll back itself; it runs inside a savepoint
+    of a group-commit transaction shared with other queued writes.
+    """
+    return await asyncio.wrap_future(get_write_queue().submit(func, *args))
+
+async def fetch_one(query: str, params: Sequence = ()) -> Optional[tuple]:
+    """Run a query and return its first row."""
+    return await run_read(lambda conn: conn.execute(query, params).fetchone())
+
+async def fetch_all(query: str, params: Sequence = ()) -> List[tuple]:
+    """Run a query and return all rows."""
+    return await run_read(lambda conn: conn.execute(query, params).fetchall())
+
+async def fetch_value(query: str, params: Sequence = ()) -> Any:
+    """Run a query and return the first column of its first row."""
+    row = await fetch_one(query, params)
+    return row[0] if row else None
+
+async def execute(query: str, params: Sequence = ()) -> WriteResult:
+    """Run a single write statement in its own transaction."""
+    def _execute(conn):
+        cursor = conn.execute(query, params)
+        return WriteResult(cursor.lastrowid, cursor.rowcount)
+    return await run_transaction(_execute)
+
+def shutdown_executor():
+    """Stop the database executor, waiting for queued queries."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+# Single-writer group commit: every mutation is queued to one writer thread
+# that batches whatever is pending into a single transaction, so concurrent
+# submissions share one fsync instead of contending for the write lock.
+_STOP = object()
+
+class WriteQueue:
+    """Single writer thread that group-commits queued mutations.
+
+    Each submitted job runs inside its own savepoint, so a failing job is
+    rolled back alone and reports its error while the rest of the batch
+    still commits.
+    """
+
+    def __init__(self, database: str = DATABASE_PATH,
+                 max_batch_size: int = WRITE_BATCH_SIZE,
+                 batch_window: float = WRITE_BATCH_WINDOW):
+        self.database = database
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+
+        self._queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "committed": 0,
+            "failed": 0,
+            "batches": 0,
+            "batch_size_max": 0,
+            "batch_size_last": 0,
+            "commit_time_total": 0.0,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="db-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, func: Callable, *args: Any) -> Future:
+        """Queue ``func(conn, *args)``; the future resolves after commit."""
+        self.start()
+        future = Future()
+        with self._stats_lock:
+            self._stats["submitted"] += 1
+        self._queue.put((func, args, future))
+        return future
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch_size and batch[-1] is not _STOP:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = open_connection(self.database)
+        conn.isolation_level = None  # transactions are managed explicitly
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                jobs = [job for job in batch if job is not _STOP]
+                if jobs:
+                    self._commit_batch(conn, jobs)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, jobs: list):
+        outcomes = []
+        start = time.monotonic()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for func, args, future in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    result = func(conn, *args)
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # Nothing was committed; every job in the batch reports the error
+            outcomes = [(future, None, e) for _, _, future in jobs if not future.cancelled()]
+
+        elapsed = time.monotonic() - start
+        failed = sum(1 for _, _, error in outcomes if error is not None)
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["committed"] += len(outcomes) - failed
+            self._stats["failed"] += failed
+            self._stats["batch_size_last"] = len(jobs)
+            self._stats["batch_size_max"] = max(self._stats["batch_size_max"], len(jobs))
+            self._stats["commit_time_total"] += elapsed
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        """Return queue-depth and batch-size metrics."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats["batches"]
+        done = stats["committed"] + stats["failed"]
+        stats["queue_depth"] = self._queue.qsize()
+        stats["batch_size_avg"] = done / batches if batches else 0.0
+        stats["commit_time_avg"] = stats["commit_time_total"] / batches if batches else 0.0
+        return stats
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush pending writes and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+_write_queue: Optional[WriteQueue] = None
+_write_queue_lock = threading.Lock()
+
+def get_write_queue() -> WriteQueue:
+    """Return the process-wide write queue, creating it on first use."""
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue()
+    return _write_queue
+
+def get_write_queue_stats() -> dict:
+    """Return group-commit writer metrics."""
+    return get_write_queue().stats()
+
+def close_database():
+    """Flush queued writes, then stop the executor and close the pool."""
+    global _pool, _write_queue
+    with _write_queue_lock:
+        if _write_queue is not None:
+            _write_queue.close()
+            _write_queue = None
+    shutdown_executor()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def create_tables(database: Optional[str] = None):
+    """Create all necessary tables and apply pending migrations."""
+    conn = open_connection(database or DATABASE_PATH)
     cursor = conn.cursor()
     
     # Create tables
@@ -164,4 +688,5 @@ def create_tables():
         """)
     
     conn.commit()
-    conn.close()
+    apply_migrations(conn)
+    conn.close()
\ No newline at end of file
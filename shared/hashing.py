@@ -0,0 +1,222 @@
+"""
+Password hashing off the event loop.
+
+bcrypt deliberately burns 100+ ms of CPU per call, which stalls every other
+request on an async worker. The async variants here run it on a process
+pool (bcrypt holds the GIL for most of its work, so threads would not use
+more than one core) and bound the number of queued calls: once
+BCRYPT_MAX_PENDING calls are waiting, new ones fail fast with
+HashingOverloaded so callers can answer 503 instead of piling up.
+
+After a successful login, hashes below the configured work factor
+(BCRYPT_ROUNDS) are rehashed in the background with the plaintext the user
+just proved they know.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import structlog
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from shared.database import execute, fetch_all
+from shared import security
+from shared.security import get_password_hash, needs_rehash, verify_password
+
+logger = structlog.get_logger()
+
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(os.cpu_count() or 1)))
+# Calls allowed in flight (running or queued) before new ones are rejected
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", str(BCRYPT_WORKERS * 16)))
+
+class HashingOverloaded(Exception):
+    """Raised when the hashing queue is full."""
+
+def _timed(func: Callable, args: tuple) -> Tuple[Any, float, float]:
+    # time.monotonic is system-wide on Linux, so the parent can compare it
+    started = time.monotonic()
+    result = func(*args)
+    return result, started, time.monotonic()
+
+class HashingPool:
+    """Process pool for bcrypt with a bounded backlog and timing metrics."""
+
+    def __init__(self, workers: int = BCRYPT_WORKERS, max_pending: int = BCRYPT_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "hash_time_total": 0.0,
+            "hash_time_max": 0.0,
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def start(self):
+        """Start the workers now rather than on the first login.
+
+        Called from service startup so the workers are forked before the
+        database threads exist.
+        """
+        with self._lock:
+            executor = self._get_executor()
+        await asyncio.wrap_future(executor.submit(int))
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run ``func(*args)`` in a worker process and return its result."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise HashingOverloaded(f"{self._pending} password hashes already queued")
+            self._pending += 1
+            executor = self._get_executor()
+
+        submitted = time.monotonic()
+        try:
+            future = executor.submit(_timed, func, args)
+            result, started, finished = await asyncio.wrap_future(future)
+        except Exception as e:
+            with self._lock:
+                self._stats["failed"] += 1
+                # A crashed worker breaks the whole pool; start a fresh one next time
+                if isinstance(e, BrokenProcessPool) and self._executor is executor:
+                    self._executor = None
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        with self._lock:
+            wait = max(0.0, started - submitted)
+            duration = finished - started
+            self._stats["completed"] += 1
+            self._stats["queue_wait_total"] += wait
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], wait)
+            self._stats["hash_time_total"] += duration
+            self._stats["hash_time_max"] = max(self._stats["hash_time_max"], duration)
+        return result
+
+    def stats(self) -> dict:
+        """Return queue and timing metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+            })
+        completed = stats["completed"]
+        stats["queue_wait_avg"] = stats["queue_wait_total"] / completed if completed else 0.0
+        stats["hash_time_avg"] = stats["hash_time_total"] / completed if completed else 0.0
+        return stats
+
+    def close(self):
+        """Stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+_pool: Optional[HashingPool] = None
+_pool_lock = threading.Lock()
+
+def get_hashing_pool() -> HashingPool:
+    """Return the process-wide hashing pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool()
+    return _pool
+
+def get_hashing_stats() -> dict:
+    """Return hashing pool metrics."""
+    return get_hashing_pool().stats()
+
+async def start_hashing_pool():
+    """Start the hashing workers."""
+    await get_hashing_pool().start()
+
+def close_hashing_pool():
+    """Stop the hashing workers."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool."""
+    # Pass the cost along so workers follow this process's setting
+    return await get_hashing_pool().run(get_password_hash, password, security.BCRYPT_ROUNDS)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool."""
+    return await get_hashing_pool().run(verify_password, plain_password, hashed_password)
+
+_rehash_tasks = set()
+_rehash_stats = {"scheduled": 0, "rehashed": 0, "deferred": 0, "failed": 0}
+
+async def _rehash(credential_id: int, password: str, current_hash: str):
+    try:
+        new_hash = await get_password_hash_async(password)
+        # Only replace the hash we verified, never a password changed meanwhile
+        result = await execute(
+            "UPDATE credential SET password = ? WHERE id = ? AND password = ?",
+            (new_hash, credential_id, current_hash)
+        )
+        if result.rowcount:
+            _rehash_stats["rehashed"] += 1
+            logger.info("Password rehashed", credential_id=credential_id, rounds=security.BCRYPT_ROUNDS)
+    except HashingOverloaded:
+        # Retried on the user's next login
+        _rehash_stats["deferred"] += 1
+    except Exception as e:
+        _rehash_stats["failed"] += 1
+        logger.error("Password rehash failed", credential_id=credential_id, error=str(e))
+
+def schedule_rehash(credential_id: int, password: str, current_hash: str) -> bool:
+    """Rehash ``password`` in the background if ``current_hash`` is below
+    the configured work factor. Call only after the password verified."""
+    if not needs_rehash(current_hash):
+        return False
+    _rehash_stats["scheduled"] += 1
+    task = asyncio.get_running_loop().create_task(_rehash(credential_id, password, current_hash))
+    _rehash_tasks.add(task)
+    task.add_done_callback(_rehash_tasks.discard)
+    return True
+
+def get_rehash_stats() -> dict:
+    """Return background rehash counters."""
+    return dict(_rehash_stats, in_progress=len(_rehash_tasks))
+
+async def get_credential_cost_report() -> dict:
+    """Count stored credentials per bcrypt work factor."""
+    rows = await fetch_all("""
+        SELECT CAST(substr(password, 5, 2) AS INTEGER) AS cost, COUNT(*)
+        FROM credential
+        WHERE password LIKE '$2_$__$%'
+        GROUP BY cost
+        ORDER BY cost
+    """)
+    costs = {cost: count for cost, count in rows}
+    target = security.BCRYPT_ROUNDS
+    return {
+        "target_cost": target,
+        "costs": costs,
+        "below_target": sum(count for cost, count in costs.items() if cost < target),
+        "rehash": get_rehash_stats()
+    }
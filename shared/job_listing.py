@@ -0,0 +1,121 @@
+"""
+Versioned cache of the active job listing.
+
+/api/jobs and the /jobs page show every active job, which is the same
+join for every visitor. The listing is built once per version of
+``stat_counter.job_listing_version`` (bumped by triggers on job_posting
+and job_category, in the same transaction as the write) and kept as rows
+plus pre-serialized JSON with a strong ETag. Each request only reads the
+version, a primary-key lookup, so a write in any process or service is
+visible on the next request and the cache is never stale.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import List, Optional
+
+from shared.database import run_read
+
+VERSION_QUERY = "SELECT value FROM stat_counter WHERE name = 'job_listing_version'"
+
+LISTING_QUERY = """
+    SELECT j.id, j.title, j.description, j.location, j.salary_min, j.salary_max,
+           j.employment_type, j.experience_level, c.name as category
+    FROM job_posting j
+    LEFT JOIN job_category c ON j.category_id = c.id
+    WHERE j.status = 'active'
+    ORDER BY j.created_at DESC
+"""
+
+LISTING_FIELDS = ("id", "title", "description", "location", "salary_min", "salary_max",
+                  "employment_type", "experience_level", "category")
+
+class JobListing:
+    """One built version of the listing."""
+
+    __slots__ = ("version", "rows", "body", "etag")
+
+    def __init__(self, version: int, rows: List[tuple]):
+        self.version = version
+        self.rows = rows
+        # Same encoding as JSONResponse
+        self.body = json.dumps(
+            {"jobs": [dict(zip(LISTING_FIELDS, row)) for row in rows]},
+            ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+        ).encode("utf-8")
+        self.etag = f'"jobs-{version}-{hashlib.sha256(self.body).hexdigest()[:16]}"'
+
+def _load_version(conn) -> Optional[int]:
+    row = conn.execute(VERSION_QUERY).fetchone()
+    return row[0] if row else None
+
+def _load_listing(conn):
+    # Version first: rows read after it are at least that new, so a write
+    # landing in between only causes one extra rebuild, never a stale entry.
+    return _load_version(conn), conn.execute(LISTING_QUERY).fetchall()
+
+class JobListingCache:
+    """Holds the latest listing; rebuilds once when the version moves."""
+
+    def __init__(self):
+        self._listing: Optional[JobListing] = None
+        self._build_lock = asyncio.Lock()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "builds": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    async def get(self) -> JobListing:
+        version = await run_read(_load_version)
+        listing = self._listing
+        if listing is not None and version is not None and listing.version == version:
+            self._count("hits")
+            return listing
+
+        # One rebuild per version, however many requests are waiting on it
+        async with self._build_lock:
+            listing = self._listing
+            if listing is not None and version is not None and listing.version == version:
+                self._count("hits")
+                return listing
+            version, rows = await run_read(_load_listing)
+            listing = JobListing(version if version is not None else -1, rows)
+            if version is not None:
+                self._listing = listing
+            self._count("builds")
+            return listing
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        listing = self._listing
+        stats.update({
+            "version": listing.version if listing else None,
+            "jobs": len(listing.rows) if listing else 0,
+            "bytes": len(listing.body) if listing else 0,
+        })
+        return stats
+
+_cache = JobListingCache()
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag``."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+async def get_job_listing() -> JobListing:
+    """Return the active job listing, rebuilt only if it changed."""
+    return await _cache.get()
+
+def get_job_listing_stats() -> dict:
+    """Return listing cache metrics."""
+    return _cache.stats()
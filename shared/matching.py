@@ -0,0 +1,294 @@
+"""
+Candidate-to-job matching over competence profiles.
+
+Applicants' competence profiles are held in memory as a dense NumPy matrix
+(candidates x competences, years of experience). Scoring a job's
+requirements is a single vectorized pass over the matrix, and the matrix is
+kept current by reloading only the people listed in the trigger-maintained
+``competence_profile_change`` log since the last refresh.
+"""
+
+import threading
+import time
+import numpy as np
+import structlog
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from shared.database import run_read
+
+logger = structlog.get_logger()
+
+APPLICANT_ROLE_ID = 2
+# Keeps "WHERE person_id IN (...)" under SQLite's host parameter limit
+REFRESH_CHUNK_SIZE = 500
+
+Requirement = Tuple[int, float]  # (competence_id, min_years)
+
+_PROFILE_QUERY = """
+    SELECT cp.person_id, cp.competence_id, MAX(cp.years_of_experience)
+    FROM competence_profile cp
+    JOIN person p ON p.id = cp.person_id
+    WHERE p.role_id = ? {person_filter}
+    GROUP BY cp.person_id, cp.competence_id
+"""
+
+class CompetenceMatrix:
+    """In-memory candidates x competences matrix with incremental refresh.
+
+    The matrix is stored column-major so each requirement reads one
+    contiguous column of years across all candidates.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._years = np.zeros((0, 0), dtype=np.float32, order="F")
+        self._person_ids = np.zeros(0, dtype=np.int64)
+        self._active = np.zeros(0, dtype=bool)
+        self._row_of: Dict[int, int] = {}
+        self._col_of: Dict[int, int] = {}
+        self._size = 0
+        self._seq = -1
+        self._full_loads = 0
+        self._incremental_refreshes = 0
+        self._refreshed_people = 0
+        self._last_refresh_ms = 0.0
+
+    def refresh(self, conn) -> int:
+        """Bring the matrix up to date; returns the number of people reloaded.
+
+        Database reads and full rebuilds happen outside ``_lock``, which is
+        only held to swap in or patch the arrays, so scoring on the event
+        loop never waits for a reload.
+        """
+        with self._refresh_lock:
+            started = time.perf_counter()
+            latest = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM competence_profile_change"
+            ).fetchone()[0]
+
+            if self._seq < 0:
+                loaded = self._build_all(conn)
+                with self._lock:
+                    (self._years, self._person_ids, self._active,
+                     self._row_of, self._col_of, self._size) = loaded
+                reloaded = self._size
+                self._full_loads += 1
+            elif latest > self._seq:
+                changed = [row[0] for row in conn.execute(
+                    "SELECT person_id FROM competence_profile_change WHERE seq > ?",
+                    (self._seq,)
+                )]
+                profiles = self._read_people(conn, changed)
+                with self._lock:
+                    self._apply_people(changed, profiles)
+                reloaded = len(changed)
+                self._incremental_refreshes += 1
+                self._refreshed_people += reloaded
+            else:
+                return 0
+
+            # Changes committed after reading ``latest`` carry a higher seq
+            # and are picked up (again) by the next refresh.
+            self._seq = latest
+            self._last_refresh_ms = (time.perf_counter() - started) * 1000
+            logger.debug("Competence matrix refreshed", people=reloaded,
+                         duration_ms=round(self._last_refresh_ms, 1))
+            return reloaded
+
+    def _build_all(self, conn) -> tuple:
+        rows = conn.execute(
+            _PROFILE_QUERY.format(person_filter=""), (APPLICANT_ROLE_ID,)
+        ).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+        person_ids, rows_idx = np.unique(data[:, 0].astype(np.int64), return_inverse=True)
+        competence_ids, cols_idx = np.unique(data[:, 1].astype(np.int64), return_inverse=True)
+
+        years = np.zeros((len(person_ids), len(competence_ids)), dtype=np.float32, order="F")
+        years[rows_idx, cols_idx] = np.nan_to_num(data[:, 2])
+
+        return (
+            years,
+            person_ids,
+            np.ones(len(person_ids), dtype=bool),
+            {int(pid): i for i, pid in enumerate(person_ids)},
+            {int(cid): j for j, cid in enumerate(competence_ids)},
+            len(person_ids),
+        )
+
+    def _read_people(self, conn, person_ids: Sequence[int]) -> List[tuple]:
+        profiles = []
+        for start in range(0, len(person_ids), REFRESH_CHUNK_SIZE):
+            chunk = list(person_ids[start:start + REFRESH_CHUNK_SIZE])
+            placeholders = ",".join("?" * len(chunk))
+            profiles.extend(conn.execute(
+                _PROFILE_QUERY.format(person_filter=f"AND cp.person_id IN ({placeholders})"),
+                (APPLICANT_ROLE_ID, *chunk)
+            ).fetchall())
+        return profiles
+
+    def _apply_people(self, person_ids: Sequence[int], profiles: List[tuple]):
+        # Clear existing rows first so removed competences and people
+        # who are no longer applicants drop out of the results.
+        for person_id in person_ids:
+            row = self._row_of.get(person_id)
+            if row is not None:
+                self._years[row] = 0
+                self._active[row] = False
+
+        for person_id, competence_id, years in profiles:
+            row = self._ensure_row(person_id)
+            col = self._ensure_col(competence_id)
+            self._years[row, col] = years or 0
+            self._active[row] = True
+
+    def _ensure_row(self, person_id: int) -> int:
+        row = self._row_of.get(person_id)
+        if row is not None:
+            return row
+
+        if self._size == len(self._person_ids):
+            # Grow geometrically so a stream of new applicants stays amortized O(1)
+            capacity = max(16, 2 * len(self._person_ids))
+            years = np.zeros((capacity, self._years.shape[1]), dtype=np.float32, order="F")
+            years[:self._size] = self._years[:self._size]
+            self._years = years
+            self._person_ids = np.resize(self._person_ids, capacity)
+            active = np.zeros(capacity, dtype=bool)
+            active[:self._size] = self._active[:self._size]
+            self._active = active
+
+        row = self._size
+        self._person_ids[row] = person_id
+        self._row_of[person_id] = row
+        self._size += 1
+        return row
+
+    def _ensure_col(self, competence_id: int) -> int:
+        col = self._col_of.get(competence_id)
+        if col is None:
+            col = self._years.shape[1]
+            years = np.zeros((self._years.shape[0], col + 1), dtype=np.float32, order="F")
+            years[:, :col] = self._years
+            self._years = years
+            self._col_of[competence_id] = col
+        return col
+
+    def score(self, requirements: Iterable[Requirement]) -> Tuple[np.ndarray, np.ndarray]:
+        """Score every candidate against ``requirements``.
+
+        Each requirement contributes ``min(years / min_years, 1)`` (or 1 for
+        any experience when ``min_years`` is 0), averaged over requirements,
+        so a score of 1.0 means every requirement is fully met. Returns the
+        candidates' person ids and their scores.
+        """
+        requirements = list(requirements)
+        with self._lock:
+            n = self._size
+            person_ids = self._person_ids[:n].copy()
+            scores = np.zeros(n, dtype=np.float32)
+            if not requirements or n == 0:
+                return person_ids, scores
+
+            fit = np.empty(n, dtype=np.float32)
+            for competence_id, min_years in requirements:
+                col = self._col_of.get(competence_id)
+                if col is None:
+                    continue  # nobody has this competence yet
+                years = self._years[:n, col]
+                if min_years > 0:
+                    np.minimum(years, np.float32(min_years), out=fit)
+                    fit *= np.float32(1.0 / min_years)
+                else:
+                    np.greater(years, 0, out=fit)
+                scores += fit
+
+            scores *= np.float32(1.0 / len(requirements))
+            scores[~self._active[:n]] = -1.0
+        return person_ids, scores
+
+    def top_k(self, requirements: Iterable[Requirement], k: int) -> List[Tuple[int, float]]:
+        """Return the ``k`` best ``(person_id, score)`` pairs, best first."""
+        person_ids, scores = self.score(requirements)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+
+        # O(n) selection of the k best, then sort only those k
+        candidates = np.argpartition(scores, -k)[-k:]
+        candidates = candidates[scores[candidates] > 0]
+
+        # Highest score first, ties ordered by person id
+        order = np.lexsort((person_ids[candidates], -scores[candidates]))
+        return [
+            (int(person_ids[i]), float(scores[i]))
+            for i in candidates[order]
+        ]
+
+    def people_with(self, competence_id: int, min_years: float = 0) -> np.ndarray:
+        """Return sorted person ids of candidates with at least ``min_years``."""
+        with self._lock:
+            col = self._col_of.get(competence_id)
+            if col is None:
+                return np.zeros(0, dtype=np.int64)
+            n = self._size
+            years = self._years[:n, col]
+            mask = (years >= min_years) if min_years > 0 else (years > 0)
+            mask &= self._active[:n]
+            return np.sort(self._person_ids[:n][mask])
+
+    def stats(self) -> dict:
+        """Return matrix size and refresh counters."""
+        with self._lock:
+            return {
+                "candidates": int(self._active[:self._size].sum()),
+                "rows": self._size,
+                "competences": len(self._col_of),
+                "seq": self._seq,
+                "full_loads": self._full_loads,
+                "incremental_refreshes": self._incremental_refreshes,
+                "refreshed_people": self._refreshed_people,
+                "last_refresh_ms": round(self._last_refresh_ms, 3),
+                "memory_bytes": int(self._years.nbytes)
+            }
+
+_matrix: Optional[CompetenceMatrix] = None
+
+def get_competence_matrix() -> CompetenceMatrix:
+    """Return the process-wide competence matrix."""
+    global _matrix
+    if _matrix is None:
+        _matrix = CompetenceMatrix()
+    return _matrix
+
+def _job_requirements(conn, job_posting_id: int) -> List[Requirement]:
+    rows = conn.execute(
+        "SELECT competence_id, min_years FROM job_competence WHERE job_posting_id = ?",
+        (job_posting_id,)
+    ).fetchall()
+    if rows:
+        return [(cid, float(years or 0)) for cid, years in rows]
+
+    # No explicit requirements: fall back to competences named in the posting
+    job = conn.execute(
+        "SELECT title, requirements FROM job_posting WHERE id = ?", (job_posting_id,)
+    ).fetchone()
+    if not job:
+        return []
+    text = f"{job[0]} {job[1] or ''}".lower()
+    return [
+        (cid, 0.0)
+        for cid, name in conn.execute("SELECT id, name FROM competence")
+        if name and name.lower() in text
+    ]
+
+async def get_job_requirements(job_posting_id: int) -> List[Requirement]:
+    """Return ``(competence_id, min_years)`` requirements for a job posting."""
+    return await run_read(_job_requirements, job_posting_id)
+
+async def rank_candidates(requirements: Iterable[Requirement], k: int = 20) -> List[Tuple[int, float]]:
+    """Refresh the matrix from the change log and return the top ``k`` candidates."""
+    matrix = get_competence_matrix()
+    await run_read(matrix.refresh)
+    return matrix.top_k(requirements, k)
@@ -0,0 +1,490 @@
+"""
+Versioned schema migrations for the recruitment system.
+
+The applied version is tracked in SQLite's ``PRAGMA user_version``. Each
+migration runs in its own ``BEGIN IMMEDIATE`` transaction together with the
+version bump, so concurrent service startups apply it exactly once.
+"""
+
+import sqlite3
+import structlog
+
+logger = structlog.get_logger()
+
+# Recompute the trigger-maintained counters from the base tables; keys
+# with nothing left to count must not keep a stale row
+COUNTER_BACKFILL = (
+    """DELETE FROM role_counter""",
+    """DELETE FROM job_counter""",
+    """DELETE FROM recruiter_counter""",
+    """INSERT OR REPLACE INTO stat_counter (name, value)
+       SELECT 'active_jobs', COUNT(*) FROM job_posting WHERE status = 'active'""",
+    """INSERT OR REPLACE INTO stat_counter (name, value)
+       SELECT 'total_applications', COUNT(*) FROM application""",
+    """INSERT OR REPLACE INTO role_counter (role_id, persons)
+       SELECT role_id, COUNT(*) FROM person GROUP BY role_id""",
+    """INSERT OR REPLACE INTO job_counter (job_posting_id, applications)
+       SELECT job_posting_id, COUNT(*) FROM application GROUP BY job_posting_id""",
+    """INSERT OR REPLACE INTO recruiter_counter (person_id, job_postings, applications_received)
+       SELECT jp.posted_by, COUNT(*), COALESCE(SUM(jc.applications), 0)
+       FROM job_posting jp
+       LEFT JOIN job_counter jc ON jc.job_posting_id = jp.id
+       GROUP BY jp.posted_by""",
+)
+
+# (version, description, statements) in ascending version order.
+MIGRATIONS = [
+    (1, "Indexes for hot edge-service queries", (
+        # Active job listings, counts and recommendations:
+        # WHERE status = 'active' ORDER BY created_at DESC
+        """CREATE INDEX IF NOT EXISTS idx_job_posting_active_created
+           ON job_posting(created_at) WHERE status = 'active'""",
+        # Recruiter pages: WHERE posted_by = ? ORDER BY created_at DESC
+        """CREATE INDEX IF NOT EXISTS idx_job_posting_posted_by_created
+           ON job_posting(posted_by, created_at)""",
+        # Admin job lists, exports and job trends
+        """CREATE INDEX IF NOT EXISTS idx_job_posting_created
+           ON job_posting(created_at)""",
+        # Duplicate-application checks and per-applicant lookups
+        """CREATE INDEX IF NOT EXISTS idx_application_person_job
+           ON application(person_id, job_posting_id)""",
+        # Per-job application counts and joins from job_posting
+        """CREATE INDEX IF NOT EXISTS idx_application_job_posting
+           ON application(job_posting_id)""",
+        # Recent activity, admin lists, monthly stats and trends
+        """CREATE INDEX IF NOT EXISTS idx_application_applied_date
+           ON application(applied_date)""",
+        # Role counts and the candidate browser; covers
+        # WHERE role_id = 2 ORDER BY firstname, lastname
+        """CREATE INDEX IF NOT EXISTS idx_person_role_name
+           ON person(role_id, firstname, lastname, email)""",
+        # Admin user lists, exports and user growth
+        """CREATE INDEX IF NOT EXISTS idx_person_created
+           ON person(created_at)""",
+        # Admin user list join and user deletion
+        """CREATE INDEX IF NOT EXISTS idx_credential_person
+           ON credential(person_id)""",
+    )),
+    (2, "Trigger-maintained counters for dashboards and admin pages", (
+        # Global counts: 'active_jobs' and 'total_applications'
+        """CREATE TABLE IF NOT EXISTS stat_counter (
+               name VARCHAR(50) PRIMARY KEY,
+               value INTEGER NOT NULL DEFAULT 0
+           )""",
+        """CREATE TABLE IF NOT EXISTS role_counter (
+               role_id INTEGER PRIMARY KEY,
+               persons INTEGER NOT NULL DEFAULT 0
+           )""",
+        """CREATE TABLE IF NOT EXISTS job_counter (
+               job_posting_id INTEGER PRIMARY KEY,
+               applications INTEGER NOT NULL DEFAULT 0
+           )""",
+        """CREATE TABLE IF NOT EXISTS recruiter_counter (
+               person_id INTEGER PRIMARY KEY,
+               job_postings INTEGER NOT NULL DEFAULT 0,
+               applications_received INTEGER NOT NULL DEFAULT 0
+           )""",
+
+        # Backfill from the current data
+        *COUNTER_BACKFILL,
+
+        # application: global, per-job and per-recruiter counts
+        """CREATE TRIGGER IF NOT EXISTS trg_application_counter_insert
+           AFTER INSERT ON application
+           BEGIN
+               UPDATE stat_counter SET value = value + 1 WHERE name = 'total_applications';
+               INSERT INTO job_counter (job_posting_id, applications)
+               VALUES (NEW.job_posting_id, 1)
+               ON CONFLICT(job_posting_id) DO UPDATE SET applications = applications + 1;
+               INSERT INTO recruiter_counter (person_id, applications_received)
+               SELECT posted_by, 1 FROM job_posting WHERE id = NEW.job_posting_id
+               ON CONFLICT(person_id) DO UPDATE SET applications_received = applications_received + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_application_counter_delete
+           AFTER DELETE ON application
+           BEGIN
+               UPDATE stat_counter SET value = value - 1 WHERE name = 'total_applications';
+               UPDATE job_counter SET applications = applications - 1
+               WHERE job_posting_id = OLD.job_posting_id;
+               UPDATE recruiter_counter SET applications_received = applications_received - 1
+               WHERE person_id = (SELECT posted_by FROM job_posting WHERE id = OLD.job_posting_id);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_application_counter_move
+           AFTER UPDATE OF job_posting_id ON application
+           WHEN OLD.job_posting_id IS NOT NEW.job_posting_id
+           BEGIN
+               UPDATE job_counter SET applications = applications - 1
+               WHERE job_posting_id = OLD.job_posting_id;
+               UPDATE recruiter_counter SET applications_received = applications_received - 1
+               WHERE person_id = (SELECT posted_by FROM job_posting WHERE id = OLD.job_posting_id);
+               INSERT INTO job_counter (job_posting_id, applications)
+               VALUES (NEW.job_posting_id, 1)
+               ON CONFLICT(job_posting_id) DO UPDATE SET applications = applications + 1;
+               INSERT INTO recruiter_counter (person_id, applications_received)
+               SELECT posted_by, 1 FROM job_posting WHERE id = NEW.job_posting_id
+               ON CONFLICT(person_id) DO UPDATE SET applications_received = applications_received + 1;
+           END""",
+
+        # job_posting: active job count and per-recruiter postings
+        """CREATE TRIGGER IF NOT EXISTS trg_job_posting_counter_insert
+           AFTER INSERT ON job_posting
+           BEGIN
+               UPDATE stat_counter SET value = value + 1
+               WHERE name = 'active_jobs' AND NEW.status = 'active';
+               INSERT INTO recruiter_counter (person_id, job_postings)
+               VALUES (NEW.posted_by, 1)
+               ON CONFLICT(person_id) DO UPDATE SET job_postings = job_postings + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_posting_counter_delete
+           AFTER DELETE ON job_posting
+           BEGIN
+               UPDATE stat_counter SET value = value - 1
+               WHERE name = 'active_jobs' AND OLD.status = 'active';
+               UPDATE recruiter_counter
+               SET job_postings = job_postings - 1,
+                   applications_received = applications_received - COALESCE(
+                       (SELECT applications FROM job_counter WHERE job_posting_id = OLD.id), 0)
+               WHERE person_id = OLD.posted_by;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_posting_counter_status
+           AFTER UPDATE OF status ON job_posting
+           WHEN (OLD.status = 'active') IS NOT (NEW.status = 'active')
+           BEGIN
+               UPDATE stat_counter
+               SET value = value + CASE WHEN NEW.status = 'active' THEN 1 ELSE -1 END
+               WHERE name = 'active_jobs';
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_posting_counter_owner
+           AFTER UPDATE OF posted_by ON job_posting
+           WHEN OLD.posted_by IS NOT NEW.posted_by
+           BEGIN
+               UPDATE recruiter_counter
+               SET job_postings = job_postings - 1,
+                   applications_received = applications_received - COALESCE(
+                       (SELECT applications FROM job_counter WHERE job_posting_id = OLD.id), 0)
+               WHERE person_id = OLD.posted_by;
+               INSERT INTO recruiter_counter (person_id, job_postings, applications_received)
+               VALUES (NEW.posted_by, 1, COALESCE(
+                   (SELECT applications FROM job_counter WHERE job_posting_id = NEW.id), 0))
+               ON CONFLICT(person_id) DO UPDATE
+               SET job_postings = job_postings + 1,
+                   applications_received = applications_received + excluded.applications_received;
+           END""",
+
+        # person: per-role counts
+        """CREATE TRIGGER IF NOT EXISTS trg_person_counter_insert
+           AFTER INSERT ON person
+           BEGIN
+               INSERT INTO role_counter (role_id, persons)
+               VALUES (NEW.role_id, 1)
+               ON CONFLICT(role_id) DO UPDATE SET persons = persons + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_person_counter_delete
+           AFTER DELETE ON person
+           BEGIN
+               UPDATE role_counter SET persons = persons - 1 WHERE role_id = OLD.role_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_person_counter_role
+           AFTER UPDATE OF role_id ON person
+           WHEN OLD.role_id IS NOT NEW.role_id
+           BEGIN
+               UPDATE role_counter SET persons = persons - 1 WHERE role_id = OLD.role_id;
+               INSERT INTO role_counter (role_id, persons)
+               VALUES (NEW.role_id, 1)
+               ON CONFLICT(role_id) DO UPDATE SET persons = persons + 1;
+           END""",
+    )),
+    (3, "FTS5 full-text index over job postings", (
+        # External-content index: job_posting holds the text, the index
+        # holds only tokens. prefix='2 3' speeds up short prefix queries.
+        """CREATE VIRTUAL TABLE IF NOT EXISTS job_posting_fts USING fts5(
+               title, description, requirements, location,
+               content='job_posting', content_rowid='id',
+               tokenize='unicode61 remove_diacritics 2',
+               prefix='2 3'
+           )""",
+        """INSERT INTO job_posting_fts(job_posting_fts) VALUES ('rebuild')""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_posting_fts_insert
+           AFTER INSERT ON job_posting
+           BEGIN
+               INSERT INTO job_posting_fts (rowid, title, description, requirements, location)
+               VALUES (NEW.id, NEW.title, NEW.description, NEW.requirements, NEW.location);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_posting_fts_delete
+           AFTER DELETE ON job_posting
+           BEGIN
+               INSERT INTO job_posting_fts (job_posting_fts, rowid, title, description, requirements, location)
+               VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.requirements, OLD.location);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_posting_fts_update
+           AFTER UPDATE OF title, description, requirements, location ON job_posting
+           BEGIN
+               INSERT INTO job_posting_fts (job_posting_fts, rowid, title, description, requirements, location)
+               VALUES ('delete', OLD.id, OLD.title, OLD.description, OLD.requirements, OLD.location);
+               INSERT INTO job_posting_fts (rowid, title, description, requirements, location)
+               VALUES (NEW.id, NEW.title, NEW.description, NEW.requirements, NEW.location);
+           END""",
+    )),
+    (4, "Job competence requirements and competence profile change log", (
+        """CREATE TABLE IF NOT EXISTS job_competence (
+               job_posting_id INTEGER NOT NULL,
+               competence_id INTEGER NOT NULL,
+               min_years DECIMAL(3,1) NOT NULL DEFAULT 0,
+               PRIMARY KEY (job_posting_id, competence_id),
+               FOREIGN KEY (job_posting_id) REFERENCES job_posting(id),
+               FOREIGN KEY (competence_id) REFERENCES competence(id)
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_competence_profile_person
+           ON competence_profile(person_id)""",
+        # One row per person whose profile (or candidacy) changed, stamped
+        # with a monotonically increasing seq so the matching engine can
+        # reload only the people changed since its last refresh.
+        """CREATE TABLE IF NOT EXISTS competence_profile_change (
+               person_id INTEGER PRIMARY KEY,
+               seq INTEGER NOT NULL
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_competence_profile_change_seq
+           ON competence_profile_change(seq)""",
+        """CREATE TRIGGER IF NOT EXISTS trg_competence_profile_change_insert
+           AFTER INSERT ON competence_profile
+           BEGIN
+               INSERT OR REPLACE INTO competence_profile_change (person_id, seq)
+               VALUES (NEW.person_id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM competence_profile_change));
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_competence_profile_change_delete
+           AFTER DELETE ON competence_profile
+           BEGIN
+               INSERT OR REPLACE INTO competence_profile_change (person_id, seq)
+               VALUES (OLD.person_id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM competence_profile_change));
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_competence_profile_change_update
+           AFTER UPDATE OF person_id, competence_id, years_of_experience ON competence_profile
+           BEGIN
+               INSERT OR REPLACE INTO competence_profile_change (person_id, seq)
+               VALUES (OLD.person_id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM competence_profile_change));
+               INSERT OR REPLACE INTO competence_profile_change (person_id, seq)
+               VALUES (NEW.person_id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM competence_profile_change));
+           END""",
+        # Only applicants are candidates, so role changes and deletions
+        # move people in or out of the matrix too.
+        """CREATE TRIGGER IF NOT EXISTS trg_person_profile_change_role
+           AFTER UPDATE OF role_id ON person
+           BEGIN
+               INSERT OR REPLACE INTO competence_profile_change (person_id, seq)
+               VALUES (NEW.id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM competence_profile_change));
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_person_profile_change_delete
+           AFTER DELETE ON person
+           BEGIN
+               INSERT OR REPLACE INTO competence_profile_change (person_id, seq)
+               VALUES (OLD.id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM competence_profile_change));
+           END""",
+    )),
+    (5, "Availability change log for the in-memory interval index", (
+        """CREATE INDEX IF NOT EXISTS idx_availability_person
+           ON availability(person_id)""",
+        # Same scheme as competence_profile_change: the latest seq per person
+        """CREATE TABLE IF NOT EXISTS availability_change (
+               person_id INTEGER PRIMARY KEY,
+               seq INTEGER NOT NULL
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_availability_change_seq
+           ON availability_change(seq)""",
+        """CREATE TRIGGER IF NOT EXISTS trg_availability_change_insert
+           AFTER INSERT ON availability
+           BEGIN
+               INSERT OR REPLACE INTO availability_change (person_id, seq)
+               VALUES (NEW.person_id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM availability_change));
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_availability_change_delete
+           AFTER DELETE ON availability
+           BEGIN
+               INSERT OR REPLACE INTO availability_change (person_id, seq)
+               VALUES (OLD.person_id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM availability_change));
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_availability_change_update
+           AFTER UPDATE OF person_id, from_date, to_date ON availability
+           BEGIN
+               INSERT OR REPLACE INTO availability_change (person_id, seq)
+               VALUES (OLD.person_id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM availability_change));
+               INSERT OR REPLACE INTO availability_change (person_id, seq)
+               VALUES (NEW.person_id,
+                       (SELECT COALESCE(MAX(seq), 0) + 1 FROM availability_change));
+           END""",
+    )),
+    (6, "Application resume path and per-applicant application order", (
+        # Written by the apply form when a resume is uploaded
+        "ALTER TABLE application ADD COLUMN resume_path TEXT",
+        # Applicant dashboards and lists:
+        # WHERE person_id = ? ORDER BY applied_date DESC
+        """CREATE INDEX IF NOT EXISTS idx_application_person_applied
+           ON application(person_id, applied_date)""",
+    )),
+    (7, "Revoked access tokens", (
+        # One row per revoked token (jti set) or per "revoke all tokens
+        # issued to user_id before revoked_before" (jti NULL). The id
+        # lets every process pick up new rows incrementally.
+        """CREATE TABLE IF NOT EXISTS token_revocation (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               jti TEXT UNIQUE,
+               user_id INTEGER,
+               revoked_before REAL,
+               expires_at INTEGER NOT NULL,
+               created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_token_revocation_user
+           ON token_revocation(user_id, revoked_before)""",
+        """CREATE INDEX IF NOT EXISTS idx_token_revocation_expires
+           ON token_revocation(expires_at)""",
+    )),
+    (8, "Durable tier for edge sessions", (
+        # Keyed by the SHA-256 of the session cookie, never the cookie
+        # itself. expires_at is the earlier of the idle and absolute
+        # deadlines as of last_seen.
+        """CREATE TABLE IF NOT EXISTS user_session (
+               id TEXT PRIMARY KEY,
+               user_id INTEGER,
+               username TEXT,
+               data TEXT,
+               created_at REAL NOT NULL,
+               last_seen REAL NOT NULL,
+               expires_at REAL NOT NULL
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_user_session_user
+           ON user_session(user_id)""",
+        """CREATE INDEX IF NOT EXISTS idx_user_session_expires
+           ON user_session(expires_at)""",
+    )),
+    (9, "Job listing version for the cached active-jobs listing", (
+        # Bumped by any write that can change what the listing shows: an
+        # active job added, changed, removed or (de)activated, or a
+        # category renamed or removed.
+        """INSERT OR IGNORE INTO stat_counter (name, value) VALUES ('job_listing_version', 0)""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_listing_version_insert
+           AFTER INSERT ON job_posting
+           WHEN NEW.status = 'active'
+           BEGIN
+               UPDATE stat_counter SET value = value + 1 WHERE name = 'job_listing_version';
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_listing_version_delete
+           AFTER DELETE ON job_posting
+           WHEN OLD.status = 'active'
+           BEGIN
+               UPDATE stat_counter SET value = value + 1 WHERE name = 'job_listing_version';
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_listing_version_update
+           AFTER UPDATE ON job_posting
+           WHEN OLD.status = 'active' OR NEW.status = 'active'
+           BEGIN
+               UPDATE stat_counter SET value = value + 1 WHERE name = 'job_listing_version';
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_listing_version_category
+           AFTER UPDATE OF name ON job_category
+           BEGIN
+               UPDATE stat_counter SET value = value + 1 WHERE name = 'job_listing_version';
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_listing_version_category_delete
+           AFTER DELETE ON job_category
+           BEGIN
+               UPDATE stat_counter SET value = value + 1 WHERE name = 'job_listing_version';
+           END""",
+    )),
+    (10, "User-wide token revocations in milliseconds", (
+        # revoked_before was stored in epoch seconds; tokens now carry iat_ms
+        """UPDATE token_revocation
+           SET revoked_before = CAST(revoked_before * 1000 AS INTEGER) + 1
+           WHERE jti IS NULL AND revoked_before < 100000000000""",
+    )),
+    (11, "Index for availability searches filtered by application status", (
+        # WHERE status_id = ? AND person_id IN (...)
+        """CREATE INDEX IF NOT EXISTS idx_application_status_person
+           ON application(status_id, person_id)""",
+    )),
+    (12, "NULL-safe active job counter", (
+        # (OLD.status = 'active') is NULL for a NULL status, so a change
+        # between NULL and another inactive status passed the guard and
+        # was counted as a deactivation.
+        """DROP TRIGGER IF EXISTS trg_job_posting_counter_status""",
+        """CREATE TRIGGER IF NOT EXISTS trg_job_posting_counter_status
+           AFTER UPDATE OF status ON job_posting
+           WHEN COALESCE(OLD.status = 'active', 0) != COALESCE(NEW.status = 'active', 0)
+           BEGIN
+               UPDATE stat_counter
+               SET value = value + CASE WHEN NEW.status = 'active' THEN 1 ELSE -1 END
+               WHERE name = 'active_jobs';
+           END""",
+        """INSERT OR REPLACE INTO stat_counter (name, value)
+           SELECT 'active_jobs', COUNT(*) FROM job_posting WHERE status = 'active'""",
+    )),
+]
+
+# Everything triggers would have maintained, for data loaded with the
+# triggers dropped: counters, the search index and the change logs (every
+# profiled person is marked changed so running services reload them).
+DERIVED_REBUILD = COUNTER_BACKFILL + (
+    """INSERT INTO job_posting_fts(job_posting_fts) VALUES ('rebuild')""",
+    """INSERT INTO stat_counter (name, value) VALUES ('job_listing_version', 1)
+       ON CONFLICT(name) DO UPDATE SET value = value + 1""",
+    """INSERT OR REPLACE INTO competence_profile_change (person_id, seq)
+       SELECT person_id,
+              (SELECT COALESCE(MAX(seq), 0) FROM competence_profile_change)
+              + ROW_NUMBER() OVER (ORDER BY person_id)
+       FROM (SELECT DISTINCT person_id FROM competence_profile)""",
+    """INSERT OR REPLACE INTO availability_change (person_id, seq)
+       SELECT person_id,
+              (SELECT COALESCE(MAX(seq), 0) FROM availability_change)
+              + ROW_NUMBER() OVER (ORDER BY person_id)
+       FROM (SELECT DISTINCT person_id FROM availability)""",
+)
+
+def rebuild_derived_tables(conn: sqlite3.Connection) -> None:
+    """Recompute trigger-maintained tables after a bulk load without triggers."""
+    for statement in DERIVED_REBUILD:
+        conn.execute(statement)
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version recorded in the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations in order and return the resulting version."""
+    conn.commit()
+    applied = []
+
+    for version, description, statements in MIGRATIONS:
+        if get_schema_version(conn) >= version:
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock in case another process won the race
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error("Migration failed", version=version, description=description)
+            raise
+
+        applied.append(version)
+        logger.info("Migration applied", version=version, description=description)
+
+    if applied:
+        # Refresh planner statistics so the new indexes are used right away
+        conn.execute("ANALYZE")
+        conn.commit()
+
+    return get_schema_version(conn)
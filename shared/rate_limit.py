@@ -0,0 +1,196 @@
+"""
+Login rate limiting.
+
+Every login attempt costs a bcrypt check, so a credential-stuffing burst
+can keep every core busy. Attempts are limited per username and per
+client IP with token buckets (burst size plus a steady refill rate) before
+any password is checked.
+
+Buckets live in lock-sharded LRU maps with a fixed number of keys. A key
+that is evicted (or never seen) does not come back with a full bucket:
+all attempts are also counted in a windowed Count-Min sketch, and a new
+bucket starts with its burst minus the sketch's estimate for that key. The
+sketch only overestimates, so churning through many IPs to evict a busy
+one cannot buy it extra attempts.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+
+LOGIN_USER_BURST = float(os.getenv("LOGIN_USER_BURST", "5"))
+LOGIN_USER_RATE = float(os.getenv("LOGIN_USER_RATE", "0.1"))  # tokens per second
+LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_RATE = float(os.getenv("LOGIN_IP_RATE", "1"))
+LOGIN_LIMITER_SHARDS = int(os.getenv("LOGIN_LIMITER_SHARDS", "16"))
+LOGIN_LIMITER_MAX_KEYS = int(os.getenv("LOGIN_LIMITER_MAX_KEYS", "100000"))
+LOGIN_SKETCH_WIDTH = int(os.getenv("LOGIN_SKETCH_WIDTH", "16384"))
+LOGIN_SKETCH_DEPTH = int(os.getenv("LOGIN_SKETCH_DEPTH", "4"))
+
+class LoginRateLimited(Exception):
+    """Raised when a login attempt is over its rate limit."""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Too many login attempts for this {scope}")
+        self.scope = scope
+        self.retry_after = retry_after
+
+def _hashes(key: str):
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+class CountMinSketch:
+    """Approximate per-key counts in fixed memory; never undercounts."""
+
+    def __init__(self, width: int = LOGIN_SKETCH_WIDTH, depth: int = LOGIN_SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self._rows = [array("I", bytes(4 * width)) for _ in range(depth)]
+
+    def _cells(self, key: str):
+        h1, h2 = _hashes(key)
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str) -> int:
+        """Count one occurrence of ``key`` and return its new estimate."""
+        estimate = None
+        for row, cell in zip(self._rows, self._cells(key)):
+            if row[cell] < 0xFFFFFFFF:
+                row[cell] += 1
+            estimate = row[cell] if estimate is None else min(estimate, row[cell])
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[cell] for row, cell in zip(self._rows, self._cells(key)))
+
+class WindowedSketch:
+    """Two Count-Min sketches rotated every ``window`` seconds.
+
+    Estimates cover the current and the previous window, so a count is
+    forgotten after one to two windows.
+    """
+
+    def __init__(self, window: float, width: int = LOGIN_SKETCH_WIDTH, depth: int = LOGIN_SKETCH_DEPTH):
+        self.window = window
+        self._width = width
+        self._depth = depth
+        self._current = CountMinSketch(width, depth)
+        self._previous = CountMinSketch(width, depth)
+        self._rotated_at = time.monotonic()
+
+    def _rotate(self, now: float):
+        if now - self._rotated_at >= 2 * self.window:
+            self._previous = CountMinSketch(self._width, self._depth)
+            self._current = CountMinSketch(self._width, self._depth)
+            self._rotated_at = now
+        elif now - self._rotated_at >= self.window:
+            self._previous, self._current = self._current, CountMinSketch(self._width, self._depth)
+            self._rotated_at = now
+
+    def add(self, key: str, now: float):
+        self._rotate(now)
+        self._current.add(key)
+
+    def estimate(self, key: str, now: float) -> int:
+        self._rotate(now)
+        return self._current.estimate(key) + self._previous.estimate(key)
+
+class _Shard:
+    __slots__ = ("lock", "buckets")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+class TokenBucketLimiter:
+    """Token buckets per key, sharded by key hash, with bounded memory."""
+
+    def __init__(self, scope: str, burst: float, rate: float,
+                 shards: int = LOGIN_LIMITER_SHARDS, max_keys: int = LOGIN_LIMITER_MAX_KEYS):
+        self.scope = scope
+        self.burst = burst
+        self.rate = rate
+        self.max_keys_per_shard = max(1, max_keys // shards)
+        self._shards = [_Shard() for _ in range(shards)]
+        # Long enough for an exhausted bucket to refill completely
+        self._sketch = WindowedSketch(burst / rate if rate > 0 else 3600.0)
+        self._sketch_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"allowed": 0, "rejected": 0, "evictions": 0, "seeded_from_sketch": 0}
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def acquire(self, key: str) -> Optional[float]:
+        """Take one token for ``key``.
+
+        Returns None if allowed, otherwise the seconds until a token is free.
+        """
+        now = time.monotonic()
+        with self._sketch_lock:
+            self._sketch.add(key, now)
+
+        shard = self._shards[_hashes(key)[0] % len(self._shards)]
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                with self._sketch_lock:
+                    # The attempt just counted is paid for below
+                    seen = self._sketch.estimate(key, now) - 1
+                if seen:
+                    self._count("seeded_from_sketch")
+                bucket = [max(0.0, self.burst - seen), now]
+                shard.buckets[key] = bucket
+                while len(shard.buckets) > self.max_keys_per_shard:
+                    shard.buckets.popitem(last=False)
+                    self._count("evictions")
+            else:
+                shard.buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                retry_after = None
+            else:
+                retry_after = (1 - bucket[0]) / self.rate if self.rate > 0 else 3600.0
+
+        self._count("allowed" if retry_after is None else "rejected")
+        return retry_after
+
+    def stats(self) -> dict:
+        """Return attempt counters and the number of tracked keys."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "tracked_keys": sum(len(shard.buckets) for shard in self._shards),
+            "burst": self.burst,
+            "rate_per_second": self.rate,
+        })
+        return stats
+
+_user_limiter = TokenBucketLimiter("username", LOGIN_USER_BURST, LOGIN_USER_RATE)
+_ip_limiter = TokenBucketLimiter("client", LOGIN_IP_BURST, LOGIN_IP_RATE)
+
+def check_login_rate(username: str, client_ip: Optional[str]):
+    """Count a login attempt; raises LoginRateLimited if it is over the limit.
+
+    Call before the password is checked.
+    """
+    if client_ip:
+        retry_after = _ip_limiter.acquire(client_ip)
+        if retry_after is not None:
+            raise LoginRateLimited(_ip_limiter.scope, retry_after)
+
+    retry_after = _user_limiter.acquire((username or "").strip().lower())
+    if retry_after is not None:
+        raise LoginRateLimited(_user_limiter.scope, retry_after)
+
+def get_login_rate_stats() -> dict:
+    """Return login limiter metrics."""
+    return {"username": _user_limiter.stats(), "client_ip": _ip_limiter.stats()}
@@ -0,0 +1,205 @@
+"""
+Failure handling for upstream calls: circuit breakers and a retry budget.
+
+A CircuitBreaker watches a rolling window of call outcomes for one
+upstream. When enough calls fail or run slow it opens and calls fail fast
+instead of waiting out timeouts; after a cool-down it lets a few probe
+calls through (half-open) and closes again if they succeed.
+
+The RetryBudget caps retries and hedged requests across all upstreams to a
+fraction of recent traffic, so retries cannot multiply load on a service
+that is already struggling.
+"""
+
+import os
+import threading
+import time
+from typing import List
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1"))
+RETRY_BUDGET_WINDOW = float(os.getenv("RETRY_BUDGET_WINDOW", "10"))
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit breaker for {name} is open")
+        self.name = name
+        self.retry_after = retry_after
+
+class RollingWindow:
+    """Counters over the last ``window`` seconds, kept in one-second buckets."""
+
+    def __init__(self, window: float, fields: tuple):
+        self.fields = fields
+        self._size = max(1, int(window))
+        self._buckets: List[list] = [[0] * len(fields) for _ in range(self._size)]
+        self._stamps = [-1] * self._size
+
+    def _bucket(self, now: float) -> list:
+        second = int(now)
+        index = second % self._size
+        if self._stamps[index] != second:
+            self._stamps[index] = second
+            self._buckets[index] = [0] * len(self.fields)
+        return self._buckets[index]
+
+    def add(self, now: float, *values: int):
+        bucket = self._bucket(now)
+        for i, value in enumerate(values):
+            bucket[i] += value
+
+    def totals(self, now: float) -> dict:
+        oldest = int(now) - self._size
+        sums = [0] * len(self.fields)
+        for stamp, bucket in zip(self._stamps, self._buckets):
+            if stamp > oldest:
+                for i, value in enumerate(bucket):
+                    sums[i] += value
+        return dict(zip(self.fields, sums))
+
+    def reset(self):
+        self._stamps = [-1] * self._size
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over rolling error and latency rates.
+
+    Every ``allow()`` that returns True must be followed by ``record()``
+    or, for a call abandoned before it finished, ``release()``.
+    """
+
+    def __init__(self, name: str, window: float = 10.0, min_calls: int = 20,
+                 error_rate: float = 0.5, slow_call: float = 2.0, slow_rate: float = 0.8,
+                 open_seconds: float = 5.0, half_open_calls: int = 3):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._window = RollingWindow(window, ("calls", "failures", "slow"))
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._stats = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        """Return True if a call may go ahead."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self._stats["rejected"] += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes = 0
+                self._probe_successes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self._stats["rejected"] += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets probe calls through."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def record(self, success: bool, latency: float):
+        """Record the outcome of an allowed call."""
+        now = time.monotonic()
+        slow = latency >= self.slow_call
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if not success or slow:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self.state = CLOSED
+                        self._window.reset()
+                return
+            if self.state == OPEN:
+                return
+
+            self._window.add(now, 1, 0 if success else 1, 1 if slow else 0)
+            totals = self._window.totals(now)
+            if totals["calls"] >= self.min_calls and (
+                totals["failures"] >= self.error_rate * totals["calls"]
+                or totals["slow"] >= self.slow_rate * totals["calls"]
+            ):
+                self._open(now)
+
+    def release(self):
+        """Give back a half-open probe slot for a call that was abandoned."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._opened_at = now
+        self._stats["opened"] += 1
+        self._window.reset()
+
+    def stats(self) -> dict:
+        """Return state, window counts and transition counters."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                state = HALF_OPEN
+            else:
+                state = self.state
+            stats = dict(self._stats, state=state, window=self._window.totals(time.monotonic()))
+        return stats
+
+class RetryBudget:
+    """Allows retries up to ``ratio`` of recent requests plus a small floor."""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, min_per_second: float = RETRY_BUDGET_MIN_PER_SECOND,
+                 window: float = RETRY_BUDGET_WINDOW):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._lock = threading.Lock()
+        self._counts = RollingWindow(window, ("requests", "retries"))
+        self._stats = {"granted": 0, "denied": 0}
+
+    def record_request(self):
+        """Count one original (non-retry) request."""
+        with self._lock:
+            self._counts.add(time.monotonic(), 1, 0)
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; returns False if it is used up."""
+        now = time.monotonic()
+        with self._lock:
+            totals = self._counts.totals(now)
+            if totals["retries"] + 1 > self.ratio * totals["requests"] + self.min_per_second * self.window:
+                self._stats["denied"] += 1
+                return False
+            self._counts.add(now, 0, 1)
+            self._stats["granted"] += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(self._counts.totals(time.monotonic()))
+        stats.update({"ratio": self.ratio, "min_per_second": self.min_per_second})
+        return stats
+
+_retry_budget = RetryBudget()
+
+def get_retry_budget() -> RetryBudget:
+    """Return the process-wide retry budget shared by all upstreams."""
+    return _retry_budget
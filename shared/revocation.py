@@ -0,0 +1,208 @@
+"""
+Access token revocation.
+
+Revocations live in the ``token_revocation`` table: one row per revoked
+token (by ``jti``) or per user whose tokens issued before ``revoked_before``
+(epoch milliseconds, compared with the token's ``iat_ms``) are all revoked.
+Every process holds the unexpired rows in memory: the revoked jtis as a
+set, which stays small because revocations expire with the tokens, and the
+user-wide revocations as a map of user id to ``revoked_before``. A check
+is one set lookup and one dict lookup and never touches the database.
+
+A background task started by ``start_revocation_refresher`` picks up new
+rows every REVOCATION_POLL_SECONDS and reloads everything every
+REVOCATION_REBUILD_SECONDS so expired revocations drop out.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import structlog
+from typing import Optional
+
+from shared.database import run_read, run_transaction
+
+logger = structlog.get_logger()
+
+REVOCATION_POLL_SECONDS = float(os.getenv("REVOCATION_POLL_SECONDS", "2"))
+REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", "600"))
+
+def token_issued_ms(payload: dict) -> int:
+    """Issue time of a decoded token in epoch milliseconds.
+
+    Tokens without ``iat_ms`` count as issued at the start of their ``iat``
+    second, so a revocation later in that second still covers them.
+    """
+    if "iat_ms" in payload:
+        return int(payload["iat_ms"])
+    return int(payload.get("iat", 0)) * 1000
+
+def _load_revocations(conn, since_id: int, now: int):
+    return conn.execute("""
+        SELECT id, jti, user_id, revoked_before FROM token_revocation
+        WHERE id > ? AND expires_at > ?
+    """, (since_id, now)).fetchall()
+
+class RevocationList:
+    """In-memory copy of the unexpired rows of token_revocation.
+
+    Checks only read memory; ``refresh`` (run by the background refresher)
+    is the only method that touches the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis = set()
+        self._revoked_before = {}
+        self._last_id = 0
+        self._rebuilt_at = 0.0
+        self._stats = {
+            "checks": 0,
+            "revoked": 0,
+            "refreshes": 0,
+            "rebuilds": 0,
+            "refresh_errors": 0,
+        }
+
+    async def refresh(self):
+        """Load new revocations, or reload all of them when that is due."""
+        now = time.time()
+        rebuild = now - self._rebuilt_at >= REVOCATION_REBUILD_SECONDS
+        try:
+            rows = await run_read(_load_revocations, 0 if rebuild else self._last_id, int(now))
+        except Exception as e:
+            self._stats["refresh_errors"] += 1
+            logger.warning("Token revocation refresh failed", error=str(e))
+            return
+
+        with self._lock:
+            if rebuild:
+                self._jtis = set()
+                self._revoked_before = {}
+                self._rebuilt_at = now
+                self._stats["rebuilds"] += 1
+            for row_id, jti, user_id, revoked_before in rows:
+                if jti:
+                    self._jtis.add(jti)
+                else:
+                    self._add_user(user_id, revoked_before)
+                self._last_id = max(self._last_id, row_id)
+            self._stats["refreshes"] += 1
+
+    def _add_user(self, user_id: int, revoked_before: int):
+        self._revoked_before[user_id] = max(revoked_before, self._revoked_before.get(user_id, 0))
+
+    def is_revoked(self, payload: dict) -> bool:
+        """Return True if the decoded token has been revoked."""
+        jti = payload.get("jti")
+        with self._lock:
+            revoked_before = self._revoked_before.get(payload.get("user_id"))
+            revoked = (jti is not None and jti in self._jtis) or (
+                revoked_before is not None and token_issued_ms(payload) < revoked_before
+            )
+            self._stats["checks"] += 1
+            if revoked:
+                self._stats["revoked"] += 1
+        return revoked
+
+    def add_token(self, jti: str):
+        """Record a revoked jti in this process right away."""
+        with self._lock:
+            self._jtis.add(jti)
+
+    def add_user(self, user_id: int, revoked_before: int):
+        """Record a user-wide revocation in this process right away."""
+        with self._lock:
+            self._add_user(user_id, revoked_before)
+
+    def stats(self) -> dict:
+        """Return the number of revocations held and check counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "revoked_tokens": len(self._jtis),
+                "revoked_users": len(self._revoked_before),
+                "last_id": self._last_id,
+            })
+        return stats
+
+_revocations: Optional[RevocationList] = None
+_revocations_lock = threading.Lock()
+_refresher: Optional[asyncio.Task] = None
+
+def get_revocation_list() -> RevocationList:
+    """Return the process-wide revocation list."""
+    global _revocations
+    if _revocations is None:
+        with _revocations_lock:
+            if _revocations is None:
+                _revocations = RevocationList()
+    return _revocations
+
+async def _refresh_periodically(revocations: RevocationList):
+    while True:
+        await asyncio.sleep(REVOCATION_POLL_SECONDS)
+        await revocations.refresh()
+
+async def start_revocation_refresher():
+    """Load revocations and keep them refreshed in the background.
+
+    Call from service startup; until then only revocations made by this
+    process are seen.
+    """
+    global _refresher
+    revocations = get_revocation_list()
+    await revocations.refresh()
+    if _refresher is None:
+        _refresher = asyncio.get_running_loop().create_task(_refresh_periodically(revocations))
+
+async def stop_revocation_refresher():
+    global _refresher
+    if _refresher is not None:
+        _refresher.cancel()
+        try:
+            await _refresher
+        except asyncio.CancelledError:
+            pass
+        _refresher = None
+
+def is_token_revoked(payload: dict) -> bool:
+    """Return True if the decoded token has been revoked."""
+    return get_revocation_list().is_revoked(payload)
+
+def get_revocation_stats() -> dict:
+    """Return revocation list metrics."""
+    return get_revocation_list().stats()
+
+def _insert_revocation(conn, jti, user_id, revoked_before, expires_at, now):
+    conn.execute("DELETE FROM token_revocation WHERE expires_at <= ?", (now,))
+    conn.execute("""
+        INSERT OR IGNORE INTO token_revocation (jti, user_id, revoked_before, expires_at)
+        VALUES (?, ?, ?, ?)
+    """, (jti, user_id, revoked_before, expires_at))
+
+async def revoke_token(payload: dict) -> bool:
+    """Revoke one decoded token by its jti; returns False if it has none."""
+    jti = payload.get("jti")
+    if not jti:
+        return False
+    await run_transaction(
+        _insert_revocation, jti, payload.get("user_id"), None, int(payload["exp"]), int(time.time())
+    )
+    get_revocation_list().add_token(jti)
+    return True
+
+async def revoke_user_tokens(user_id: int, max_token_lifetime: float):
+    """Revoke every token issued to ``user_id`` until now.
+
+    ``max_token_lifetime`` bounds how long the revocation must be kept: any
+    token issued before now has expired after that many seconds.
+    """
+    now = time.time()
+    # Tokens issued in the revoking millisecond or earlier are revoked
+    revoked_before = int(now * 1000) + 1
+    await run_transaction(
+        _insert_revocation, None, user_id, revoked_before, int(now + max_token_lifetime) + 1, int(now)
+    )
+    get_revocation_list().add_user(user_id, revoked_before)
@@ -2,20 +2,75 @@
 Security utilities for the Recruitment System
 """
 
+import calendar
+import hashlib
+import os
+import statistics
+import threading
+import time
+import uuid
+from collections import OrderedDict
 import bcrypt
 import jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+from shared.revocation import is_token_revoked
 
 SECRET_KEY = "your-secret-key-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
 
-def get_password_hash(password: str) -> str:
-    """Generate password hash."""
-    salt = bcrypt.gensalt()
+# bcrypt work factor for new hashes; pick one with scripts/calibrate_bcrypt.py
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 20
+
+# Decoded tokens are reused for up to TOKEN_CACHE_TTL seconds (never past exp)
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """Generate password hash with ``rounds`` (default BCRYPT_ROUNDS)."""
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+def get_hash_cost(hashed_password: str) -> Optional[int]:
+    """Return the work factor of a ``$2b$12$...`` bcrypt hash, or None."""
+    parts = (hashed_password or "").split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Return True if the hash uses a lower work factor than BCRYPT_ROUNDS."""
+    cost = get_hash_cost(hashed_password)
+    return cost is not None and cost < BCRYPT_ROUNDS
+
+def calibrate_bcrypt_cost(max_ms: float, samples: int = 3) -> Tuple[int, Dict[int, float]]:
+    """Benchmark bcrypt on this host and return the highest work factor
+    whose median hash time stays under ``max_ms``, with the timings seen.
+
+    Never returns less than BCRYPT_MIN_ROUNDS, even on slow hosts.
+    """
+    timings = {}
+    chosen = BCRYPT_MIN_ROUNDS
+    for rounds in range(BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS + 1):
+        salt = bcrypt.gensalt(rounds=rounds)
+        runs = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            bcrypt.hashpw(b"calibration-password", salt)
+            runs.append((time.perf_counter() - started) * 1000)
+        timings[rounds] = statistics.median(runs)
+        if timings[rounds] > max_ms:
+            break
+        chosen = rounds
+        # Each extra round doubles the cost; stop before a run that cannot fit
+        if timings[rounds] * 2 > max_ms:
+            break
+    return chosen, timings
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash."""
     try:
@@ -24,25 +79,119 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create JWT access token."""
+    """Create JWT access token.
+
+    Every token carries a unique ``jti`` and its issue time so it can be
+    revoked on its own or together with all of a user's tokens.
+    """
     to_encode = data.copy()
+    issued_at = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
+        expire = issued_at + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
 
-    to_encode.update({"exp": expire})
+    # "iat" has whole seconds only; "iat_ms" orders a token against a
+    # user-wide revocation made earlier in the same second.
+    iat_ms = calendar.timegm(issued_at.utctimetuple()) * 1000 + issued_at.microsecond // 1000
+    to_encode.update({"exp": expire, "iat": issued_at, "iat_ms": iat_ms, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+class TokenCache:
+    """LRU cache of verified token payloads keyed by token digest.
+
+    Entries expire at the token's own ``exp`` or after ``ttl`` seconds,
+    whichever comes first, so a cached token is never accepted after it
+    would have failed ``jwt.decode``.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get(self, key: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            payload, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return dict(payload)
+
+    def put(self, key: bytes, payload: dict):
+        expires_at = time.time() + self.ttl
+        if "exp" in payload:
+            expires_at = min(expires_at, float(payload["exp"]))
+        with self._lock:
+            self._entries[key] = (dict(payload), expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({"size": len(self._entries), "max_size": self.max_size, "ttl": self.ttl})
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+_token_cache = TokenCache()
+
 def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode JWT token."""
+    """Verify and decode JWT token, reusing recent verifications.
+
+    Revocation is checked on every call, cached or not.
+    """
+    if not token:
+        return None
+
+    if TOKEN_CACHE_SIZE <= 0:
+        payload = _decode_token(token)
+    else:
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        payload = _token_cache.get(key)
+        if payload is None:
+            payload = _decode_token(token)
+            if payload is not None:
+                _token_cache.put(key, payload)
+
+    if payload is None or is_token_revoked(payload):
+        return None
+    return payload
+
+def _decode_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except jwt.PyJWTError:
         return None
 
+def get_token_cache_stats() -> dict:
+    """Return token verification cache metrics."""
+    return _token_cache.stats()
+
+def clear_token_cache():
+    """Drop all cached token verifications."""
+    _token_cache.clear()
+
 def validate_password_strength(password: str) -> tuple[bool, str]:
     """Validate password strength."""
     if len(password) < 8:
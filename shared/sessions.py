@@ -0,0 +1,357 @@
+"""
+Server-side sessions for the edge service.
+
+Replaces Starlette's signed-cookie sessions: the cookie only carries an
+opaque random session id, and the session itself (user id, username) lives
+in a per-process store as a small ``__slots__`` record. Sessions end after
+SESSION_IDLE_SECONDS without a request or SESSION_MAX_AGE_SECONDS after
+login, whichever comes first. A hashed timer wheel reclaims expired
+records without scanning the store.
+
+With SESSION_DURABLE=true, sessions are also written to the
+``user_session`` table so they survive restarts and are shared between
+workers. Records missing from memory are loaded from the table, and
+last-seen times are written back at most every SESSION_TOUCH_SECONDS; a
+touch that finds its row gone drops the session, which is how
+invalidations reach other workers.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+import structlog
+from typing import Dict, List, Optional, Set
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+from shared.database import execute, fetch_one, run_transaction
+
+logger = structlog.get_logger()
+
+SESSION_COOKIE_NAME = os.getenv("SESSION_COOKIE_NAME", "session_id")
+SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "false").lower() == "true"
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "1800"))
+SESSION_MAX_AGE_SECONDS = float(os.getenv("SESSION_MAX_AGE_SECONDS", "86400"))
+SESSION_DURABLE = os.getenv("SESSION_DURABLE", "false").lower() == "true"
+SESSION_TOUCH_SECONDS = float(os.getenv("SESSION_TOUCH_SECONDS", "60"))
+SESSION_WHEEL_TICK = float(os.getenv("SESSION_WHEEL_TICK", "5"))
+SESSION_WHEEL_SLOTS = int(os.getenv("SESSION_WHEEL_SLOTS", "512"))
+
+class SessionRecord:
+    """One session. Keys other than user_id and username go in ``data``."""
+
+    __slots__ = ("session_id", "user_id", "username", "data", "created_at", "last_seen", "persisted_at")
+
+    def __init__(self, session_id: str, user_id: Optional[int], username: Optional[str],
+                 data: Optional[dict], created_at: float, last_seen: float):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.username = username
+        self.data = data or None
+        self.created_at = created_at
+        self.last_seen = last_seen
+        self.persisted_at = last_seen
+
+    @classmethod
+    def from_dict(cls, session_id: str, session: dict, now: float) -> "SessionRecord":
+        extra = {k: v for k, v in session.items() if k not in ("user_id", "username")}
+        return cls(session_id, session.get("user_id"), session.get("username"), extra, now, now)
+
+    def to_dict(self) -> dict:
+        session = dict(self.data) if self.data else {}
+        if self.user_id is not None:
+            session["user_id"] = self.user_id
+        if self.username is not None:
+            session["username"] = self.username
+        return session
+
+    def expires_at(self) -> float:
+        return min(self.last_seen + SESSION_IDLE_SECONDS, self.created_at + SESSION_MAX_AGE_SECONDS)
+
+def _digest(session_id: str) -> str:
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+
+class TimerWheel:
+    """Hashed timer wheel of session ids.
+
+    Scheduling is O(1) and advancing only visits the slots whose time has
+    passed. Slots are reused every revolution and sessions are touched
+    without being rescheduled, so callers re-check each due id and
+    schedule it again if it is not expired yet.
+    """
+
+    def __init__(self, tick: float = SESSION_WHEEL_TICK, slots: int = SESSION_WHEEL_SLOTS):
+        self.tick = tick
+        self._slots: List[Set[str]] = [set() for _ in range(slots)]
+        self._current = int(time.time() // tick)
+
+    def schedule(self, key: str, deadline: float):
+        # Never into the current slot, which has already been emptied
+        slot = max(int(deadline // self.tick), self._current + 1)
+        self._slots[slot % len(self._slots)].add(key)
+
+    def advance(self, now: float) -> List[str]:
+        """Move the wheel to ``now`` and return the ids in the passed slots."""
+        target = int(now // self.tick)
+        due = []
+        for step in range(1, min(target - self._current, len(self._slots)) + 1):
+            slot = self._slots[(self._current + step) % len(self._slots)]
+            due.extend(slot)
+            slot.clear()
+        self._current = max(self._current, target)
+        return due
+
+class SessionStore:
+    """In-process session records with an optional SQLite durable tier."""
+
+    def __init__(self, durable: bool = SESSION_DURABLE):
+        self.durable = durable
+        self._lock = threading.Lock()
+        self._records: Dict[str, SessionRecord] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+        self._wheel = TimerWheel()
+        self._stats = {
+            "created": 0,
+            "expired": 0,
+            "invalidated": 0,
+            "durable_loads": 0,
+            "durable_touches": 0,
+            "durable_errors": 0,
+        }
+
+    def _add(self, record: SessionRecord):
+        self._records[record.session_id] = record
+        if record.user_id is not None:
+            self._by_user.setdefault(record.user_id, set()).add(record.session_id)
+        self._wheel.schedule(record.session_id, record.expires_at())
+
+    def _remove(self, session_id: str) -> Optional[SessionRecord]:
+        record = self._records.pop(session_id, None)
+        if record is not None and record.user_id is not None:
+            sessions = self._by_user.get(record.user_id)
+            if sessions is not None:
+                sessions.discard(session_id)
+                if not sessions:
+                    del self._by_user[record.user_id]
+        return record
+
+    def _expire(self, now: float):
+        for session_id in self._wheel.advance(now):
+            record = self._records.get(session_id)
+            if record is None:
+                continue
+            if record.expires_at() <= now:
+                self._remove(session_id)
+                self._stats["expired"] += 1
+            else:
+                self._wheel.schedule(session_id, record.expires_at())
+
+    async def get(self, session_id: str) -> Optional[SessionRecord]:
+        """Return the live session for ``session_id`` and mark it as used."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            record = self._records.get(session_id)
+
+        if record is None and self.durable:
+            record = await self._load(session_id, now)
+        if record is None:
+            return None
+
+        if record.expires_at() <= now:
+            with self._lock:
+                self._remove(session_id)
+                self._stats["expired"] += 1
+            return None
+
+        record.last_seen = now
+        if self.durable and now - record.persisted_at >= SESSION_TOUCH_SECONDS:
+            if not await self._touch(record, now):
+                return None
+        return record
+
+    async def create(self, session: dict) -> SessionRecord:
+        """Start a new session holding ``session``."""
+        now = time.time()
+        record = SessionRecord.from_dict(secrets.token_urlsafe(32), session, now)
+        if self.durable:
+            await run_transaction(_insert_session, _digest(record.session_id), record, now)
+        with self._lock:
+            self._add(record)
+            self._stats["created"] += 1
+        return record
+
+    async def update(self, record: SessionRecord, session: dict):
+        """Replace the contents of an existing session."""
+        updated = SessionRecord.from_dict(record.session_id, session, record.created_at)
+        updated.last_seen = record.last_seen
+        updated.persisted_at = record.persisted_at
+        if self.durable:
+            await execute(
+                "UPDATE user_session SET user_id = ?, username = ?, data = ? WHERE id = ?",
+                (updated.user_id, updated.username, _dump(updated.data), _digest(record.session_id))
+            )
+        with self._lock:
+            self._remove(record.session_id)
+            self._add(updated)
+
+    async def delete(self, session_id: str):
+        """End one session."""
+        with self._lock:
+            self._remove(session_id)
+        if self.durable:
+            await execute("DELETE FROM user_session WHERE id = ?", (_digest(session_id),))
+
+    async def invalidate_user(self, user_id: int) -> int:
+        """End every session of ``user_id``; returns how many this process held."""
+        with self._lock:
+            session_ids = list(self._by_user.get(user_id, ()))
+            for session_id in session_ids:
+                self._remove(session_id)
+            self._stats["invalidated"] += len(session_ids)
+        if self.durable:
+            await execute("DELETE FROM user_session WHERE user_id = ?", (user_id,))
+        return len(session_ids)
+
+    async def _load(self, session_id: str, now: float) -> Optional[SessionRecord]:
+        try:
+            row = await fetch_one("""
+                SELECT user_id, username, data, created_at, last_seen
+                FROM user_session
+                WHERE id = ? AND expires_at > ?
+            """, (_digest(session_id), now))
+        except Exception as e:
+            self._stats["durable_errors"] += 1
+            logger.error("Session lookup failed", error=str(e))
+            return None
+        if row is None:
+            return None
+
+        record = SessionRecord(session_id, row[0], row[1], json.loads(row[2]) if row[2] else None, row[3], row[4])
+        with self._lock:
+            self._add(record)
+            self._stats["durable_loads"] += 1
+        return record
+
+    async def _touch(self, record: SessionRecord, now: float) -> bool:
+        """Write last_seen back; returns False if the row was deleted elsewhere."""
+        record.persisted_at = now
+        try:
+            result = await execute(
+                "UPDATE user_session SET last_seen = ?, expires_at = ? WHERE id = ?",
+                (now, record.expires_at(), _digest(record.session_id))
+            )
+        except Exception as e:
+            self._stats["durable_errors"] += 1
+            logger.error("Session touch failed", error=str(e))
+            return True
+        self._stats["durable_touches"] += 1
+        if not result.rowcount:
+            with self._lock:
+                self._remove(record.session_id)
+                self._stats["invalidated"] += 1
+            return False
+        return True
+
+    def stats(self) -> dict:
+        """Return session counts."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "active": len(self._records),
+                "users": len(self._by_user),
+                "durable": self.durable,
+                "idle_seconds": SESSION_IDLE_SECONDS,
+                "max_age_seconds": SESSION_MAX_AGE_SECONDS,
+            })
+        return stats
+
+def _dump(data: Optional[dict]) -> Optional[str]:
+    return json.dumps(data) if data else None
+
+def _insert_session(conn, session_key: str, record: SessionRecord, now: float):
+    conn.execute("DELETE FROM user_session WHERE expires_at <= ?", (now,))
+    conn.execute("""
+        INSERT INTO user_session (id, user_id, username, data, created_at, last_seen, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (session_key, record.user_id, record.username, _dump(record.data),
+          record.created_at, record.last_seen, record.expires_at()))
+
+class ServerSessionMiddleware:
+    """Drop-in replacement for SessionMiddleware backed by a SessionStore.
+
+    Handlers keep using ``request.session`` as a dict. A session is created
+    when it first gets contents, gets a fresh id whenever its user_id
+    changes (so a pre-login id is never reused after login) and is deleted
+    when the handler clears it.
+    """
+
+    def __init__(self, app, store: Optional[SessionStore] = None,
+                 cookie_name: str = SESSION_COOKIE_NAME, https_only: bool = SESSION_COOKIE_SECURE):
+        self.app = app
+        self.store = store
+        self.cookie_name = cookie_name
+        self.security_flags = "httponly; samesite=lax" + ("; secure" if https_only else "")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        store = self.store or get_session_store()
+        session_id = HTTPConnection(scope).cookies.get(self.cookie_name)
+        record = await store.get(session_id) if session_id else None
+        scope["session"] = record.to_dict() if record else {}
+        initial = dict(scope["session"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                session = scope["session"]
+                cookie = None
+                if session != initial:
+                    if not session:
+                        if record is not None:
+                            await store.delete(record.session_id)
+                        cookie = self._cookie("", 0)
+                    elif record is None or session.get("user_id") != record.user_id:
+                        if record is not None:
+                            await store.delete(record.session_id)
+                        created = await store.create(session)
+                        cookie = self._cookie(created.session_id, int(SESSION_MAX_AGE_SECONDS))
+                    else:
+                        await store.update(record, session)
+                elif session_id and record is None:
+                    # Expired or invalidated: drop the stale cookie
+                    cookie = self._cookie("", 0)
+                if cookie is not None:
+                    MutableHeaders(scope=message).append("Set-Cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _cookie(self, value: str, max_age: int) -> str:
+        return f"{self.cookie_name}={value}; path=/; Max-Age={max_age}; {self.security_flags}"
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore()
+    return _store
+
+async def invalidate_user_sessions(user_id: int) -> int:
+    """End every session of ``user_id`` (logout everywhere, deletion)."""
+    return await get_session_store().invalidate_user(user_id)
+
+def get_session_stats() -> dict:
+    """Return session store metrics."""
+    return get_session_store().stats()
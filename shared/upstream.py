@@ -0,0 +1,332 @@
+"""
+Long-lived HTTP clients for calls from the edge to the backend services.
+
+One httpx.AsyncClient per upstream service, created at startup and closed
+at shutdown, so proxied calls reuse keep-alive connections instead of
+opening a new TCP connection each time. Pool limits and timeouts come from
+UPSTREAM_<SETTING>, overridable per service as UPSTREAM_<SERVICE>_<SETTING>
+(e.g. UPSTREAM_AUTH_READ_TIMEOUT=2).
+
+Each client has a circuit breaker, so a failing or slow service gets fast
+503s instead of every caller waiting out the read timeout. GET and HEAD
+requests are retried on connection errors, timeouts and 502/503/504 within
+the shared retry budget, and can be hedged: with HEDGE_DELAY set, a second
+copy is sent if the first has not answered by then, and the first answer
+wins.
+
+Instances are resolved from discovery_service and picked per attempt by the
+service's InstancePool (see shared.balancing), so a retry or hedge can land
+on a different instance than the call it replaces.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import structlog
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from shared.balancing import DiscoveryRefresher, Instance, InstancePool
+from shared.resilience import CircuitBreaker, CircuitOpenError, get_retry_budget
+
+logger = structlog.get_logger()
+
+UPSTREAM_DEFAULTS = {
+    "MAX_CONNECTIONS": 100,
+    "MAX_KEEPALIVE": 20,
+    "KEEPALIVE_EXPIRY": 30.0,
+    "CONNECT_TIMEOUT": 2.0,
+    "READ_TIMEOUT": 10.0,
+    "WRITE_TIMEOUT": 10.0,
+    "POOL_TIMEOUT": 2.0,
+    "MAX_RETRIES": 1,
+    "RETRY_BACKOFF": 0.05,
+    "HEDGE_DELAY": 0.0,  # seconds; 0 disables hedging
+    "BREAKER_WINDOW": 10.0,
+    "BREAKER_MIN_CALLS": 20,
+    "BREAKER_ERROR_RATE": 0.5,
+    "BREAKER_SLOW_CALL": 2.0,
+    "BREAKER_SLOW_RATE": 0.8,
+    "BREAKER_OPEN_SECONDS": 5.0,
+    "BREAKER_HALF_OPEN_CALLS": 3,
+    "LB_POLICY": "p2c",
+    "EJECT_AFTER_FAILURES": 3,
+    "EJECT_SECONDS": 10.0,
+}
+
+# Replayable requests, and upstream answers worth retrying
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+RETRYABLE_STATUS_CODES = (502, 503, 504)
+
+def upstream_setting(service: str, name: str):
+    """Read UPSTREAM_<SERVICE>_<NAME>, falling back to UPSTREAM_<NAME>."""
+    default = UPSTREAM_DEFAULTS[name]
+    value = os.getenv(f"UPSTREAM_{service.upper()}_{name}", os.getenv(f"UPSTREAM_{name}"))
+    return type(default)(value) if value is not None else default
+
+class UpstreamClient:
+    """A pooled client for one service plus request and pool metrics."""
+
+    def __init__(self, service: str, base_url: str):
+        self.service = service
+        self.instances = InstancePool(
+            service, [base_url],
+            policy=upstream_setting(service, "LB_POLICY"),
+            eject_after=upstream_setting(service, "EJECT_AFTER_FAILURES"),
+            eject_seconds=upstream_setting(service, "EJECT_SECONDS"),
+        )
+        self.limits = httpx.Limits(
+            max_connections=upstream_setting(service, "MAX_CONNECTIONS"),
+            max_keepalive_connections=upstream_setting(service, "MAX_KEEPALIVE"),
+            keepalive_expiry=upstream_setting(service, "KEEPALIVE_EXPIRY"),
+        )
+        self.timeout = httpx.Timeout(
+            connect=upstream_setting(service, "CONNECT_TIMEOUT"),
+            read=upstream_setting(service, "READ_TIMEOUT"),
+            write=upstream_setting(service, "WRITE_TIMEOUT"),
+            pool=upstream_setting(service, "POOL_TIMEOUT"),
+        )
+        self.max_retries = upstream_setting(service, "MAX_RETRIES")
+        self.retry_backoff = upstream_setting(service, "RETRY_BACKOFF")
+        self.hedge_delay = upstream_setting(service, "HEDGE_DELAY")
+        self.breaker = CircuitBreaker(
+            service,
+            window=upstream_setting(service, "BREAKER_WINDOW"),
+            min_calls=upstream_setting(service, "BREAKER_MIN_CALLS"),
+            error_rate=upstream_setting(service, "BREAKER_ERROR_RATE"),
+            slow_call=upstream_setting(service, "BREAKER_SLOW_CALL"),
+            slow_rate=upstream_setting(service, "BREAKER_SLOW_RATE"),
+            open_seconds=upstream_setting(service, "BREAKER_OPEN_SECONDS"),
+            half_open_calls=upstream_setting(service, "BREAKER_HALF_OPEN_CALLS"),
+        )
+        self._transport = httpx.AsyncHTTPTransport(limits=self.limits)
+        self.client = httpx.AsyncClient(transport=self._transport, timeout=self.timeout)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "pool_timeouts": 0,
+            "in_flight_max": 0,
+            "latency_total": 0.0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+        }
+
+    def _begin(self):
+        with self._lock:
+            self._in_flight += 1
+            self._stats["requests"] += 1
+            self._stats["in_flight_max"] = max(self._stats["in_flight_max"], self._in_flight)
+
+    def _end(self, started: float, error: Optional[Exception] = None):
+        with self._lock:
+            self._in_flight -= 1
+            self._stats["latency_total"] += time.monotonic() - started
+            if error is not None:
+                self._stats["errors"] += 1
+                if isinstance(error, httpx.PoolTimeout):
+                    self._stats["pool_timeouts"] += 1
+
+    async def send(self, method: str, path: str, params=None, headers=None, content=None) -> httpx.Response:
+        """Send a request to an instance and return once the response headers arrive.
+
+        ``content`` may be an async iterator, which is streamed upstream and
+        therefore never retried. The body is left unread; the caller must
+        ``aclose()`` the response.
+        Raises CircuitOpenError without calling the service while its
+        breaker is open. Latency and in-flight counts cover the time to
+        headers of each attempt.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.service, self.breaker.retry_after())
+        budget = get_retry_budget()
+        budget.record_request()
+
+        def build(instance: Instance) -> httpx.Request:
+            return self.client.build_request(
+                method, instance.url + path, params=params, headers=headers, content=content
+            )
+
+        # Streamed bodies cannot be replayed
+        if method not in IDEMPOTENT_METHODS or content is not None:
+            return await self._attempt(build)
+
+        attempt = 0
+        while True:
+            try:
+                response = await (self._hedged(build) if self.hedge_delay > 0 else self._attempt(build))
+            except httpx.TransportError:
+                if not self._may_retry(attempt):
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES or not self._may_retry(attempt):
+                    return response
+                await response.aclose()
+
+            attempt += 1
+            with self._lock:
+                self._stats["retries"] += 1
+            await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+    def _may_retry(self, attempt: int) -> bool:
+        # Budget last: a denied retry should not use up breaker probes
+        return attempt < self.max_retries and self.breaker.allow() and self._spend_or_release()
+
+    def _spend_or_release(self) -> bool:
+        if get_retry_budget().try_spend():
+            return True
+        self.breaker.release()
+        return False
+
+    async def _attempt(self, build: Callable[[Instance], httpx.Request]) -> httpx.Response:
+        """One call the breaker has allowed; records its outcome."""
+        instance = self.instances.acquire()
+        self._begin()
+        started = time.monotonic()
+        try:
+            response = await self.client.send(build(instance), stream=True)
+        except asyncio.CancelledError:
+            self._end(started)
+            self.instances.release(instance, None)
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self._end(started, e)
+            self.instances.release(instance, False)
+            self.breaker.record(False, time.monotonic() - started)
+            raise
+        self._end(started)
+        success = response.status_code < 500
+        self.instances.release(instance, success)
+        self.breaker.record(success, time.monotonic() - started)
+        return response
+
+    async def _hedged(self, build: Callable[[Instance], httpx.Request]) -> httpx.Response:
+        """Send a request, and a copy if no answer comes within hedge_delay."""
+        tasks = [asyncio.ensure_future(self._attempt(build))]
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if done or not (self.breaker.allow() and self._spend_or_release()):
+                winner = tasks[0]
+                return await winner
+
+            with self._lock:
+                self._stats["hedges"] += 1
+            tasks.append(asyncio.ensure_future(self._attempt(build)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    winner = task
+                    if task.exception() is None and task.result().status_code < 500:
+                        if task is not tasks[0]:
+                            with self._lock:
+                                self._stats["hedge_wins"] += 1
+                        return task.result()
+            # Both failed: answer like the one that failed last
+            return winner.result()
+        finally:
+            for task in tasks:
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    await task.result().aclose()
+
+    def stats(self) -> dict:
+        """Return request counters and connection pool utilization."""
+        # httpcore's pool is not exposed by httpx; read it defensively
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = self._in_flight
+        requests = stats["requests"]
+        stats.update({
+            "breaker": self.breaker.stats(),
+            "balancer": self.instances.stats(),
+            "latency_avg": stats["latency_total"] / requests if requests else 0.0,
+            "connections": len(connections),
+            "connections_idle": idle,
+            "max_connections": self.limits.max_connections,
+            "utilization": (len(connections) - idle) / self.limits.max_connections,
+        })
+        return stats
+
+    async def aclose(self):
+        await self.client.aclose()
+
+class UpstreamClients:
+    """Per-service clients, created at startup and closed at shutdown."""
+
+    def __init__(self):
+        self._clients: Dict[str, UpstreamClient] = {}
+        self._urls: Dict[str, str] = {}
+        self._discovery: Optional[DiscoveryRefresher] = None
+
+    async def start(self, service_urls: Dict[str, str]):
+        self._urls = dict(service_urls)
+        for service, url in self._urls.items():
+            if service not in self._clients:
+                self._clients[service] = UpstreamClient(service, url)
+
+        # DISCOVERY_URL="" keeps the static URLs
+        discovery_url = os.getenv("DISCOVERY_URL", self._urls.get("discovery", ""))
+        if discovery_url and self._discovery is None:
+            self._discovery = DiscoveryRefresher(discovery_url, self._discovered_pools)
+            await self._discovery.start()
+        logger.info("Upstream clients started", services=list(self._clients), discovery=discovery_url or None)
+
+    def _discovered_pools(self) -> Dict[str, InstancePool]:
+        return {service: client.instances for service, client in self._clients.items() if service != "discovery"}
+
+    def get(self, service: str) -> Optional[UpstreamClient]:
+        """Return the client for ``service``, creating it if startup has not run."""
+        client = self._clients.get(service)
+        if client is None and service in self._urls:
+            client = self._clients[service] = UpstreamClient(service, self._urls[service])
+        return client
+
+    async def close(self):
+        if self._discovery is not None:
+            await self._discovery.stop()
+            self._discovery = None
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("Upstream client close failed", service=client.service, error=str(e))
+
+    def stats(self) -> dict:
+        stats = {service: client.stats() for service, client in self._clients.items()}
+        if self._discovery is not None:
+            stats["_discovery"] = self._discovery.stats()
+        return stats
+
+_clients = UpstreamClients()
+
+async def start_upstream_clients(service_urls: Dict[str, str]):
+    """Create one pooled client per service and start resolving instances."""
+    await _clients.start(service_urls)
+
+def get_upstream_client(service: str) -> Optional[UpstreamClient]:
+    """Return the pooled client for ``service`` (None if unknown)."""
+    return _clients.get(service)
+
+async def close_upstream_clients():
+    """Close every upstream client and its connections."""
+    await _clients.close()
+
+def get_upstream_stats() -> dict:
+    """Return per-service request and pool metrics."""
+    return _clients.stats()
@@ -0,0 +1,102 @@
+"""
+Per-process cache of logged-in users.
+
+The edge service resolves the session's user (credential joined with
+person) on every page view. Entries are keyed by credential id, expire
+after USER_CACHE_TTL seconds and are evicted least recently used beyond
+USER_CACHE_SIZE; a size of 0 disables the cache.
+
+Handlers that change a person or credential row must call
+``invalidate_person``. Invalidation only reaches this process, so with
+several workers another worker may serve the old row for up to the TTL.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+class UserCache:
+    """TTL + LRU cache of user dicts keyed by credential id.
+
+    ``put`` takes the ``generation`` read before the database lookup and
+    drops the entry if an invalidation happened meanwhile, so a lookup that
+    raced with an update cannot cache the old row.
+    """
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            user, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[user_id]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._stats["hits"] += 1
+            return dict(user)
+
+    def put(self, user_id: int, user: dict, generation: int):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[user_id] = (dict(user), time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate_person(self, person_id: int):
+        """Drop every entry for ``person_id``."""
+        with self._lock:
+            self.generation += 1
+            stale = [key for key, (user, _) in self._entries.items() if user["person_id"] == person_id]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({"size": len(self._entries), "max_size": self.max_size, "ttl": self.ttl})
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+_user_cache = UserCache()
+
+def get_user_cache() -> UserCache:
+    """Return the process-wide user cache."""
+    return _user_cache
+
+def invalidate_person(person_id: int):
+    """Forget cached users for a person whose row was changed or deleted."""
+    _user_cache.invalidate_person(person_id)
+
+def get_user_cache_stats() -> dict:
+    """Return user cache metrics."""
+    return _user_cache.stats()
@@ -0,0 +1,48 @@
+"""
+Shared fixtures for the unit tests.
+
+The database modules read DATABASE_PATH at import time, so it is pointed
+at a throwaway directory before anything from shared/ is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+_DATA_DIR = tempfile.mkdtemp(prefix="recruitment-tests-")
+os.environ["DATABASE_PATH"] = os.path.join(_DATA_DIR, "test.db")
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pytest
+
+from shared.database import DATABASE_PATH, close_database, create_tables, open_connection
+
+@pytest.fixture
+def database():
+    """Path of a freshly created and migrated database."""
+    close_database()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DATABASE_PATH + suffix):
+            os.remove(DATABASE_PATH + suffix)
+    create_tables()
+    yield DATABASE_PATH
+    close_database()
+
+@pytest.fixture
+def conn(database):
+    """Writable connection to the test database, committing each statement."""
+    connection = open_connection(database)
+    connection.isolation_level = None
+    yield connection
+    connection.close()
+
+def add_person(conn, role_id: int = 2, name: str = None) -> int:
+    """Insert a person and return their id."""
+    name = name or f"person{conn.execute('SELECT COUNT(*) FROM person').fetchone()[0] + 1}"
+    return conn.execute(
+        "INSERT INTO person (firstname, lastname, email, role_id) VALUES (?, ?, ?, ?)",
+        (name, "Test", f"{name}@example.com", role_id)
+    ).lastrowid
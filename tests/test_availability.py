@@ -0,0 +1,138 @@
+"""Tests for the availability interval index and applicant search."""
+
+import asyncio
+import random
+from datetime import date
+
+import numpy as np
+import pytest
+
+from conftest import add_person
+from shared import availability
+from shared.availability import (
+    AvailabilityIndex, IntervalIndex, day_number, find_available_people
+)
+
+def brute_force(starts, ends, persons, max_start, min_end):
+    return sorted(p for s, e, p in zip(starts, ends, persons) if s <= max_start and e >= min_end)
+
+@pytest.mark.parametrize("size", [0, 1, 7, 300, 2000])
+def test_interval_query_matches_brute_force(size):
+    rng = random.Random(size)
+    starts = [rng.randrange(0, 1000) for _ in range(size)]
+    ends = [start + rng.randrange(0, 200) for start in starts]
+    persons = list(range(size))
+    index = IntervalIndex(np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64),
+                          np.array(persons, dtype=np.int64))
+
+    for _ in range(50):
+        max_start, min_end = rng.randrange(-10, 1210), rng.randrange(-10, 1210)
+        found = sorted(index.query(max_start, min_end).tolist())
+        assert found == brute_force(starts, ends, persons, max_start, min_end)
+
+def test_day_number_matches_sqlite_julianday(conn):
+    day = date(2024, 2, 29)
+    assert conn.execute("SELECT CAST(julianday(?) AS INTEGER)", (day.isoformat(),)).fetchone()[0] == day_number(day)
+
+def add_window(conn, person_id: int, start: str, end: str) -> int:
+    return conn.execute(
+        "INSERT INTO availability (person_id, from_date, to_date) VALUES (?, ?, ?)",
+        (person_id, start, end)
+    ).lastrowid
+
+def find(index, start: str, end: str, mode: str = "contains") -> list:
+    return index.find(day_number(date.fromisoformat(start)), day_number(date.fromisoformat(end)), mode).tolist()
+
+def test_contains_and_overlaps_modes(conn):
+    summer, july, late = add_person(conn), add_person(conn), add_person(conn)
+    add_window(conn, summer, "2025-06-01", "2025-08-31")
+    add_window(conn, july, "2025-07-01", "2025-07-31")
+    add_window(conn, late, "2025-08-15", "2025-09-30")
+    add_window(conn, late, "2025-09-30", "2025-09-01")  # inverted rows are ignored
+
+    index = AvailabilityIndex()
+    index.refresh(conn)
+    assert find(index, "2025-07-01", "2025-07-31") == [summer, july]
+    assert find(index, "2025-07-15", "2025-08-20") == [summer]
+    assert find(index, "2025-07-15", "2025-08-20", "overlaps") == [summer, july, late]
+    assert find(index, "2025-10-01", "2025-10-02", "overlaps") == []
+    with pytest.raises(ValueError):
+        find(index, "2025-07-01", "2025-07-02", "during")
+
+def test_incremental_refresh_overlays_changed_people(conn):
+    stays, moves, arrives = add_person(conn), add_person(conn), add_person(conn)
+    add_window(conn, stays, "2025-01-01", "2025-12-31")
+    window = add_window(conn, moves, "2025-01-01", "2025-12-31")
+
+    index = AvailabilityIndex()
+    index.refresh(conn)
+    assert index.refresh(conn) == 0
+
+    conn.execute("UPDATE availability SET from_date = '2026-01-01', to_date = '2026-12-31' WHERE id = ?", (window,))
+    add_window(conn, arrives, "2025-03-01", "2025-03-31")
+    assert index.refresh(conn) == 2
+    assert index.stats()["rebuilds"] == 1
+    assert index.stats()["pending_people"] == 2
+
+    assert find(index, "2025-03-10", "2025-03-20") == [stays, arrives]
+    assert find(index, "2026-02-01", "2026-02-02") == [moves]
+
+    conn.execute("DELETE FROM availability WHERE person_id = ?", (stays,))
+    index.refresh(conn)
+    assert find(index, "2025-03-10", "2025-03-20") == [arrives]
+
+def test_pending_people_are_folded_into_a_rebuild(conn, monkeypatch):
+    monkeypatch.setattr(availability, "REBUILD_MIN_PENDING", 2)
+    people = [add_person(conn) for _ in range(3)]
+    index = AvailabilityIndex()
+    index.refresh(conn)
+
+    for person_id in people:
+        add_window(conn, person_id, "2025-05-01", "2025-05-31")
+    index.refresh(conn)
+    assert index.stats()["rebuilds"] == 2
+    assert index.stats()["pending_people"] == 0
+    assert find(index, "2025-05-02", "2025-05-03") == people
+
+def test_search_returns_applicants_with_the_requested_status(conn, monkeypatch):
+    monkeypatch.setattr(availability, "_index", None)
+    monkeypatch.setattr(availability, "REFRESH_CHUNK_SIZE", 2)
+    recruiter = add_person(conn, role_id=1)
+    applicants = [add_person(conn) for _ in range(4)]
+    for person_id in [recruiter] + applicants:
+        add_window(conn, person_id, "2025-06-01", "2025-06-30")
+    job = conn.execute(
+        "INSERT INTO job_posting (title, description, posted_by) VALUES ('Backend', 'x', ?)", (recruiter,)
+    ).lastrowid
+    for person_id, status_id in ((applicants[0], 2), (applicants[1], 1), (applicants[2], 2), (recruiter, 2)):
+        conn.execute("INSERT INTO application (person_id, job_posting_id, status_id) VALUES (?, ?, ?)",
+                     (person_id, job, status_id))
+
+    async def scenario():
+        window = (date(2025, 6, 10), date(2025, 6, 20))
+        assert (await find_available_people(*window)).tolist() == applicants
+        assert (await find_available_people(*window, status_id=2)).tolist() == [applicants[0], applicants[2]]
+        assert (await find_available_people(date(2025, 7, 1), date(2025, 7, 2), status_id=2)).tolist() == []
+
+    asyncio.run(scenario())
+
+def test_refresh_reads_the_database_without_holding_the_search_lock(conn):
+    person = add_person(conn)
+    add_window(conn, person, "2025-01-01", "2025-01-31")
+    index = AvailabilityIndex()
+    lock_free_during_reads = []
+
+    class ObservedConnection:
+        def execute(self, *args):
+            acquired = index._lock.acquire(blocking=False)
+            if acquired:
+                index._lock.release()
+            lock_free_during_reads.append(acquired)
+            return conn.execute(*args)
+
+    index.refresh(ObservedConnection())
+    add_window(conn, person, "2025-03-01", "2025-03-31")
+    index.refresh(ObservedConnection())
+
+    assert len(lock_free_during_reads) >= 4 and all(lock_free_during_reads)
+    assert find(index, "2025-03-02", "2025-03-03") == [person]
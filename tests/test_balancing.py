@@ -0,0 +1,145 @@
+"""Tests for instance picking, passive ejection and discovery refresh."""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from shared import balancing
+from shared.balancing import DiscoveryRefresher, InstancePool, discovery_name
+
+URLS = ["http://a:1", "http://b:1", "http://c:1"]
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(balancing, "time", SimpleNamespace(monotonic=clock, time=clock))
+    return clock
+
+def fail(pool: InstancePool, url: str, times: int):
+    instance = next(i for i in pool._instances if i.url == url)
+    for _ in range(times):
+        instance.outstanding += 1
+        pool.release(instance, False)
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        InstancePool("auth", URLS, policy="round_robin")
+
+def test_least_outstanding_spreads_calls_evenly():
+    pool = InstancePool("auth", URLS, policy="least_outstanding")
+    picked = [pool.acquire().url for _ in range(30)]
+    # Never more than one outstanding call above the least loaded instance
+    assert max(picked.count(url) for url in URLS) - min(picked.count(url) for url in URLS) <= 1
+
+def test_least_outstanding_picks_the_idle_instance():
+    pool = InstancePool("auth", URLS, policy="least_outstanding")
+    held = [pool.acquire() for _ in range(3)]
+    pool.release(held[1], True)
+    assert pool.acquire() is held[1]
+
+def test_p2c_never_picks_the_busier_of_its_two_choices():
+    pool = InstancePool("auth", URLS, policy="p2c")
+    busy = pool._instances[0]
+    busy.outstanding = 5
+    assert all(pool.acquire() is not busy for _ in range(5))
+
+def test_trailing_slashes_are_ignored():
+    pool = InstancePool("auth", ["http://a:1/"])
+    assert pool.acquire().url == "http://a:1"
+
+def test_instance_is_ejected_after_consecutive_failures(clock):
+    pool = InstancePool("auth", URLS, policy="least_outstanding", eject_after=3, eject_seconds=10)
+    fail(pool, "http://a:1", 2)
+    a = pool._instances[0]
+    a.outstanding += 1
+    pool.release(a, True)  # a success resets the streak
+    fail(pool, "http://a:1", 2)
+    assert not pool.stats()["instances"][0]["ejected"]
+
+    fail(pool, "http://a:1", 1)
+    assert pool.stats()["instances"][0]["ejected"]
+    assert all(pool.acquire().url != "http://a:1" for _ in range(20))
+
+    clock.advance(10)
+    assert not pool.stats()["instances"][0]["ejected"]
+
+def test_repeat_ejections_back_off_longer(clock):
+    pool = InstancePool("auth", URLS, eject_after=1, eject_seconds=10)
+    fail(pool, "http://a:1", 1)
+    clock.advance(10)
+    fail(pool, "http://a:1", 1)
+    clock.advance(10)
+    assert pool.stats()["instances"][0]["ejected"]
+    clock.advance(10)
+    assert not pool.stats()["instances"][0]["ejected"]
+    assert pool.stats()["instances"][0]["ejections"] == 2
+
+def test_all_instances_are_used_when_all_are_ejected(clock):
+    pool = InstancePool("auth", URLS, eject_after=1)
+    for url in URLS:
+        fail(pool, url, 1)
+    assert {pool.acquire().url for _ in range(30)} == set(URLS)
+
+def test_abandoned_calls_do_not_count_as_failures():
+    pool = InstancePool("auth", URLS[:1], eject_after=1)
+    instance = pool.acquire()
+    pool.release(instance, None)
+    assert instance.outstanding == 0
+    assert instance.failures == 0
+    assert not pool.stats()["instances"][0]["ejected"]
+
+def test_set_urls_keeps_state_of_known_instances(clock):
+    pool = InstancePool("auth", URLS[:2], eject_after=1)
+    fail(pool, "http://a:1", 1)
+    busy = pool.acquire()
+
+    pool.set_urls(["http://a:1/", "http://b:1", "http://d:1"])
+    stats = {i["url"]: i for i in pool.stats()["instances"]}
+    assert sorted(stats) == ["http://a:1", "http://b:1", "http://d:1"]
+    assert stats["http://a:1"]["ejected"]
+    assert stats[busy.url]["outstanding"] == 1
+    assert stats["http://d:1"]["requests"] == 0
+
+def test_discovery_name(monkeypatch):
+    assert discovery_name("auth") == "auth-service"
+    assert discovery_name("job_application") == "job-application-service"
+    monkeypatch.setenv("DISCOVERY_NAME_AUTH", "login")
+    assert discovery_name("auth") == "login"
+
+def test_refresh_resolves_passing_instances_and_keeps_lists_on_error():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/services/auth-service":
+            return httpx.Response(200, json={"instances": [
+                {"address": "10.0.0.1", "port": 8001},
+                {"address": "10.0.0.2", "port": 8001, "status": "critical"},
+                {"port": 8002},
+            ]})
+        return httpx.Response(503)
+
+    pools = {"auth": InstancePool("auth", ["http://static:1"]), "jobs": InstancePool("jobs", ["http://static:2"])}
+    refresher = DiscoveryRefresher("http://discovery/", lambda: pools)
+
+    async def scenario():
+        refresher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            await refresher.refresh()
+        finally:
+            await refresher._client.aclose()
+
+    asyncio.run(scenario())
+    assert [i["url"] for i in pools["auth"].stats()["instances"]] == ["http://10.0.0.1:8001", "http://localhost:8002"]
+    assert [i["url"] for i in pools["jobs"].stats()["instances"]] == ["http://static:2"]
+    assert refresher.stats()["errors"] == 1
+    assert refresher.stats()["refreshes"] == 1
@@ -0,0 +1,67 @@
+"""Tests for the query-plan checker's plan rules and query extraction."""
+
+import pytest
+
+from scripts.check_query_plans import explain, extract_queries, plan_problems
+from shared.database import open_connection
+
+TABLES = {"application", "job_posting", "person", "role"}
+
+@pytest.mark.parametrize("step, filtered, problems", [
+    ("SCAN application", False, ["full scan of application"]),
+    ("SCAN recent AS r", True, []),  # a CTE, not a table
+    ("SCAN application AS a", True, ["full scan of application"]),
+    ("SCAN role", True, []),
+    ("SEARCH application USING INDEX idx_application_job_posting (job_posting_id=?)", True, []),
+    ("SEARCH person USING INTEGER PRIMARY KEY (rowid=?)", True, []),
+    ("SCAN application USING INDEX idx_application_person_applied", True,
+     ["full scan of application via index idx_application_person_applied"]),
+    ("SCAN application USING COVERING INDEX idx_application_applied_date", True,
+     ["full scan of application via index idx_application_applied_date"]),
+    # ORDER BY ... LIMIT over an index without a filter reads only the top rows
+    ("SCAN application USING INDEX idx_application_applied_date", False, []),
+    ("SCAN (subquery-1)", True, []),
+])
+def test_scans(step, filtered, problems):
+    assert plan_problems([step], TABLES, filtered) == problems
+
+def test_partial_index_scan_is_its_own_filter():
+    plan = ["SCAN job_posting USING INDEX idx_job_posting_active_created"]
+    assert plan_problems(plan, TABLES, True, frozenset({"idx_job_posting_active_created"})) == []
+    assert plan_problems(plan, TABLES, True) == [
+        "full scan of job_posting via index idx_job_posting_active_created"
+    ]
+
+@pytest.mark.parametrize("step, problem", [
+    ("USE TEMP B-TREE FOR ORDER BY", "temp B-tree for ORDER BY"),
+    ("USE TEMP B-TREE FOR GROUP BY", "temp B-tree for GROUP BY"),
+    ("USE TEMP B-TREE FOR DISTINCT", "temp B-tree for DISTINCT"),
+    ("USE TEMP B-TREE FOR RIGHT PART OF ORDER BY", "temp B-tree for RIGHT PART OF ORDER BY"),
+    ("SEARCH a USING AUTOMATIC COVERING INDEX (person_id=?)",
+     "automatic index: SEARCH a USING AUTOMATIC COVERING INDEX (person_id=?)"),
+])
+def test_temp_btrees_and_automatic_indexes(step, problem):
+    assert plan_problems([step], TABLES) == [problem]
+
+def test_nested_plan_lines_are_checked(database):
+    conn = open_connection(database)
+    try:
+        plan = explain(conn, "SELECT DISTINCT person_id FROM application WHERE cover_letter = ?", ["x"])
+        assert plan_problems(plan, TABLES, True)
+        plan = explain(conn, "SELECT id FROM application WHERE person_id = ?", [1])
+        assert plan_problems(plan, TABLES, True) == []
+    finally:
+        conn.close()
+
+def test_extract_queries_names_queries_by_scope(tmp_path):
+    source = tmp_path / "module.py"
+    source.write_text(
+        'LISTING = """SELECT id FROM job_posting WHERE status = \'active\'"""\n'
+        "def handler(ids):\n"
+        '    first = "SELECT * FROM person WHERE id = ?"\n'
+        '    second = f"SELECT * FROM person WHERE id IN ({ids})"\n'
+        '    not_sql = "hello"\n'
+    )
+    queries = {query.id.split(":")[-1]: query for query in extract_queries(str(source))}
+    assert sorted(queries) == ["LISTING", "handler", "handler#2"]
+    assert queries["handler#2"].dynamic and not queries["handler"].dynamic
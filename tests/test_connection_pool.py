@@ -0,0 +1,114 @@
+"""Tests for the read-only connection pool."""
+
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from shared.database import ConnectionPool, PoolTimeout, PooledConnection, fetch_value, get_pool
+
+@pytest.fixture
+def pool(database):
+    pool = ConnectionPool(database, max_size=2, timeout=0.2, read_only=True)
+    yield pool
+    pool.close()
+
+@pytest.fixture
+def checkout_in_threads(pool):
+    """Check connections out from threads kept alive until the test ends.
+
+    Checkouts are owned per thread ident, and a finished thread's ident
+    may be reused by the next one.
+    """
+    done = threading.Event()
+    threads = []
+
+    def checkout(count: int) -> list:
+        held = []
+        for _ in range(count):
+            acquired = threading.Event()
+
+            def hold():
+                held.append(pool.acquire())
+                acquired.set()
+                done.wait(5)
+
+            thread = threading.Thread(target=hold)
+            thread.start()
+            threads.append(thread)
+            assert acquired.wait(5)
+        return held
+
+    yield checkout
+    done.set()
+    for thread in threads:
+        thread.join(5)
+
+def test_read_only_connections_refuse_writes(pool):
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM role").fetchone()[0] > 0
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO role (name) VALUES ('intruder')")
+
+def test_nested_checkouts_share_one_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+        assert pool.stats()["in_use"] == 1
+    assert pool.stats()["in_use"] == 0
+    assert pool.stats()["idle"] == 1
+
+def test_released_connections_are_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert pool.stats()["created"] == 1
+
+def test_checkout_times_out_when_the_pool_is_exhausted(pool, checkout_in_threads):
+    held = checkout_in_threads(2)
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+    pool.release(held[0])
+    with pool.connection():
+        assert pool.stats()["size"] == 2
+
+def test_waiting_checkout_gets_a_released_connection(pool, checkout_in_threads):
+    pool.timeout = 5
+    held = checkout_in_threads(2)
+    threading.Timer(0.05, pool.release, (held[1],)).start()
+    with pool.connection() as conn:
+        assert conn is held[1]
+    assert pool.stats()["waits"] == 1
+
+def test_open_transactions_are_rolled_back_on_release(pool):
+    conn = pool.acquire()
+    conn.execute("BEGIN")
+    conn.execute("SELECT 1")
+    pool.release(conn)
+    assert not conn.in_transaction
+
+def test_closed_pool_refuses_checkouts(pool):
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+def test_pooled_connection_close_returns_it(pool):
+    proxy = PooledConnection(pool, pool.acquire())
+    assert proxy.execute("SELECT 1").fetchone() == (1,)
+    proxy.close()
+    assert pool.stats()["in_use"] == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        proxy.execute("SELECT 1")
+
+def test_concurrent_tasks_get_their_own_connections(database):
+    async def scenario():
+        return await asyncio.gather(*(fetch_value("SELECT COUNT(*) FROM role") for _ in range(20)))
+
+    counts = asyncio.run(scenario())
+    assert len(set(counts)) == 1
+    stats = get_pool().stats()
+    assert stats["read_only"] and stats["in_use"] == 0
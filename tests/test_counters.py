@@ -0,0 +1,102 @@
+"""Tests for the trigger-maintained dashboard counters."""
+
+import pytest
+
+from conftest import add_person
+from shared.migrations import apply_migrations, rebuild_derived_tables
+
+def nonzero(rows) -> dict:
+    return {key: value for key, value in rows if value}
+
+def counters(conn) -> dict:
+    stat = dict(conn.execute("SELECT name, value FROM stat_counter"))
+    return {
+        "active_jobs": stat["active_jobs"],
+        "total_applications": stat["total_applications"],
+        "roles": nonzero(conn.execute("SELECT role_id, persons FROM role_counter")),
+        "jobs": nonzero(conn.execute("SELECT job_posting_id, applications FROM job_counter")),
+        "postings": nonzero(conn.execute("SELECT person_id, job_postings FROM recruiter_counter")),
+        "received": nonzero(conn.execute("SELECT person_id, applications_received FROM recruiter_counter")),
+    }
+
+def counts(conn) -> dict:
+    return {
+        "active_jobs": conn.execute("SELECT COUNT(*) FROM job_posting WHERE status = 'active'").fetchone()[0],
+        "total_applications": conn.execute("SELECT COUNT(*) FROM application").fetchone()[0],
+        "roles": dict(conn.execute("SELECT role_id, COUNT(*) FROM person GROUP BY role_id")),
+        "jobs": dict(conn.execute("SELECT job_posting_id, COUNT(*) FROM application GROUP BY job_posting_id")),
+        "postings": dict(conn.execute("SELECT posted_by, COUNT(*) FROM job_posting GROUP BY posted_by")),
+        "received": dict(conn.execute("""
+            SELECT j.posted_by, COUNT(*) FROM application a
+            JOIN job_posting j ON j.id = a.job_posting_id GROUP BY j.posted_by
+        """)),
+    }
+
+def assert_counters_match(conn):
+    assert counters(conn) == counts(conn)
+
+def add_job(conn, poster: int, status="active") -> int:
+    return conn.execute(
+        "INSERT INTO job_posting (title, description, posted_by, status) VALUES ('Job', 'x', ?, ?)",
+        (poster, status)
+    ).lastrowid
+
+def apply(conn, person_id: int, job_id: int) -> int:
+    return conn.execute(
+        "INSERT INTO application (person_id, job_posting_id) VALUES (?, ?)", (person_id, job_id)
+    ).lastrowid
+
+@pytest.fixture
+def board(conn):
+    alice, bob = add_person(conn, role_id=1), add_person(conn, role_id=1)
+    applicants = [add_person(conn) for _ in range(3)]
+    jobs = [add_job(conn, alice), add_job(conn, alice), add_job(conn, bob, status="inactive")]
+    for person_id in applicants:
+        apply(conn, person_id, jobs[0])
+    apply(conn, applicants[0], jobs[2])
+    return {"alice": alice, "bob": bob, "applicants": applicants, "jobs": jobs}
+
+def test_inserts_are_counted(conn, board):
+    assert_counters_match(conn)
+    assert counters(conn)["active_jobs"] == 2
+
+def test_deletes_are_counted(conn, board):
+    conn.execute("DELETE FROM application WHERE person_id = ?", (board["applicants"][1],))
+    conn.execute("DELETE FROM application WHERE job_posting_id = ?", (board["jobs"][2],))
+    conn.execute("DELETE FROM job_posting WHERE id = ?", (board["jobs"][2],))
+    conn.execute("DELETE FROM person WHERE id = ?", (board["applicants"][2],))
+    assert_counters_match(conn)
+
+def test_moves_between_jobs_roles_and_owners_are_counted(conn, board):
+    conn.execute("UPDATE application SET job_posting_id = ? WHERE person_id = ?",
+                 (board["jobs"][1], board["applicants"][1]))
+    conn.execute("UPDATE person SET role_id = 1 WHERE id = ?", (board["applicants"][2],))
+    conn.execute("UPDATE job_posting SET posted_by = ? WHERE id = ?", (board["bob"], board["jobs"][0]))
+    assert_counters_match(conn)
+
+@pytest.mark.parametrize("statuses", [
+    ["inactive", "active", "inactive"],
+    ["active", "active"],          # unchanged
+    ["inactive", None, "closed"],  # between inactive states, NULL included
+    [None, "active", None],
+])
+def test_status_changes_keep_active_jobs_exact(conn, board, statuses):
+    for status in statuses:
+        conn.execute("UPDATE job_posting SET status = ? WHERE id = ?", (status, board["jobs"][1]))
+        assert_counters_match(conn)
+
+def test_rebuild_recomputes_drifted_counters(conn, board):
+    conn.execute("UPDATE stat_counter SET value = -5 WHERE name IN ('active_jobs', 'total_applications')")
+    conn.execute("DELETE FROM job_counter")
+    conn.execute("UPDATE role_counter SET persons = 99")
+    conn.execute("INSERT OR REPLACE INTO role_counter (role_id, persons) VALUES (3, 4)")  # nobody has role 3
+    conn.execute("UPDATE recruiter_counter SET job_postings = 0, applications_received = 7")
+
+    rebuild_derived_tables(conn)
+    assert_counters_match(conn)
+
+def test_upgrade_repairs_active_jobs_drifted_by_null_statuses(conn, board):
+    conn.execute("UPDATE stat_counter SET value = -2 WHERE name = 'active_jobs'")
+    conn.execute("PRAGMA user_version = 11")
+    apply_migrations(conn)
+    assert_counters_match(conn)
@@ -0,0 +1,23 @@
+"""Tests for the synthetic dataset generator's planning."""
+
+import pytest
+
+from scripts.generate_dataset import main, split_chunks
+
+@pytest.mark.parametrize("applicants, applications, size", [
+    (30, 300, 7),  # scale 0.003
+    (123, 1230, 7), (5, 3, 2), (7, 0, 3), (10_000, 100_000, 20_000), (45_001, 450_010, 20_000),
+])
+def test_chunks_add_up_to_the_targets(applicants, applications, size):
+    chunks = split_chunks(applicants, applications, size)
+    assert sum(count for _, count, _ in chunks) == applicants
+    assert sum(share for _, _, share in chunks) == applications
+    assert [offset for offset, _, _ in chunks] == list(range(0, applicants, size))
+    # Each chunk gets its proportional share, give or take rounding
+    for _, count, share in chunks:
+        assert abs(share - applications * count / applicants) <= 1
+
+def test_database_must_be_named(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["generate_dataset.py", "--scale", "0.01"])
+    with pytest.raises(SystemExit):
+        main()
@@ -0,0 +1,144 @@
+"""Tests for password hashing on the process pool and rehash on login."""
+
+import asyncio
+import time
+
+import bcrypt
+import pytest
+
+from conftest import add_person
+from edge_service.main import authenticate_user
+from shared import hashing, security
+from shared.hashing import (
+    HashingOverloaded, HashingPool, close_hashing_pool,
+    get_password_hash_async, schedule_rehash, verify_password_async
+)
+from shared.security import calibrate_bcrypt_cost, get_hash_cost
+
+@pytest.fixture
+def fast_bcrypt(monkeypatch):
+    """Cheap work factor for the process-wide pool, closed afterwards."""
+    monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+    yield
+    close_hashing_pool()
+
+def test_hash_and_verify_match_direct_bcrypt(fast_bcrypt):
+    async def scenario():
+        hashed = await get_password_hash_async("Secret123")
+        return hashed, await verify_password_async("Secret123", hashed), \
+            await verify_password_async("wrong", hashed)
+
+    hashed, right, wrong = asyncio.run(scenario())
+    assert hashed.startswith("$2b$04$")
+    assert bcrypt.checkpw(b"Secret123", hashed.encode())
+    assert right is True and wrong is False
+
+    # Hashes made outside the pool verify inside it
+    direct = bcrypt.hashpw(b"Other456", bcrypt.gensalt(rounds=4)).decode()
+    assert asyncio.run(verify_password_async("Other456", direct)) is True
+    assert asyncio.run(verify_password_async("Other456", "not-a-hash")) is False
+
+def test_full_queue_rejects_new_calls():
+    pool = HashingPool(workers=1, max_pending=2)
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(time.sleep, 0.3)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(HashingOverloaded):
+            await pool.run(time.sleep, 0)
+        await asyncio.gather(*running)
+        # Capacity comes back once calls finish
+        await pool.run(time.sleep, 0)
+
+    try:
+        asyncio.run(scenario())
+        stats = pool.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 3
+        assert stats["pending"] == 0
+    finally:
+        pool.close()
+
+def test_failures_release_their_slot():
+    pool = HashingPool(workers=1, max_pending=1)
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await pool.run(int, "not a number")
+        assert await pool.run(int, "7") == 7
+
+    try:
+        asyncio.run(scenario())
+        assert pool.stats()["failed"] == 1
+    finally:
+        pool.close()
+
+def add_credential(conn, username: str, password: str, rounds: int) -> int:
+    person_id = add_person(conn, name=username)
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+    return conn.execute(
+        "INSERT INTO credential (person_id, username, password) VALUES (?, ?, ?)",
+        (person_id, username, hashed)
+    ).lastrowid
+
+def stored_hash(conn, credential_id: int) -> str:
+    return conn.execute("SELECT password FROM credential WHERE id = ?", (credential_id,)).fetchone()[0]
+
+def login(username: str, password: str):
+    async def scenario():
+        user = await authenticate_user(username, password)
+        await asyncio.gather(*hashing._rehash_tasks)
+        return user
+
+    return asyncio.run(scenario())
+
+@pytest.fixture
+def target_cost(monkeypatch, fast_bcrypt):
+    monkeypatch.setattr(security, "BCRYPT_ROUNDS", 5)
+    return 5
+
+def test_login_rehashes_a_cheaper_hash(conn, target_cost):
+    credential_id = add_credential(conn, "legacy", "Secret123", rounds=4)
+    before = hashing.get_rehash_stats()["rehashed"]
+
+    assert login("legacy", "Secret123")["id"] == credential_id
+    rehashed = stored_hash(conn, credential_id)
+    assert get_hash_cost(rehashed) == target_cost
+    assert bcrypt.checkpw(b"Secret123", rehashed.encode())
+    assert hashing.get_rehash_stats()["rehashed"] == before + 1
+    assert login("legacy", "Secret123") is not None
+
+def test_hash_at_target_cost_is_left_alone(conn, target_cost):
+    credential_id = add_credential(conn, "current", "Secret123", rounds=target_cost)
+    original = stored_hash(conn, credential_id)
+    assert login("current", "Secret123") is not None
+    assert stored_hash(conn, credential_id) == original
+
+def test_failed_login_does_not_rehash(conn, target_cost):
+    credential_id = add_credential(conn, "guarded", "Secret123", rounds=4)
+    original = stored_hash(conn, credential_id)
+    assert login("guarded", "wrong") is None
+    assert stored_hash(conn, credential_id) == original
+
+def test_rehash_never_overwrites_a_changed_password(conn, target_cost):
+    credential_id = add_credential(conn, "changing", "Secret123", rounds=4)
+    old_hash = stored_hash(conn, credential_id)
+    conn.execute("UPDATE credential SET password = ? WHERE id = ?",
+                 (bcrypt.hashpw(b"NewPass456", bcrypt.gensalt(rounds=4)).decode(), credential_id))
+
+    async def scenario():
+        assert schedule_rehash(credential_id, "Secret123", old_hash)
+        await asyncio.gather(*hashing._rehash_tasks)
+
+    asyncio.run(scenario())
+    assert bcrypt.checkpw(b"NewPass456", stored_hash(conn, credential_id).encode())
+
+def test_calibration_picks_the_highest_cost_under_budget(monkeypatch):
+    monkeypatch.setattr(security, "BCRYPT_MIN_ROUNDS", 4)
+    monkeypatch.setattr(security, "BCRYPT_MAX_ROUNDS", 6)
+    rounds, timings = calibrate_bcrypt_cost(max_ms=10_000, samples=1)
+    assert rounds == 6 and sorted(timings) == [4, 5, 6]
+
+    # Never below the floor, however small the budget
+    rounds, timings = calibrate_bcrypt_cost(max_ms=0.0001, samples=1)
+    assert rounds == 4 and list(timings) == [4]
@@ -0,0 +1,172 @@
+"""Tests for the MySQL dump importer's parsing, translation and loading."""
+
+import sqlite3
+
+import pytest
+
+from scripts.import_mysql_dump import (
+    DumpConflictError, DumpImporter, import_dumps, iter_statements,
+    parse_insert, translate_create_table, translate_insert
+)
+
+def statements(text: str):
+    return list(iter_statements(text.splitlines(keepends=True)))
+
+def test_semicolons_inside_strings_and_comments_do_not_split():
+    dump = (
+        "-- a comment; not a statement\n"
+        "INSERT INTO `t` VALUES (1,'a;b'),(2,'it\\'s; fine');\n"
+        "/* block; comment */ DROP TABLE IF EXISTS `t`;\n"
+        "# hash comment;\n"
+        "SELECT 1;\n"
+    )
+    assert statements(dump) == [
+        "INSERT INTO `t` VALUES (1,'a;b'),(2,'it\\'s; fine')",
+        "DROP TABLE IF EXISTS `t`",
+        "SELECT 1",
+    ]
+
+def test_strings_spanning_lines_are_kept_whole():
+    dump = "INSERT INTO t VALUES ('first\nsecond; still inside\n');\nSELECT 2;\n"
+    assert statements(dump) == ["INSERT INTO t VALUES ('first\nsecond; still inside\n')", "SELECT 2"]
+
+def test_final_statement_without_terminator_is_yielded():
+    assert statements("SELECT 1;\nSELECT 2") == ["SELECT 1", "SELECT 2"]
+
+def test_dashes_without_space_are_not_comments():
+    assert statements("SELECT 1--1;\n") == ["SELECT 1--1"]
+
+def test_translate_insert_rewrites_escapes_and_hex_literals():
+    table, sql = translate_insert("INSERT INTO `t` VALUES (1,'it\\'s\\n',0x4142,NULL)")
+    assert table == "t"
+    assert sql == "INSERT INTO \"t\" VALUES (1,'it''s\n',X'4142',NULL)"
+
+def test_translate_insert_keeps_plain_values_untouched():
+    table, sql = translate_insert("INSERT INTO `t` VALUES (1,'plain','0x not hex')")
+    assert sql == "INSERT INTO \"t\" VALUES (1,'plain','0x not hex')"
+
+@pytest.mark.parametrize("statement, expected", [
+    ("INSERT IGNORE INTO `t` (`a`,`b`) VALUES (1,'x')", "INSERT OR IGNORE INTO \"legacy_t\" (\"a\", \"b\") VALUES (1,'x')"),
+    ("REPLACE INTO t VALUES (1,'x')", "INSERT OR REPLACE INTO \"legacy_t\" VALUES (1,'x')"),
+])
+def test_translate_insert_maps_conflict_handling_and_prefix(statement, expected):
+    assert translate_insert(statement, "legacy_")[1] == expected
+
+def test_translated_literals_round_trip_through_sqlite():
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE "t" (a, b, c)')
+    conn.execute(translate_insert("INSERT INTO t VALUES (1,'tab\\there \\\\ quote\\\" end',0x00ff)")[1])
+    assert conn.execute("SELECT a, b, c FROM t").fetchone() == (1, 'tab\there \\ quote" end', b"\x00\xff")
+
+def test_parse_insert_binds_every_value_type():
+    table, sql, rows = parse_insert(
+        "INSERT INTO `t` VALUES (1,'a\\0b',-2.5e3,NULL,0x00ff),(2,'it''s',3,'',0x)"
+    )
+    assert table == "t"
+    assert sql == 'INSERT INTO "t" VALUES (?,?,?,?,?)'
+    assert rows == [(1, "a\x00b", -2500.0, None, b"\x00\xff"), (2, "it's", 3, "", b"")]
+
+def test_translate_create_table_maps_types_and_defers_indexes():
+    table, create, indexes = translate_create_table(
+        "CREATE TABLE `x` ("
+        "`id` int(11) unsigned NOT NULL AUTO_INCREMENT, "
+        "`price` decimal(10, 2) DEFAULT NULL COMMENT 'net; of tax', "
+        "`owner` int REFERENCES `person` (`id`), "
+        "PRIMARY KEY (`id`), "
+        "UNIQUE KEY `u` (`price`), "
+        "KEY `by_owner` (`owner`, `price`), "
+        "FULLTEXT KEY `f` (`owner`)"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4",
+        "legacy_"
+    )
+    assert table == "x"
+    assert create == (
+        'CREATE TABLE "legacy_x" (\n'
+        '    "id" INTEGER NOT NULL,\n'
+        '    "price" DECIMAL(10,2) DEFAULT NULL,\n'
+        '    "owner" INTEGER REFERENCES "legacy_person" ("id"),\n'
+        '    PRIMARY KEY ("id")\n'
+        ')'
+    )
+    assert indexes == [
+        'CREATE UNIQUE INDEX IF NOT EXISTS "legacy_x_u" ON "legacy_x" ("price")',
+        'CREATE INDEX IF NOT EXISTS "legacy_x_by_owner" ON "legacy_x" ("owner", "price")',
+    ]
+
+def write_dump(path, *tables):
+    """Write a dump that drops, creates and (optionally) fills each table."""
+    lines = []
+    for name, values in tables:
+        lines.append(f"DROP TABLE IF EXISTS `{name}`;")
+        lines.append(f"CREATE TABLE `{name}` (`id` int NOT NULL, PRIMARY KEY (`id`));")
+        if values:
+            lines.append(f"INSERT INTO `{name}` VALUES " + ",".join(f"({v})" for v in values) + ";")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+def test_import_counts_rows_per_table(tmp_path):
+    dump = write_dump(tmp_path / "a.sql", ("person", [1, 2, 3]), ("role", [1]))
+    importer = import_dumps([dump], str(tmp_path / "out.db"), progress=False)
+    assert importer.tables == {"person": 3, "role": 1}
+
+def test_later_dump_may_not_drop_a_table_loaded_earlier(tmp_path):
+    first = write_dump(tmp_path / "a.sql", ("person", [1, 2, 3]))
+    second = write_dump(tmp_path / "b.sql", ("person", []), ("extra", [1]))
+    database = str(tmp_path / "out.db")
+
+    with pytest.raises(DumpConflictError, match="person"):
+        import_dumps([first, second], database, progress=False)
+
+    # Nothing of the conflicting dump is written; the earlier data survives
+    conn = sqlite3.connect(database)
+    assert conn.execute("SELECT COUNT(*) FROM person").fetchone()[0] == 3
+    assert not conn.execute("SELECT name FROM sqlite_master WHERE name = 'extra'").fetchall()
+
+def test_conflicts_are_found_before_the_first_batch_commits(tmp_path):
+    first = write_dump(tmp_path / "a.sql", ("person", [1, 2, 3]))
+    second = write_dump(tmp_path / "b.sql", ("extra", [1, 2, 3, 4]), ("person", [9]))
+    database = str(tmp_path / "out.db")
+
+    with pytest.raises(DumpConflictError) as raised:
+        import_dumps([first, second], database, batch_rows=1, progress=False)
+    assert "stopped partway" not in str(raised.value)
+
+    conn = sqlite3.connect(database)
+    assert conn.execute("SELECT COUNT(*) FROM person").fetchone()[0] == 3
+    assert not conn.execute("SELECT name FROM sqlite_master WHERE name = 'extra'").fetchall()
+
+def test_conflict_found_mid_import_reports_the_committed_rows(tmp_path):
+    first = write_dump(tmp_path / "a.sql", ("person", [1, 2, 3]))
+    second = write_dump(tmp_path / "b.sql", ("extra", [1, 2]))
+    with open(second, "a") as dump:
+        dump.write("INSERT INTO `extra` VALUES (3); DROP TABLE `person`;\n")
+    database = str(tmp_path / "out.db")
+
+    with pytest.raises(DumpConflictError, match="stopped partway.*keeps the 3 rows"):
+        import_dumps([first, second], database, batch_rows=1, progress=False)
+
+    conn = sqlite3.connect(database)
+    assert conn.execute("SELECT COUNT(*) FROM person").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM extra").fetchone()[0] == 3
+
+def test_replace_lets_later_dumps_replace_tables(tmp_path):
+    first = write_dump(tmp_path / "a.sql", ("person", [1, 2, 3]))
+    second = write_dump(tmp_path / "b.sql", ("person", [7]))
+    importer = import_dumps([first, second], str(tmp_path / "out.db"), progress=False, replace=True)
+    assert importer.tables == {"person": 1}
+
+def test_a_dump_may_recreate_its_own_tables(tmp_path):
+    dump = write_dump(tmp_path / "a.sql", ("person", [1]), ("person", [1, 2]))
+    importer = import_dumps([dump], str(tmp_path / "out.db"), progress=False)
+    assert importer.tables == {"person": 2}
+
+def test_service_database_requires_a_prefix(database):
+    with pytest.raises(SystemExit):
+        import_dumps([], database, progress=False)
+
+def test_importer_falls_back_to_bound_rows_for_nul_bytes():
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    importer = DumpImporter(conn, progress=False)
+    importer._apply("CREATE TABLE `t` (`a` varchar(10))")
+    importer._apply("INSERT INTO `t` VALUES ('x\\0y')")
+    assert conn.execute("SELECT a FROM t").fetchone() == ("x\x00y",)
@@ -0,0 +1,79 @@
+"""Tests for the versioned job listing cache and ETag matching."""
+
+import asyncio
+import json
+
+import pytest
+
+from conftest import add_person
+from shared.job_listing import JobListingCache, etag_matches
+
+ETAG = '"jobs-3-0123456789abcdef"'
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ("", False),
+    (ETAG, True),
+    ("W/" + ETAG, True),
+    ("*", True),
+    ('"jobs-2-0123456789abcdef", ' + ETAG, True),
+    ('"jobs-2-0123456789abcdef"', False),
+    ("jobs-3-0123456789abcdef", False),  # unquoted
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, ETAG) is matches
+
+def add_job(conn, poster: int, title: str, status: str = "active", category_id=None) -> int:
+    return conn.execute(
+        "INSERT INTO job_posting (title, description, posted_by, status, category_id) VALUES (?, ?, ?, ?, ?)",
+        (title, f"About {title}", poster, status, category_id)
+    ).lastrowid
+
+def titles(listing) -> list:
+    return sorted(job["title"] for job in json.loads(listing.body)["jobs"])
+
+def test_listing_is_rebuilt_only_when_the_version_moves(conn):
+    poster = add_person(conn, role_id=1)
+    category = conn.execute("INSERT INTO job_category (name) VALUES ('Engineering')").lastrowid
+    job = add_job(conn, poster, "Backend", category_id=category)
+    cache = JobListingCache()
+
+    async def scenario():
+        first = await cache.get()
+        assert titles(first) == ["Backend"]
+        assert (await cache.get()) is first
+        assert cache.stats()["builds"] == 1 and cache.stats()["hits"] == 1
+
+        # Inactive jobs do not change the listing, so no rebuild
+        add_job(conn, poster, "Draft", status="inactive")
+        assert (await cache.get()) is first
+
+        add_job(conn, poster, "Frontend")
+        second = await cache.get()
+        assert titles(second) == ["Backend", "Frontend"]
+        assert second.version > first.version and second.etag != first.etag
+
+        conn.execute("UPDATE job_posting SET status = 'inactive' WHERE id = ?", (job,))
+        third = await cache.get()
+        assert titles(third) == ["Frontend"]
+
+        conn.execute("UPDATE job_posting SET status = 'active' WHERE id = ?", (job,))
+        conn.execute("UPDATE job_category SET name = 'Platform' WHERE id = ?", (category,))
+        fourth = await cache.get()
+        assert [job["category"] for job in json.loads(fourth.body)["jobs"] if job["title"] == "Backend"] == ["Platform"]
+        assert cache.stats()["builds"] == 4
+
+    asyncio.run(scenario())
+
+def test_concurrent_requests_share_one_build(conn):
+    poster = add_person(conn, role_id=1)
+    add_job(conn, poster, "Backend")
+    cache = JobListingCache()
+
+    async def scenario():
+        listings = await asyncio.gather(*(cache.get() for _ in range(10)))
+        assert all(listing is listings[0] for listing in listings)
+
+    asyncio.run(scenario())
+    assert cache.stats()["builds"] == 1
+    assert cache.stats()["jobs"] == 1
@@ -0,0 +1,71 @@
+"""Tests for full-text job search: query building, ranking and filters."""
+
+import asyncio
+
+import pytest
+
+from conftest import add_person
+from edge_service.main import api_search_jobs, build_fts_query
+
+@pytest.mark.parametrize("text, prefix, query", [
+    ("python developer", True, '"python" "developer"*'),
+    ("python developer", False, '"python" "developer"'),
+    ("data* engineer", False, '"data"* "engineer"'),
+    ('"; DROP TABLE job_posting; -- OR NEAR(', True, '"DROP" "TABLE" "job_posting" "OR" "NEAR"*'),
+    ("  ", True, ""),
+])
+def test_build_fts_query_quotes_every_term(text, prefix, query):
+    assert build_fts_query(text, prefix) == query
+
+def add_job(conn, poster: int, title: str, description: str, location: str = "Stockholm",
+            employment_type: str = "full-time", status: str = "active") -> int:
+    return conn.execute(
+        "INSERT INTO job_posting (title, description, posted_by, location, employment_type, status) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (title, description, poster, location, employment_type, status)
+    ).lastrowid
+
+@pytest.fixture
+def jobs(conn):
+    poster = add_person(conn, role_id=1)
+    return {
+        "title": add_job(conn, poster, "Python Developer", "Build services."),
+        "body": add_job(conn, poster, "Backend Engineer", "Mostly Python, some Go.", location="Göteborg"),
+        "other": add_job(conn, poster, "Designer", "Figma and <b>tags</b>.", employment_type="part-time"),
+        "closed": add_job(conn, poster, "Python Lead", "Python everywhere.", status="inactive"),
+    }
+
+def search(**kwargs) -> dict:
+    return asyncio.run(api_search_jobs(**dict({"q": "", "location": "", "employment_type": "",
+                                               "page": 1, "page_size": 20, "prefix": True}, **kwargs)))
+
+def test_title_matches_rank_above_description_matches(jobs):
+    result = search(q="python")
+    assert [job["id"] for job in result["jobs"]] == [jobs["title"], jobs["body"]]
+    assert result["total"] == 2
+    assert result["jobs"][0]["title_highlight"] == "<mark>Python</mark> Developer"
+    assert "<mark>Python</mark>" in result["jobs"][1]["snippet"]
+
+def test_search_as_you_type_matches_prefixes(jobs):
+    assert [job["id"] for job in search(q="engin")["jobs"]] == [jobs["body"]]
+    assert search(q="engin", prefix=False)["total"] == 0
+
+def test_filters_apply_to_matches(jobs):
+    assert [job["id"] for job in search(q="python", location="göteborg")["jobs"]] == [jobs["body"]]
+    assert [job["id"] for job in search(employment_type="part-time")["jobs"]] == [jobs["other"]]
+
+def test_updates_reach_the_index(conn, jobs):
+    conn.execute("UPDATE job_posting SET title = 'Rust Developer' WHERE id = ?", (jobs["title"],))
+    conn.execute("DELETE FROM job_posting WHERE id = ?", (jobs["body"],))
+    assert search(q="python")["total"] == 0
+    assert [job["id"] for job in search(q="rust")["jobs"]] == [jobs["title"]]
+
+def test_pagination_and_escaping(jobs):
+    first = search(page_size=2)
+    assert first["total"] == 3 and first["has_more"]
+    second = search(page=2, page_size=2)
+    assert not second["has_more"]
+    assert {job["id"] for job in first["jobs"] + second["jobs"]} == {jobs["title"], jobs["body"], jobs["other"]}
+
+    designer = search(q="figma")["jobs"][0]
+    assert "&lt;b&gt;" in designer["snippet"] and "<b>" not in designer["snippet"]
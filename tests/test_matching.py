@@ -0,0 +1,110 @@
+"""Tests for the in-memory competence matrix."""
+
+import pytest
+
+from conftest import add_person
+from shared.matching import CompetenceMatrix
+
+def add_competence(conn, name: str) -> int:
+    return conn.execute("INSERT INTO competence (name) VALUES (?)", (name,)).lastrowid
+
+def set_years(conn, person_id: int, competence_id: int, years: float):
+    conn.execute(
+        "INSERT INTO competence_profile (person_id, competence_id, years_of_experience) VALUES (?, ?, ?)",
+        (person_id, competence_id, years)
+    )
+
+@pytest.fixture
+def profiles(conn):
+    python, sql = add_competence(conn, "Python"), add_competence(conn, "SQL")
+    senior, junior, dba = add_person(conn), add_person(conn), add_person(conn)
+    set_years(conn, senior, python, 6)
+    set_years(conn, senior, sql, 4)
+    set_years(conn, junior, python, 1)
+    set_years(conn, dba, sql, 10)
+    return {"python": python, "sql": sql, "senior": senior, "junior": junior, "dba": dba}
+
+def test_score_is_capped_fraction_of_required_years(conn, profiles):
+    matrix = CompetenceMatrix()
+    matrix.refresh(conn)
+
+    scores = dict(zip(*matrix.score([(profiles["python"], 4.0)])))
+    assert scores[profiles["senior"]] == pytest.approx(1.0)
+    assert scores[profiles["junior"]] == pytest.approx(0.25)
+    assert scores[profiles["dba"]] == pytest.approx(0.0)
+
+def test_score_averages_requirements_and_zero_years_means_any(conn, profiles):
+    matrix = CompetenceMatrix()
+    matrix.refresh(conn)
+
+    scores = dict(zip(*matrix.score([(profiles["python"], 0), (profiles["sql"], 8.0)])))
+    assert scores[profiles["senior"]] == pytest.approx((1 + 0.5) / 2)
+    assert scores[profiles["junior"]] == pytest.approx(0.5)
+    assert scores[profiles["dba"]] == pytest.approx(0.5)
+
+def test_unknown_competence_scores_nothing(conn, profiles):
+    matrix = CompetenceMatrix()
+    matrix.refresh(conn)
+
+    _, scores = matrix.score([(9999, 1.0)])
+    assert not scores.any()
+    assert matrix.top_k([(9999, 1.0)], 5) == []
+
+def test_top_k_orders_by_score_then_person_id(conn, profiles):
+    matrix = CompetenceMatrix()
+    matrix.refresh(conn)
+
+    top = matrix.top_k([(profiles["sql"], 2.0)], 2)
+    assert [person_id for person_id, _ in top] == sorted([profiles["senior"], profiles["dba"]])
+    assert all(score == pytest.approx(1.0) for _, score in top)
+
+def test_incremental_refresh_picks_up_changed_people(conn, profiles):
+    matrix = CompetenceMatrix()
+    matrix.refresh(conn)
+
+    conn.execute("DELETE FROM competence_profile WHERE person_id = ?", (profiles["senior"],))
+    newcomer = add_person(conn)
+    set_years(conn, newcomer, profiles["python"], 8)
+    go = add_competence(conn, "Go")
+    set_years(conn, profiles["junior"], go, 3)
+
+    assert matrix.refresh(conn) == 3
+    assert matrix.stats()["full_loads"] == 1
+
+    ranked = dict(matrix.top_k([(profiles["python"], 4.0)], 10))
+    assert profiles["senior"] not in ranked
+    assert ranked[newcomer] == pytest.approx(1.0)
+    assert list(matrix.people_with(go)) == [profiles["junior"]]
+    assert matrix.refresh(conn) == 0
+
+def test_people_who_stop_being_applicants_drop_out(conn, profiles):
+    matrix = CompetenceMatrix()
+    matrix.refresh(conn)
+
+    conn.execute("UPDATE person SET role_id = 3 WHERE id = ?", (profiles["dba"],))
+    conn.execute(
+        "INSERT OR REPLACE INTO competence_profile_change (person_id, seq) "
+        "SELECT ?, COALESCE(MAX(seq), 0) + 1 FROM competence_profile_change",
+        (profiles["dba"],)
+    )
+    matrix.refresh(conn)
+
+    assert profiles["dba"] not in dict(matrix.top_k([(profiles["sql"], 1.0)], 10))
+
+def test_full_load_does_not_hold_the_scoring_lock(conn, profiles):
+    matrix = CompetenceMatrix()
+    build_all = matrix._build_all
+    lock_free_during_build = []
+
+    def observed_build(connection):
+        acquired = matrix._lock.acquire(blocking=False)
+        if acquired:
+            matrix._lock.release()
+        lock_free_during_build.append(acquired)
+        return build_all(connection)
+
+    matrix._build_all = observed_build
+    matrix.refresh(conn)
+
+    assert lock_free_during_build == [True]
+    assert matrix.stats()["candidates"] == 3
@@ -0,0 +1,51 @@
+"""Tests for versioned schema migrations."""
+
+import pytest
+
+from shared import migrations
+from shared.database import create_tables, open_connection
+from shared.migrations import MIGRATIONS, apply_migrations, get_schema_version
+
+LATEST = MIGRATIONS[-1][0]
+
+def test_versions_are_ascending_and_unique():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+def test_fresh_database_is_at_the_latest_version(conn):
+    assert get_schema_version(conn) == LATEST
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_job_posting_active_created", "idx_application_status_person"} <= indexes
+
+def test_migrations_are_applied_once(database, conn):
+    conn.execute("INSERT INTO token_revocation (user_id, revoked_before, expires_at) VALUES (1, 1700000000.5, 0)")
+    assert apply_migrations(conn) == LATEST
+    create_tables(database)  # a second service starting up
+    assert conn.execute("SELECT revoked_before FROM token_revocation").fetchone() == (1700000000.5,)
+
+def test_upgrade_converts_revocations_to_milliseconds(conn):
+    conn.execute("INSERT INTO token_revocation (user_id, revoked_before, expires_at) VALUES (1, 1700000000.25, 0)")
+    conn.execute("INSERT INTO token_revocation (jti, expires_at) VALUES ('single', 0)")
+    conn.execute("PRAGMA user_version = 9")
+
+    assert apply_migrations(conn) == LATEST
+    assert conn.execute(
+        "SELECT jti, revoked_before FROM token_revocation ORDER BY id"
+    ).fetchall() == [(None, 1700000000251), ("single", None)]
+
+def test_failed_migration_rolls_back_and_keeps_the_version(database, monkeypatch):
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [
+        (LATEST + 1, "Broken", (
+            "CREATE TABLE half_done (id INTEGER)",
+            "CREATE INDEX idx_missing ON no_such_table(id)",
+        )),
+    ])
+    conn = open_connection(database)
+    try:
+        with pytest.raises(Exception):
+            apply_migrations(conn)
+        assert get_schema_version(conn) == LATEST
+        assert not conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchall()
+        assert not conn.in_transaction
+    finally:
+        conn.close()
@@ -0,0 +1,180 @@
+"""Tests for the edge's streaming proxy to the backend services."""
+
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from edge_service import main
+from edge_service.main import route_to_service
+from shared.upstream import UpstreamClient
+
+class ClosableStream(httpx.AsyncByteStream):
+    """Response body that yields ``chunks``, then blocks until closed."""
+
+    def __init__(self, *chunks: bytes, block: bool = False):
+        self.chunks = chunks
+        self.block = block
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.block:
+            await asyncio.Event().wait()
+
+    async def aclose(self):
+        self.closed = True
+
+def reply(status: int, body: bytes, headers=()) -> httpx.Response:
+    """An unread response, like a real transport returns."""
+    return httpx.Response(status, headers=list(headers), stream=ClosableStream(body))
+
+class Upstream(httpx.AsyncBaseTransport):
+    """Records each request and the body chunks as they were streamed."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        self.chunks = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.chunks.append([chunk async for chunk in request.stream])
+        return await self.respond(request)
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Install an upstream answering with ``upstream.respond``."""
+    async def ok(request):
+        return reply(200, b"ok")
+
+    transport = Upstream(ok)
+    client = UpstreamClient("auth", "http://auth.test")
+    client.client = httpx.AsyncClient(transport=transport)
+    monkeypatch.setattr(main, "get_upstream_client", lambda service: client)
+    return transport
+
+async def proxy(request):
+    return await route_to_service("auth", "/" + request.path_params["path"], request)
+
+app = Starlette(routes=[Route("/api/auth/{path:path}", proxy, methods=["GET", "POST"])])
+
+def call(method: str, url: str, **kwargs) -> httpx.Response:
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://edge.test") as client:
+            return await client.request(method, url, **kwargs)
+    return asyncio.run(scenario())
+
+def test_request_body_is_streamed_upstream(upstream):
+    async def body():
+        for part in (b"first,", b"second,", b"third"):
+            yield part
+
+    response = call("POST", "/api/auth/upload", content=body(), params=[("tag", "a"), ("tag", "b")])
+    assert response.status_code == 200 and response.content == b"ok"
+
+    request = upstream.requests[0]
+    assert request.url == "http://auth.test/upload?tag=a&tag=b"
+    assert request.headers["transfer-encoding"] == "chunked"
+    assert b"".join(upstream.chunks[0]) == b"first,second,third"
+    assert len(upstream.chunks[0]) > 1  # forwarded as it arrived, not buffered into one
+
+def test_hop_by_hop_request_headers_are_dropped(upstream):
+    call("GET", "/api/auth/me", headers={
+        "Authorization": "Bearer t", "Cookie": "session_id=s", "TE": "trailers",
+        "Upgrade": "h2c", "Proxy-Authorization": "Basic x", "X-Forwarded-For": "10.0.0.1",
+    })
+    headers = upstream.requests[0].headers
+    assert headers["authorization"] == "Bearer t"
+    for name in ("cookie", "te", "upgrade", "proxy-authorization"):
+        assert name not in headers
+    assert headers.get_list("x-forwarded-for") == ["10.0.0.1, 127.0.0.1"]
+    assert headers["x-forwarded-host"] == "edge.test"
+
+def test_status_and_repeated_response_headers_pass_through(upstream):
+    async def created(request):
+        return reply(201, b"made", [
+            ("set-cookie", "a=1; Path=/"), ("set-cookie", "b=2; Path=/"),
+            ("keep-alive", "timeout=5"), ("trailer", "x-checksum"), ("x-request-id", "abc"),
+        ])
+
+    upstream.respond = created
+    response = call("POST", "/api/auth/things", content=b"{}")
+    assert response.status_code == 201 and response.content == b"made"
+    assert response.headers.get_list("set-cookie") == ["a=1; Path=/", "b=2; Path=/"]
+    assert response.headers["x-request-id"] == "abc"
+    assert "keep-alive" not in response.headers and "trailer" not in response.headers
+
+def test_upstream_errors_are_passed_through(upstream):
+    async def missing(request):
+        return reply(404, b'{"error": "no such thing"}', [("content-type", "application/json")])
+
+    upstream.respond = missing
+    response = call("POST", "/api/auth/nothing", content=b"")
+    assert response.status_code == 404 and response.json() == {"error": "no such thing"}
+
+def run_until_disconnect(path: str, disconnect_after=None) -> list:
+    """Call ``app`` directly and return the sent messages.
+
+    The client disconnects once ``disconnect_after(sent)`` holds, or after
+    a short wait without one.
+    """
+    sent = []
+    gone = asyncio.Event()
+
+    async def receive():
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if disconnect_after is not None and disconnect_after(sent):
+            gone.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"edge.test")], "client": ("127.0.0.1", 5000), "server": ("edge.test", 80),
+    }
+
+    async def scenario():
+        calling = asyncio.ensure_future(app(scope, receive, send))
+        if disconnect_after is None:
+            await asyncio.sleep(0.05)
+            gone.set()
+        await asyncio.wait_for(calling, 5)
+
+    asyncio.run(scenario())
+    return sent
+
+def test_upstream_response_is_closed_when_the_client_disconnects(upstream):
+    body = ClosableStream(b"first chunk", block=True)
+
+    async def slow_body(request):
+        return httpx.Response(200, stream=body)
+
+    upstream.respond = slow_body
+    sent = run_until_disconnect(
+        "/api/auth/stream", lambda sent: any(m.get("body") for m in sent if m["type"] == "http.response.body")
+    )
+    assert sent[0]["status"] == 200
+    assert body.closed
+
+def test_disconnect_before_the_upstream_answers_cancels_the_call(upstream):
+    cancelled = []
+
+    async def hang(request):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(request.url.path)
+            raise
+
+    upstream.respond = hang
+    sent = run_until_disconnect("/api/auth/hang")
+    assert sent[0]["status"] == 499
+    assert cancelled == ["/hang"]
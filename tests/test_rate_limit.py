@@ -0,0 +1,98 @@
+"""Tests for the login token buckets and the Count-Min sketch behind them."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from shared import rate_limit
+from shared.rate_limit import (
+    CountMinSketch, LoginRateLimited, TokenBucketLimiter, WindowedSketch, check_login_rate
+)
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+def test_sketch_never_undercounts():
+    sketch = CountMinSketch(width=64, depth=3)
+    counts = {f"key-{i}": i % 7 + 1 for i in range(200)}
+    for key, count in counts.items():
+        for _ in range(count):
+            sketch.add(key)
+    assert all(sketch.estimate(key) >= count for key, count in counts.items())
+
+def test_sketch_is_exact_without_collisions():
+    sketch = CountMinSketch(width=4096, depth=4)
+    assert [sketch.add("alice") for _ in range(3)] == [1, 2, 3]
+    assert sketch.estimate("alice") == 3
+    assert sketch.estimate("bob") == 0
+
+def test_windowed_sketch_forgets_after_two_windows():
+    sketch = WindowedSketch(10, width=1024, depth=3)
+    start = sketch._rotated_at
+    sketch.add("ip", start)
+    assert sketch.estimate("ip", start + 10) == 1   # now in the previous window
+    assert sketch.estimate("ip", start + 20) == 0
+    sketch.add("ip", start + 20)
+    assert sketch.estimate("ip", start + 45) == 0   # skipped both windows at once
+
+def test_bucket_allows_burst_then_rejects(clock):
+    limiter = TokenBucketLimiter("username", burst=3, rate=0.5, shards=2, max_keys=100)
+    assert [limiter.acquire("alice") for _ in range(3)] == [None, None, None]
+    assert limiter.acquire("alice") == pytest.approx(2.0)
+    assert limiter.acquire("bob") is None
+    assert limiter.stats()["allowed"] == 4
+    assert limiter.stats()["rejected"] == 1
+
+def test_bucket_refills_at_rate_up_to_burst(clock):
+    limiter = TokenBucketLimiter("username", burst=2, rate=1, shards=1, max_keys=100)
+    limiter.acquire("alice")
+    limiter.acquire("alice")
+    clock.advance(0.5)
+    assert limiter.acquire("alice") == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert limiter.acquire("alice") is None
+    clock.advance(100)
+    assert [limiter.acquire("alice") for _ in range(3)][-1] is not None
+
+def test_evicted_key_is_seeded_from_the_sketch(clock):
+    limiter = TokenBucketLimiter("client", burst=3, rate=0.01, shards=1, max_keys=2)
+    for _ in range(3):
+        assert limiter.acquire("busy") is None
+    # Churn through other keys until "busy" is evicted
+    limiter.acquire("other-1")
+    limiter.acquire("other-2")
+    assert limiter.stats()["evictions"] >= 1
+    assert limiter.acquire("busy") is not None
+    assert limiter.stats()["seeded_from_sketch"] >= 1
+    assert limiter.stats()["tracked_keys"] == 2
+
+def test_check_login_rate_limits_ip_and_username(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_ip_limiter", TokenBucketLimiter("client", 2, 0.01, shards=1))
+    monkeypatch.setattr(rate_limit, "_user_limiter", TokenBucketLimiter("username", 2, 0.01, shards=1))
+
+    # Usernames are normalised before counting
+    check_login_rate("Alice", "10.0.0.1")
+    check_login_rate(" alice ", "10.0.0.2")
+    with pytest.raises(LoginRateLimited) as excinfo:
+        check_login_rate("ALICE", "10.0.0.3")
+    assert excinfo.value.scope == "username"
+    assert excinfo.value.retry_after > 0
+
+    check_login_rate("bob", "10.0.0.9")
+    check_login_rate("carol", "10.0.0.9")
+    with pytest.raises(LoginRateLimited) as excinfo:
+        check_login_rate("dave", "10.0.0.9")
+    assert excinfo.value.scope == "client"
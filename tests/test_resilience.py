@@ -0,0 +1,153 @@
+"""Tests for the circuit breaker and retry budget state transitions."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from shared import resilience
+from shared.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RetryBudget, RollingWindow
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+def breaker(**overrides) -> CircuitBreaker:
+    settings = dict(window=10, min_calls=4, error_rate=0.5, slow_call=1.0, slow_rate=0.75,
+                    open_seconds=5, half_open_calls=2)
+    settings.update(overrides)
+    return CircuitBreaker("test", **settings)
+
+def trip(cb: CircuitBreaker):
+    for _ in range(cb.min_calls):
+        assert cb.allow()
+        cb.record(False, 0.01)
+    assert cb.state == OPEN
+
+def test_rolling_window_forgets_old_buckets():
+    window = RollingWindow(3, ("calls",))
+    window.add(100.2, 1)
+    window.add(101.7, 2)
+    assert window.totals(102.0) == {"calls": 3}
+    assert window.totals(103.5) == {"calls": 2}
+    assert window.totals(104.0) == {"calls": 0}
+
+def test_rolling_window_reuses_a_stale_bucket_from_zero():
+    window = RollingWindow(2, ("calls",))
+    window.add(10.0, 5)
+    window.add(12.0, 1)  # same slot as second 10
+    assert window.totals(12.0) == {"calls": 1}
+
+def test_breaker_stays_closed_below_min_calls(clock):
+    cb = breaker()
+    for _ in range(3):
+        cb.record(False, 0.01)
+    assert cb.state == CLOSED
+
+def test_breaker_opens_on_error_rate(clock):
+    cb = breaker()
+    for success in (True, True, False):
+        cb.record(success, 0.01)
+    assert cb.state == CLOSED
+    cb.record(False, 0.01)
+    assert cb.state == OPEN
+    assert cb.stats()["opened"] == 1
+
+def test_breaker_opens_on_slow_rate(clock):
+    cb = breaker()
+    for latency in (0.01, 1.5, 2.0, 3.0):
+        cb.record(True, latency)
+    assert cb.state == OPEN
+
+def test_failures_outside_the_window_do_not_count(clock):
+    cb = breaker()
+    for _ in range(3):
+        cb.record(False, 0.01)
+    clock.advance(11)
+    for _ in range(3):
+        cb.record(True, 0.01)
+    cb.record(False, 0.01)
+    assert cb.state == CLOSED
+
+def test_open_breaker_rejects_until_cool_down(clock):
+    cb = breaker()
+    trip(cb)
+    clock.advance(2)
+    assert not cb.allow()
+    assert cb.retry_after() == pytest.approx(3)
+    assert cb.stats()["rejected"] == 1
+
+    clock.advance(3)
+    assert cb.stats()["state"] == HALF_OPEN
+    assert cb.allow()
+    assert cb.state == HALF_OPEN
+    assert cb.retry_after() == 0.0
+
+def test_half_open_limits_probes_and_closes_after_successes(clock):
+    cb = breaker()
+    trip(cb)
+    clock.advance(5)
+    assert cb.allow() and cb.allow()
+    assert not cb.allow()
+
+    cb.record(True, 0.01)
+    assert cb.state == HALF_OPEN
+    cb.record(True, 0.01)
+    assert cb.state == CLOSED
+    assert cb.stats()["window"]["calls"] == 0
+
+def test_failed_or_slow_probe_reopens(clock):
+    for success, latency in ((False, 0.01), (True, 1.5)):
+        cb = breaker()
+        trip(cb)
+        clock.advance(5)
+        assert cb.allow()
+        cb.record(success, latency)
+        assert cb.state == OPEN
+        assert cb.retry_after() == pytest.approx(5)
+
+def test_release_gives_back_a_probe(clock):
+    cb = breaker(half_open_calls=1)
+    trip(cb)
+    clock.advance(5)
+    assert cb.allow()
+    assert not cb.allow()
+    cb.release()
+    assert cb.allow()
+
+def test_release_outside_half_open_is_a_no_op(clock):
+    cb = breaker()
+    cb.release()
+    assert cb.allow() and cb.state == CLOSED
+
+def test_retry_budget_floor_without_traffic(clock):
+    budget = RetryBudget(ratio=0.1, min_per_second=0.2, window=10)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+    assert budget.stats()["granted"] == 2
+    assert budget.stats()["denied"] == 1
+
+def test_retry_budget_grows_with_requests(clock):
+    budget = RetryBudget(ratio=0.1, min_per_second=0, window=10)
+    assert not budget.try_spend()
+    for _ in range(30):
+        budget.record_request()
+    assert [budget.try_spend() for _ in range(4)] == [True, True, True, False]
+
+def test_retry_budget_recovers_as_retries_age_out(clock):
+    budget = RetryBudget(ratio=0, min_per_second=0.1, window=10)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    clock.advance(10)
+    assert budget.try_spend()
@@ -0,0 +1,90 @@
+"""Tests for token revocation: exact checks, boundaries and refresh."""
+
+import asyncio
+import time
+
+import pytest
+
+from shared import revocation
+from shared.revocation import RevocationList, token_issued_ms
+from shared.security import create_access_token, _decode_token
+
+def test_tokens_carry_a_millisecond_issue_time():
+    before = int(time.time() * 1000)
+    payload = _decode_token(create_access_token({"user_id": 1}))
+    after = int(time.time() * 1000)
+    assert before - 1000 < payload["iat_ms"] <= after
+    assert payload["iat_ms"] // 1000 == payload["iat"]
+
+def test_issue_time_falls_back_to_start_of_iat_second():
+    assert token_issued_ms({"iat": 100}) == 100_000
+    assert token_issued_ms({"iat": 100, "iat_ms": 100_750}) == 100_750
+    assert token_issued_ms({}) == 0
+
+@pytest.mark.parametrize("issued_ms, revoked", [
+    (100_699, True),   # earlier in the same second
+    (100_700, True),   # the revoking millisecond itself
+    (100_701, False),  # later in the same second, e.g. a fresh login
+    (101_000, False),
+])
+def test_user_wide_revocation_boundary(issued_ms, revoked):
+    revocations = RevocationList()
+    # revoke_user_tokens at epoch millisecond 100_700 stores 100_701
+    revocations.add_user(7, 100_701)
+    payload = {"user_id": 7, "iat": issued_ms // 1000, "iat_ms": issued_ms}
+    assert revocations.is_revoked(payload) is revoked
+
+def test_legacy_tokens_in_the_revoking_second_are_revoked():
+    revocations = RevocationList()
+    revocations.add_user(7, 100_701)
+    assert revocations.is_revoked({"user_id": 7, "iat": 100})
+    assert not revocations.is_revoked({"user_id": 7, "iat": 101})
+
+def test_user_wide_revocation_only_affects_that_user():
+    revocations = RevocationList()
+    revocations.add_user(7, 100_701)
+    assert not revocations.is_revoked({"user_id": 8, "iat_ms": 1})
+
+def test_single_token_revocation_is_exact():
+    revocations = RevocationList()
+    revocations.add_token("revoked")
+    assert revocations.is_revoked({"jti": "revoked"})
+    assert not revocations.is_revoked({"jti": "still-valid"})
+    assert not revocations.is_revoked({})
+    stats = revocations.stats()
+    assert stats["checks"] == 3 and stats["revoked"] == 1 and stats["revoked_tokens"] == 1
+
+def test_checks_never_touch_the_database(monkeypatch):
+    def no_database(*args):
+        raise AssertionError("is_revoked must not read the database")
+    monkeypatch.setattr(revocation, "run_read", no_database)
+    revocations = RevocationList()
+    revocations.add_token("revoked")
+    assert revocations.is_revoked({"jti": "revoked", "user_id": 1, "iat_ms": 5})
+
+def test_refresh_loads_revocations_written_by_other_processes(database):
+    async def scenario():
+        payload = _decode_token(create_access_token({"user_id": 3}))
+        await revocation.revoke_token(payload)
+        await revocation.revoke_user_tokens(4, 3600)
+
+        # A fresh list stands in for another process
+        other = RevocationList()
+        assert not other.is_revoked(payload)
+        await other.refresh()
+        assert other.is_revoked(payload)
+        assert other.is_revoked({"user_id": 4, "iat_ms": int(time.time() * 1000) - 1000})
+        assert not other.is_revoked({"user_id": 4, "iat_ms": int(time.time() * 1000) + 1000})
+        assert other.stats()["refresh_errors"] == 0
+
+    asyncio.run(scenario())
+
+def test_refresh_drops_expired_revocations_on_rebuild(conn):
+    conn.execute(
+        "INSERT INTO token_revocation (jti, expires_at) VALUES ('expired', ?), ('live', ?)",
+        (int(time.time()) - 10, int(time.time()) + 3600)
+    )
+    revocations = RevocationList()
+    asyncio.run(revocations.refresh())
+    assert not revocations.is_revoked({"jti": "expired"})
+    assert revocations.is_revoked({"jti": "live"})
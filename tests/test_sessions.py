@@ -0,0 +1,200 @@
+"""Tests for server-side sessions: the middleware, expiry and invalidation."""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from shared import sessions
+from shared.sessions import ServerSessionMiddleware, SessionStore, TimerWheel
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sessions, "time", SimpleNamespace(time=clock))
+    monkeypatch.setattr(sessions, "SESSION_IDLE_SECONDS", 60)
+    monkeypatch.setattr(sessions, "SESSION_MAX_AGE_SECONDS", 300)
+    return clock
+
+def make_app(store: SessionStore) -> Starlette:
+    async def login(request):
+        request.session["user_id"] = int(request.query_params["user_id"])
+        request.session["username"] = "alice"
+        return JSONResponse({})
+
+    async def visit(request):
+        request.session["cart"] = request.query_params.get("item", "book")
+        return JSONResponse({})
+
+    async def logout(request):
+        request.session.clear()
+        return JSONResponse({})
+
+    async def me(request):
+        return JSONResponse(dict(request.session))
+
+    app = Starlette(routes=[
+        Route("/login", login, methods=["POST"]),
+        Route("/visit", visit),
+        Route("/logout", logout, methods=["POST"]),
+        Route("/me", me),
+    ])
+    app.add_middleware(ServerSessionMiddleware, store=store)
+    return app
+
+def session_cookie(response: httpx.Response):
+    """The session_id value set by ``response``, or None if it set none."""
+    for header in response.headers.get_list("set-cookie"):
+        name, _, rest = header.partition("=")
+        if name == "session_id":
+            return rest.split(";")[0]
+    return None
+
+def run(store: SessionStore, steps):
+    async def scenario():
+        transport = httpx.ASGITransport(app=make_app(store))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await steps(client)
+    return asyncio.run(scenario())
+
+def test_login_rotates_the_session_id(clock):
+    store = SessionStore(durable=False)
+
+    async def steps(client):
+        anonymous = session_cookie(await client.get("/visit"))
+        logged_in = session_cookie(await client.post("/login", params={"user_id": 7}))
+        session = (await client.get("/me")).json()
+        switched = session_cookie(await client.post("/login", params={"user_id": 8}))
+        return anonymous, logged_in, session, switched
+
+    anonymous, logged_in, session, switched = run(store, steps)
+    assert anonymous and logged_in and switched
+    assert len({anonymous, logged_in, switched}) == 3
+    assert session == {"user_id": 7, "username": "alice", "cart": "book"}
+    # The pre-login id no longer finds a session
+    assert asyncio.run(store.get(anonymous)) is None
+    assert store.stats()["active"] == 1
+
+def test_changing_other_keys_keeps_the_session_id(clock):
+    store = SessionStore(durable=False)
+
+    async def steps(client):
+        await client.post("/login", params={"user_id": 7})
+        response = await client.get("/visit", params={"item": "pen"})
+        return session_cookie(response), (await client.get("/me")).json()
+
+    cookie, session = run(store, steps)
+    assert cookie is None
+    assert session["cart"] == "pen"
+
+def test_clearing_the_session_deletes_it_and_expires_the_cookie(clock):
+    store = SessionStore(durable=False)
+
+    async def steps(client):
+        session_id = session_cookie(await client.post("/login", params={"user_id": 7}))
+        response = await client.post("/logout")
+        return session_id, response
+
+    session_id, response = run(store, steps)
+    header = next(h for h in response.headers.get_list("set-cookie") if h.startswith("session_id="))
+    assert header.startswith("session_id=;") and "Max-Age=0" in header
+    assert asyncio.run(store.get(session_id)) is None
+    assert store.stats()["active"] == 0
+
+def test_unknown_session_cookie_is_expired():
+    store = SessionStore(durable=False)
+
+    async def steps(client):
+        return await client.get("/me", cookies={"session_id": "forged"})
+
+    response = run(store, steps)
+    assert response.json() == {}
+    assert session_cookie(response) == ""
+
+def test_idle_sessions_expire(clock):
+    store = SessionStore(durable=False)
+    record = asyncio.run(store.create({"user_id": 1}))
+    clock.advance(59)
+    assert asyncio.run(store.get(record.session_id)) is record
+    clock.advance(59)
+    assert asyncio.run(store.get(record.session_id)) is record  # each use resets the idle timer
+    clock.advance(61)
+    assert asyncio.run(store.get(record.session_id)) is None
+
+def test_sessions_end_at_max_age_even_when_used(clock):
+    store = SessionStore(durable=False)
+    record = asyncio.run(store.create({"user_id": 1}))
+    for _ in range(5):
+        clock.advance(50)
+        assert asyncio.run(store.get(record.session_id)) is record
+    clock.advance(51)
+    assert asyncio.run(store.get(record.session_id)) is None
+
+def test_timer_wheel_reclaims_expired_records_without_lookups(clock):
+    store = SessionStore(durable=False)
+    idle = asyncio.run(store.create({"user_id": 1}))
+    active = asyncio.run(store.create({"user_id": 2}))
+    for _ in range(3):
+        clock.advance(40)
+        asyncio.run(store.get(active.session_id))
+
+    # Only ``active`` was looked up; the wheel found ``idle`` on its own
+    assert store.stats()["active"] == 1
+    assert store.stats()["expired"] == 1
+    assert idle.session_id not in store._records
+
+def test_timer_wheel_returns_ids_in_passed_slots(clock):
+    wheel = TimerWheel(tick=5, slots=8)
+    wheel.schedule("soon", clock.now + 6)
+    wheel.schedule("later", clock.now + 100)  # wraps around the wheel
+    assert wheel.advance(clock.now + 4) == []
+    assert wheel.advance(clock.now + 11) == ["soon"]
+    assert "later" in wheel.advance(clock.now + 40)
+
+def test_invalidate_user_ends_every_session_of_that_user(clock):
+    store = SessionStore(durable=False)
+    first, second = (asyncio.run(store.create({"user_id": 1})) for _ in range(2))
+    other = asyncio.run(store.create({"user_id": 2}))
+
+    assert asyncio.run(store.invalidate_user(1)) == 2
+    assert asyncio.run(store.get(first.session_id)) is None
+    assert asyncio.run(store.get(second.session_id)) is None
+    assert asyncio.run(store.get(other.session_id)) is other
+    assert store.stats()["users"] == 1
+
+def test_durable_sessions_load_in_other_workers(database, clock):
+    first_worker, second_worker = SessionStore(durable=True), SessionStore(durable=True)
+    record = asyncio.run(first_worker.create({"user_id": 3, "username": "carol", "theme": "dark"}))
+
+    loaded = asyncio.run(second_worker.get(record.session_id))
+    assert loaded.to_dict() == {"user_id": 3, "username": "carol", "theme": "dark"}
+    assert second_worker.stats()["durable_loads"] == 1
+
+def test_durable_touch_that_finds_its_row_deleted_ends_the_session(database, clock, monkeypatch):
+    monkeypatch.setattr(sessions, "SESSION_TOUCH_SECONDS", 10)
+    first_worker, second_worker = SessionStore(durable=True), SessionStore(durable=True)
+    record = asyncio.run(first_worker.create({"user_id": 3}))
+    assert asyncio.run(second_worker.get(record.session_id)) is not None
+
+    # Logout everywhere, handled by the other worker
+    asyncio.run(second_worker.invalidate_user(3))
+    clock.advance(5)
+    assert asyncio.run(first_worker.get(record.session_id)) is record  # not due for a touch yet
+    clock.advance(10)
+    assert asyncio.run(first_worker.get(record.session_id)) is None
+    assert first_worker.stats()["invalidated"] == 1
+    assert first_worker.stats()["active"] == 0
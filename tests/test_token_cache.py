@@ -0,0 +1,107 @@
+"""Tests for the verified-token cache behind verify_token."""
+
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from shared import revocation, security
+from shared.revocation import RevocationList
+from shared.security import TokenCache, create_access_token, verify_token
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(security, "time", SimpleNamespace(time=clock))
+    return clock
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Fresh cache and revocation list; counts real token decodes."""
+    monkeypatch.setattr(security, "_token_cache", TokenCache(max_size=100, ttl=60))
+    monkeypatch.setattr(revocation, "_revocations", RevocationList())
+    calls = []
+    decode = security._decode_token
+
+    def counted(token):
+        calls.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(security, "_decode_token", counted)
+    return calls
+
+def test_repeat_verifications_hit_the_cache(decodes):
+    token = create_access_token({"user_id": 1})
+    first = verify_token(token)
+    second = verify_token(token)
+    assert first == second and first["user_id"] == 1
+    assert len(decodes) == 1
+    assert security.get_token_cache_stats()["hits"] == 1
+
+def test_cached_payloads_are_copies(decodes):
+    token = create_access_token({"user_id": 1})
+    verify_token(token)["user_id"] = 99
+    assert verify_token(token)["user_id"] == 1
+
+def test_invalid_tokens_are_not_cached(decodes):
+    assert verify_token("not-a-token") is None
+    assert verify_token("not-a-token") is None
+    assert len(decodes) == 2
+    assert verify_token("") is None
+
+def test_revoked_token_is_rejected_even_when_cached(decodes):
+    token = create_access_token({"user_id": 1})
+    payload = verify_token(token)
+    revocation.get_revocation_list().add_token(payload["jti"])
+    assert verify_token(token) is None
+    assert len(decodes) == 1  # answered from the cache, then revoked
+
+def test_user_wide_revocation_rejects_cached_tokens(decodes):
+    token = create_access_token({"user_id": 5})
+    payload = verify_token(token)
+    revocation.get_revocation_list().add_user(5, payload["iat_ms"] + 1)
+    assert verify_token(token) is None
+
+def test_entries_expire_after_ttl(clock):
+    cache = TokenCache(max_size=10, ttl=60)
+    cache.put(b"k", {"user_id": 1, "exp": clock.now + 3600})
+    clock.advance(59)
+    assert cache.get(b"k") is not None
+    clock.advance(1)
+    assert cache.get(b"k") is None
+    assert cache.stats()["expired"] == 1 and cache.stats()["size"] == 0
+
+def test_entries_never_outlive_the_token(clock):
+    cache = TokenCache(max_size=10, ttl=60)
+    cache.put(b"k", {"user_id": 1, "exp": clock.now + 10})
+    clock.advance(9)
+    assert cache.get(b"k") is not None
+    clock.advance(1)
+    assert cache.get(b"k") is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TokenCache(max_size=2, ttl=60)
+    cache.put(b"a", {"n": 1})
+    cache.put(b"b", {"n": 2})
+    cache.get(b"a")  # b is now the least recently used
+    cache.put(b"c", {"n": 3})
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == {"n": 1} and cache.get(b"c") == {"n": 3}
+    assert cache.stats()["evictions"] == 1
+
+def test_expired_token_is_rejected_once_its_cache_entry_lapses(decodes):
+    token = create_access_token({"user_id": 1}, expires_delta=timedelta(seconds=1))
+    assert verify_token(token) is not None
+    time.sleep(1.1)
+    assert verify_token(token) is None
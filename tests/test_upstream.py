@@ -0,0 +1,92 @@
+"""Tests for the per-service upstream clients."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from shared import upstream
+from shared.upstream import (
+    UpstreamClients, close_upstream_clients, get_upstream_client, start_upstream_clients, upstream_setting
+)
+
+SERVICE_URLS = {"auth": "http://auth.test", "registration": "http://registration.test"}
+
+def test_service_setting_overrides_the_global_one(monkeypatch):
+    assert upstream_setting("auth", "READ_TIMEOUT") == 10.0
+
+    monkeypatch.setenv("UPSTREAM_READ_TIMEOUT", "4")
+    assert upstream_setting("auth", "READ_TIMEOUT") == 4.0
+    assert upstream_setting("registration", "READ_TIMEOUT") == 4.0
+
+    monkeypatch.setenv("UPSTREAM_AUTH_READ_TIMEOUT", "2")
+    assert upstream_setting("auth", "READ_TIMEOUT") == 2.0
+    assert upstream_setting("registration", "READ_TIMEOUT") == 4.0
+
+def test_settings_keep_the_default_type(monkeypatch):
+    monkeypatch.setenv("UPSTREAM_JOB_APPLICATION_MAX_RETRIES", "3")
+    monkeypatch.setenv("UPSTREAM_LB_POLICY", "least_outstanding")
+    assert upstream_setting("job_application", "MAX_RETRIES") == 3
+    assert isinstance(upstream_setting("job_application", "MAX_RETRIES"), int)
+    assert upstream_setting("auth", "LB_POLICY") == "least_outstanding"
+
+def test_clients_are_built_from_their_service_settings(monkeypatch):
+    monkeypatch.setenv("UPSTREAM_AUTH_READ_TIMEOUT", "2")
+    monkeypatch.setenv("UPSTREAM_AUTH_MAX_CONNECTIONS", "7")
+    clients = UpstreamClients()
+    clients._urls = dict(SERVICE_URLS)
+    auth, registration = clients.get("auth"), clients.get("registration")
+    assert auth.timeout.read == 2.0 and auth.limits.max_connections == 7
+    assert registration.timeout.read == 10.0 and registration.limits.max_connections == 100
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Fresh process-wide clients on static URLs, answered by a mock transport."""
+    monkeypatch.setenv("DISCOVERY_URL", "")
+    monkeypatch.setattr(upstream, "_clients", UpstreamClients())
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(str(request.url))
+        return httpx.Response(200, text=request.url.host)
+
+    async def start():
+        await start_upstream_clients(SERVICE_URLS)
+        for service in SERVICE_URLS:
+            get_upstream_client(service).client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    asyncio.run(start())
+    yield seen
+    asyncio.run(close_upstream_clients())
+
+def test_one_client_is_reused_per_service(clients):
+    auth = get_upstream_client("auth")
+    assert get_upstream_client("auth") is auth
+    assert get_upstream_client("registration") is not auth
+    assert get_upstream_client("unknown") is None
+
+    async def scenario():
+        for _ in range(3):
+            response = await get_upstream_client("auth").send("GET", "/health")
+            await response.aread()
+            await response.aclose()
+
+    asyncio.run(scenario())
+    assert clients == ["http://auth.test/health"] * 3
+    assert auth.stats()["requests"] == 3
+
+def test_close_closes_every_client(clients):
+    opened = [get_upstream_client(service) for service in SERVICE_URLS]
+    asyncio.run(close_upstream_clients())
+    assert all(client.client.is_closed for client in opened)
+    assert upstream._clients.stats() == {}
+
+def test_close_keeps_going_when_one_client_fails(clients, monkeypatch):
+    auth, registration = (get_upstream_client(service) for service in SERVICE_URLS)
+
+    async def broken():
+        raise RuntimeError("already gone")
+
+    monkeypatch.setattr(auth, "aclose", broken)
+    asyncio.run(close_upstream_clients())
+    assert registration.client.is_closed
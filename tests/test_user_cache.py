@@ -0,0 +1,87 @@
+"""Tests for the logged-in user cache and its invalidation by edge handlers."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import add_person
+from edge_service.main import delete_user, edit_user, get_current_user, update_profile
+from shared import user_cache
+from shared.user_cache import UserCache
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = UserCache(max_size=100, ttl=60)
+    monkeypatch.setattr(user_cache, "_user_cache", cache)
+    return cache
+
+def add_user(conn, role_id: int = 2, name: str = None) -> int:
+    person_id = add_person(conn, role_id=role_id, name=name)
+    return conn.execute(
+        "INSERT INTO credential (person_id, username, password) VALUES (?, ?, 'x')",
+        (person_id, f"user{person_id}")
+    ).lastrowid
+
+def fake_request(credential_id: int, form: dict = None):
+    """Just enough of a Request for the handlers: a session and a form."""
+    async def read_form():
+        return form or {}
+    return SimpleNamespace(session={"user_id": credential_id}, form=read_form)
+
+def current_user(credential_id: int):
+    return asyncio.run(get_current_user(fake_request(credential_id)))
+
+@pytest.fixture
+def users(conn, cache):
+    """An admin and an applicant, the applicant already cached."""
+    admin, applicant = add_user(conn, role_id=1, name="admin"), add_user(conn, name="alice")
+    assert current_user(applicant)["firstname"] == "alice"
+    assert cache.get(applicant) is not None
+    return SimpleNamespace(admin=admin, applicant=applicant,
+                           person=current_user(applicant)["person_id"])
+
+def test_lookups_are_served_from_the_cache(conn, users, cache):
+    conn.execute("UPDATE person SET firstname = 'unseen' WHERE id = ?", (users.person,))
+    assert current_user(users.applicant)["firstname"] == "alice"
+    assert cache.stats()["hits"] >= 2
+
+def test_edit_user_evicts_the_cached_user(users, cache):
+    form = {"firstname": "Alicia", "lastname": "Test", "email": "alicia@example.com", "role_id": "2"}
+    response = asyncio.run(edit_user(fake_request(users.admin, form), users.person))
+    assert response.status_code == 200
+    assert cache.get(users.applicant) is None
+    assert current_user(users.applicant)["firstname"] == "Alicia"
+
+def test_update_profile_evicts_the_cached_user(users, cache):
+    response = asyncio.run(update_profile(
+        fake_request(users.applicant), firstname="Ally", lastname="Test", email="ally@example.com",
+        date_of_birth=None, phone=None, address=None
+    ))
+    assert response.status_code == 302 and "success" in response.headers["location"]
+    assert cache.get(users.applicant) is None
+    assert current_user(users.applicant)["firstname"] == "Ally"
+
+def test_delete_user_evicts_the_cached_user(users, cache):
+    response = asyncio.run(delete_user(fake_request(users.admin), users.person))
+    assert response.status_code == 200
+    assert cache.get(users.applicant) is None
+    assert current_user(users.applicant) is None
+
+def test_lookup_that_raced_an_invalidation_is_not_cached(cache):
+    generation = cache.generation  # the lookup starts and reads the old row...
+    cache.invalidate_person(3)     # ...while an update commits and invalidates
+    cache.put(1, {"id": 1, "person_id": 3, "firstname": "stale"}, generation)
+    assert cache.get(1) is None
+
+    cache.put(1, {"id": 1, "person_id": 3, "firstname": "fresh"}, cache.generation)
+    assert cache.get(1)["firstname"] == "fresh"
+
+def test_invalidation_only_drops_that_person(cache):
+    cache.put(1, {"id": 1, "person_id": 10}, cache.generation)
+    cache.put(2, {"id": 2, "person_id": 10}, cache.generation)
+    cache.put(3, {"id": 3, "person_id": 11}, cache.generation)
+    cache.invalidate_person(10)
+    assert cache.get(1) is None and cache.get(2) is None
+    assert cache.get(3) is not None
+    assert cache.stats()["invalidations"] == 2
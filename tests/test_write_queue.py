@@ -0,0 +1,85 @@
+"""Tests for the single-writer group-commit queue."""
+
+import asyncio
+import threading
+
+import pytest
+
+from shared.database import WriteQueue, run_transaction
+
+@pytest.fixture
+def writer(database):
+    queue = WriteQueue(database, max_batch_size=64)
+    yield queue
+    queue.close(timeout=5)
+
+def insert_role(conn, name: str) -> int:
+    return conn.execute("INSERT INTO role (name) VALUES (?)", (name,)).lastrowid
+
+def fail(conn, name: str):
+    insert_role(conn, name)
+    raise ValueError(f"rejected {name}")
+
+def role_names(conn) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM role")}
+
+def hold_writer(writer: WriteQueue) -> threading.Event:
+    """Block the writer thread so the next submissions queue up as one batch."""
+    started, release = threading.Event(), threading.Event()
+
+    def blocker(conn):
+        started.set()
+        release.wait(5)
+
+    writer.submit(blocker)
+    assert started.wait(5)
+    return release
+
+def test_queued_jobs_commit_in_one_batch(writer, conn):
+    release = hold_writer(writer)
+    futures = [writer.submit(insert_role, f"batched-{i}") for i in range(10)]
+    release.set()
+
+    ids = [future.result(5) for future in futures]
+    assert len(set(ids)) == 10
+    assert {f"batched-{i}" for i in range(10)} <= role_names(conn)
+    stats = writer.stats()
+    assert stats["batches"] == 2
+    assert stats["batch_size_max"] == 10
+    assert stats["committed"] == 11
+
+def test_failing_job_rolls_back_alone(writer, conn):
+    release = hold_writer(writer)
+    before = writer.submit(insert_role, "before")
+    failing = writer.submit(fail, "failing")
+    after = writer.submit(insert_role, "after")
+    release.set()
+
+    before.result(5)
+    after.result(5)
+    with pytest.raises(ValueError, match="rejected failing"):
+        failing.result(5)
+    names = role_names(conn)
+    assert {"before", "after"} <= names and "failing" not in names
+    assert writer.stats()["failed"] == 1
+
+def test_cancelled_jobs_are_skipped(writer, conn):
+    release = hold_writer(writer)
+    cancelled = writer.submit(insert_role, "cancelled")
+    kept = writer.submit(insert_role, "kept")
+    assert cancelled.cancel()
+    release.set()
+
+    kept.result(5)
+    assert "cancelled" not in role_names(conn)
+
+def test_close_flushes_pending_writes(database, conn):
+    writer = WriteQueue(database)
+    futures = [writer.submit(insert_role, f"flushed-{i}") for i in range(5)]
+    writer.close(timeout=5)
+    assert all(future.done() for future in futures)
+    assert {f"flushed-{i}" for i in range(5)} <= role_names(conn)
+
+def test_run_transaction_returns_the_result(database, conn):
+    role_id = asyncio.run(run_transaction(insert_role, "async"))
+    assert conn.execute("SELECT name FROM role WHERE id = ?", (role_id,)).fetchone() == ("async",)